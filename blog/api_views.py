@@ -5,8 +5,9 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 
-from .models import Post, Comment
+from .models import Post
 from .serializers import ReactionSerializer
+from . import reactions
 
 class ReactionView(APIView):
     permission_classes = [IsAuthenticated]
@@ -23,13 +24,10 @@ class ReactionView(APIView):
             context={"request": request, "post": post}
         )
         serializer.is_valid(raise_exception=True)
-        reaction = serializer.save()
 
-        # Ajusta los campos si tu modelo Comment usa 'author'/'text' u otros nombres
-        Comment.objects.create(
-            post=post,
-            author=request.user,
-            text=f"{request.user.username} reaccionó con {reaction.type}"
-        )
+        # Misma escritura que toggle_reaction/react_api (ver blog/reactions.py)
+        result = reactions.react(post, request.user, serializer.validated_data["type"])
 
-        return Response(ReactionSerializer(reaction).data, status=status.HTTP_201_CREATED)
+        data = ReactionSerializer(result.reaction).data
+        data["counts"] = result.counts
+        return Response(data, status=status.HTTP_201_CREATED)
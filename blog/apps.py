@@ -6,3 +6,9 @@ class BlogConfig(AppConfig):
 
     def ready(self):
         from . import signals  # noqa
+        from . import notifications  # noqa  (registra los handlers de blog/jobs.py)
+        from django.db.backends.signals import connection_created
+        from .sqlite import apply_pragmas
+        connection_created.connect(apply_pragmas, dispatch_uid="blog_sqlite_pragmas")
+        from .page_cache import check_backend
+        check_backend()
@@ -1,27 +1,54 @@
-from blog.models import Notification
+from django.core.cache import cache
+from django.db import transaction
 from taggit.models import Tag
 
+from blog import follows, notifications
+
+
+def _lazy(func):
+    """
+    Valor perezoso para plantillas: Django llama a los callables al resolver
+    la variable, así que la consulta solo ocurre si la plantilla la usa
+    (y una sola vez por render).
+    """
+    result = []
+
+    def value():
+        if not result:
+            result.append(func())
+        return result[0]
+    return value
+
 
 def unread_notifications(request):
-    """Agrega contador y lista de notificaciones al contexto global"""
+    """Agrega contador y lista de notificaciones al contexto global (desde caché)"""
     if request.user.is_authenticated:
+        user_id = request.user.id
         return {
-            "unread_count": request.user.notifications.filter(is_read=False).count(),
-            "notifications": request.user.notifications.all().order_by("-created_at")[:8],
+            "unread_count": _lazy(lambda: notifications.unread_count(user_id)),
+            "notifications": _lazy(lambda: notifications.latest(user_id)),
         }
     return {"unread_count": 0, "notifications": []}
 
 
+NAV_TAGS_KEY = "nav:all_tags"
+
+
+def _nav_tags():
+    # La barra de tags sale en todas las páginas; signals.invalidate_nav_tags la
+    # borra al crear, renombrar o borrar un tag
+    return cache.get_or_set(NAV_TAGS_KEY, lambda: list(Tag.objects.all()[:15]), 300)
+
+
+def invalidate_nav_tags():
+    transaction.on_commit(lambda: cache.delete(NAV_TAGS_KEY))
+
 
 def global_tags(request):
     """Devuelve los tags para usarlos en todas las plantillas"""
-    return {"all_tags": Tag.objects.all()[:15]}
+    return {"all_tags": _lazy(_nav_tags)}
 
 
-def latest_notifications(request):
-    """Devuelve las últimas notificaciones para el dropdown de la campanita"""
-    if request.user.is_authenticated:
-        return {
-            "notifications": request.user.notifications.all().order_by("-created_at")[:8]
-        }
-    return {"notifications": []}
+def followed(request):
+    """Autores y tags que sigue el usuario (``follows.authors`` / ``follows.tags``)"""
+    return {"follows": _lazy(lambda: follows.for_request(request))}
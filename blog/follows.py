@@ -0,0 +1,53 @@
+"""
+Autores y tags que sigue cada usuario (``FollowSet``).
+
+Se carga con una sola consulta, se guarda en caché por usuario y se memoriza
+en el request, así que saber si se sigue a un autor o a un tag es un ``in``
+sobre un frozenset: sin consultas por tarjeta. Las señales de Subscription
+(blog/signals.py) invalidan la caché al seguir / dejar de seguir.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Subscription
+
+CACHE_TIMEOUT = 3600
+
+FollowSet = namedtuple("FollowSet", "authors tags")
+EMPTY = FollowSet(frozenset(), frozenset())
+
+
+def _key(user_id):
+    return f"follows:{user_id}"
+
+
+def compute(user_id):
+    authors, tags = set(), set()
+    for author_id, tag_id in Subscription.objects.filter(user_id=user_id).values_list("author_id", "tag_id"):
+        if author_id:
+            authors.add(author_id)
+        if tag_id:
+            tags.add(tag_id)
+    return FollowSet(frozenset(authors), frozenset(tags))
+
+
+def load(user_id):
+    """FollowSet del usuario (desde caché; una consulta si no está)."""
+    return cache.get_or_set(_key(user_id), lambda: compute(user_id), CACHE_TIMEOUT)
+
+
+def for_request(request):
+    """FollowSet del usuario del request, cargado una sola vez por request."""
+    if not request.user.is_authenticated:
+        return EMPTY
+    if not hasattr(request, "_follow_set"):
+        request._follow_set = load(request.user.id)
+    return request._follow_set
+
+
+def invalidate(*user_ids):
+    keys = [_key(uid) for uid in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
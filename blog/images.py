@@ -0,0 +1,150 @@
+"""
+Derivados de imágenes (portadas y avatares).
+
+Cada imagen subida se reescala a varios anchos y se codifica en WebP y JPEG
+sin metadatos (blog/imaging.py). Los nombres dependen solo del contenido:
+``derived/<ab>/<hash>-<ancho>[sq].<ext>``, así que regenerar es idempotente y
+dos subidas iguales comparten derivados. El mapa resultante se guarda en
+``Post.cover_variants`` / ``Profile.avatar_variants``::
+
+    {"source": "covers/x.jpeg", "hash": "...", "width": 1200, "height": 800,
+     "webp": {"320": "derived/..", ...}, "jpeg": {"320": "derived/..", ...}}
+
+Fuera del request: al guardar solo se marca ``*_state = "pending"`` y se encola
+``images.process``; el worker (``run_jobs``) pasa el decodificado/reescalado a
+un pool acotado de procesos (``IMAGE_WORKERS``). Mientras tanto las plantillas
+(``{% responsive_img %}`` / ``{% avatar_img %}``) usan la imagen original.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import UnidentifiedImageError
+
+from . import imaging, jobs
+from .models import Post, Profile
+
+logger = logging.getLogger(__name__)
+
+COVER_WIDTHS = (320, 640, 960)
+AVATAR_SIZES = (48, 96, 160, 320)   # cuadrados: 32–48 px en listas, 140 px en el perfil (x2)
+RENDER_TIMEOUT = 60
+
+# Qué imagen de qué modelo: (modelo, campo, anchos, cuadrada)
+TARGETS = {
+    "post_cover": (Post, "cover", COVER_WIDTHS, False),
+    "avatar": (Profile, "avatar", AVATAR_SIZES, True),
+}
+
+_pool = None
+
+
+def _executor():
+    """Pool de procesos perezoso (uno por proceso). ``IMAGE_WORKERS = 0`` procesa en línea."""
+    global _pool
+    workers = getattr(settings, "IMAGE_WORKERS", 2)
+    if workers <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def _render(data, widths, square):
+    pool = _executor()
+    if pool is None:
+        return imaging.render(data, widths, square)
+    return pool.submit(imaging.render, data, widths, square).result(timeout=RENDER_TIMEOUT)
+
+
+def build_variants(field_file, widths, square=False, storage=None):
+    """
+    Genera los derivados de ``field_file`` (solo escribe los que faltan) y
+    devuelve el mapa de variantes. Si la imagen no se puede leer devuelve solo
+    ``{"source": ...}``: las plantillas usan entonces la original.
+    """
+    storage = storage or default_storage
+    variants = {"source": field_file.name}
+    try:
+        with storage.open(field_file.name, "rb") as fh:
+            data = fh.read()
+        digest, width, height, files = _render(data, widths, square)
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("No se pudo procesar %s: %s", field_file.name, exc)
+        return variants
+
+    variants.update({"hash": digest, "width": width, "height": height})
+    for (ext, size), content in sorted(files.items()):
+        name = imaging.derived_name(digest, size, ext, square)
+        if not storage.exists(name):
+            storage.save(name, ContentFile(content))
+        variants.setdefault(ext, {})[str(size)] = name
+    return variants
+
+
+def needs_refresh(field_file, variants):
+    """True si el archivo actual no coincide con el que generó ``variants``."""
+    return (field_file.name or None) != ((variants or {}).get("source") or None)
+
+
+def srcset(variants, ext, storage=None):
+    storage = storage or default_storage
+    return ", ".join(
+        f"{storage.url(name)} {width}w"
+        for width, name in sorted((variants or {}).get(ext, {}).items(), key=lambda kv: int(kv[0]))
+    )
+
+
+def best(variants, ext, width, storage=None):
+    """URL del derivado más pequeño que cubre ``width`` (o el mayor disponible)."""
+    storage = storage or default_storage
+    options = sorted((int(w), name) for w, name in (variants or {}).get(ext, {}).items())
+    if not options:
+        return None
+    for w, name in options:
+        if w >= width:
+            return storage.url(name)
+    return storage.url(options[-1][1])
+
+
+# --------- Programación y trabajo ----------
+def schedule(instance, target, force=False):
+    """
+    Llamado desde post_save: si cambió la imagen marca el estado como
+    'pending' y encola el procesamiento. Devuelve True si encoló algo.
+    """
+    model, field, _, _ = TARGETS[target]
+    image = getattr(instance, field)
+    if not force and not needs_refresh(image, getattr(instance, f"{field}_variants")):
+        return False
+    name = image.name or ""
+    values = {
+        f"{field}_variants": {"source": name} if name else {},
+        f"{field}_state": "pending" if name else "",
+    }
+    for attr, value in values.items():
+        setattr(instance, attr, value)
+    # update(): sin volver a disparar post_save
+    model.objects.filter(pk=instance.pk).update(**values)
+    if name:
+        jobs.enqueue("images.process", target=target, pk=instance.pk)
+    return bool(name)
+
+
+@jobs.handler("images.process", atomic=False)
+def process(target, pk):
+    """Genera los derivados y guarda el mapa. Sin transacción: tarda lo que tarde Pillow."""
+    model, field, widths, square = TARGETS[target]
+    obj = model.objects.filter(pk=pk).only("id", field).first()
+    image = getattr(obj, field, None)
+    if not image:
+        return False
+    variants = build_variants(image, widths, square)
+    state = "ready" if "jpeg" in variants else "failed"
+    # Si la imagen cambió mientras se procesaba, este resultado ya no vale
+    model.objects.filter(pk=pk, **{field: image.name}).update(
+        **{f"{field}_variants": variants, f"{field}_state": state}
+    )
+    return state == "ready"
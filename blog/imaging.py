@@ -0,0 +1,63 @@
+"""
+Decodificar, reescalar y codificar imágenes con Pillow.
+
+Módulo sin Django a propósito: ``render`` se ejecuta en los procesos del pool
+de blog/images.py y solo recibe y devuelve bytes.
+"""
+import hashlib
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+
+def content_hash(data):
+    """sha256 del contenido (16 primeros hex)."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def derived_name(digest, width, ext, square=False):
+    return f"derived/{digest[:2]}/{digest}-{width}{'sq' if square else ''}.{ext}"
+
+
+def _resize(img, width, square):
+    if square:
+        return ImageOps.fit(img, (width, width), Image.LANCZOS)
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def _encode(img, ext):
+    opts = dict(FORMATS[ext])
+    fmt = opts.pop("format")
+    if fmt == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    buf = BytesIO()
+    img.save(buf, fmt, **opts)   # sin exif=...: se descartan los metadatos
+    return buf.getvalue()
+
+
+def render(data, widths, square=False):
+    """
+    Devuelve ``(digest, ancho, alto, {(ext, ancho): bytes})`` con un derivado por
+    ancho y formato. No amplía: si la imagen es más pequeña que todos los
+    anchos se usa su propio ancho.
+    """
+    digest = content_hash(data)
+    img = Image.open(BytesIO(data))
+    img = ImageOps.exif_transpose(img)
+    img.load()
+    limit = min(img.width, img.height) if square else img.width
+    sizes = sorted({w for w in widths if w <= limit} or {limit})
+    files = {}
+    for width in sizes:
+        resized = _resize(img, width, square)
+        for ext in FORMATS:
+            files[(ext, width)] = _encode(resized, ext)
+    return digest, img.width, img.height, files
@@ -0,0 +1,244 @@
+"""
+Instrumentación de consultas por vista (``QUERY_INSTRUMENTATION`` en settings).
+
+``QueryInstrumentationMiddleware`` envuelve cada request con
+``connection.execute_wrapper`` en todas las bases y mide:
+
+- número de consultas y tiempo total de SQL;
+- consultas repetidas: misma "huella" (SQL sin valores) más de una vez,
+  típico de acceder a una propiedad o relación por cada fila en la plantilla;
+- tiempo de render de plantillas (backend ``TimedDjangoTemplates``).
+
+Lo publica en la cabecera ``Server-Timing`` (visible en las DevTools), en una
+línea de log ``blog.instrumentation`` (``key=valor``) y en un agregado en
+memoria por vista que el staff ve en /instrumentacion/ (uno por proceso).
+
+``QUERY_BUDGETS``: máximo de consultas por nombre de URL. Pasarse deja un
+warning en el log y hace fallar ``QueryBudgetTests`` (blog/tests.py).
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+# Consultas máximas por vista (sesión, usuario y context processors incluidos),
+# medidas en frío —sin caché de página ni de la campanita— con sesión iniciada,
+# que es el caso más caro. No dependen de cuántas filas se muestren.
+QUERY_BUDGETS = {
+    "blog:post_list": 13,
+    "blog:post_by_tag": 13,
+    "blog:search": 14,
+    "blog:post_detail": 18,
+    "blog:post_by_platform": 13,
+    "blog:profile_detail": 13,
+    "blog:my_personal_feed": 13,
+    "blog:my_subscriptions": 13,
+    "blog:notification_list": 10,
+    "blog:my_drafts": 11,
+    "blog:mis_posts_publicados": 11,
+    "blog:author_feed": 2,
+    "blog:tag_feed": 2,
+}
+
+DUPLICATES_SHOWN = 5
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_SPACES_RE = re.compile(r"\s+")
+
+_current = contextvars.ContextVar("query_stats", default=None)
+
+
+def enabled():
+    return getattr(settings, "QUERY_INSTRUMENTATION", False)
+
+
+def budget_for(view_name):
+    return QUERY_BUDGETS.get(view_name)
+
+
+def fingerprint(sql):
+    """SQL sin valores: ``IN (%s, %s, ...)`` y números literales se igualan."""
+    sql = _SPACES_RE.sub(" ", sql).strip()
+    sql = _IN_LIST_RE.sub("IN (…)", sql)
+    return _NUMBER_RE.sub("?", sql)
+
+
+# --------- Medición de un request ----------
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``execute_wrapper``: cuenta y cronometra cada consulta."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Consultas de más: las repeticiones de una misma huella."""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def top_duplicates(self, limit=DUPLICATES_SHOWN):
+        return [(sql, n) for sql, n in self.fingerprints.most_common(limit) if n > 1]
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;desc="{self.queries} consultas";dur={self.sql_time * 1000:.1f}',
+            f'dup;desc="{self.duplicates} repetidas"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f"total;dur={self.total_time * 1000:.1f}",
+        ])
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "sql_ms": round(self.sql_time * 1000, 1),
+            "duplicates": self.duplicates,
+            "template_ms": round(self.template_time * 1000, 1),
+            "total_ms": round(self.total_time * 1000, 1),
+        }
+
+
+# --------- Render de plantillas ----------
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        # Solo cuenta la plantilla de fuera (render_to_string anidados incluidos en ella)
+        stats._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats._template_depth -= 1
+            if not stats._template_depth:
+                stats.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Backend de plantillas de Django que mide el tiempo de render."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# --------- Agregado en memoria ----------
+_report = {}
+_report_lock = threading.Lock()
+
+
+def _record(view_name, stats):
+    with _report_lock:
+        row = _report.setdefault(view_name, {
+            "requests": 0, "queries": 0, "max_queries": 0, "duplicates": 0,
+            "sql_ms": 0.0, "template_ms": 0.0, "total_ms": 0.0, "over_budget": 0,
+            "worst": Counter(),
+        })
+        row["requests"] += 1
+        row["queries"] += stats.queries
+        row["max_queries"] = max(row["max_queries"], stats.queries)
+        row["duplicates"] += stats.duplicates
+        row["sql_ms"] += stats.sql_time * 1000
+        row["template_ms"] += stats.template_time * 1000
+        row["total_ms"] += stats.total_time * 1000
+        budget = budget_for(view_name)
+        if budget is not None and stats.queries > budget:
+            row["over_budget"] += 1
+        for sql, n in stats.top_duplicates():
+            row["worst"][sql] = max(row["worst"][sql], n)
+
+
+def report():
+    """Filas por vista con medias, ordenadas por consultas medias (descendente)."""
+    with _report_lock:
+        rows = [
+            {
+                "view": view,
+                "requests": row["requests"],
+                "avg_queries": row["queries"] / row["requests"],
+                "max_queries": row["max_queries"],
+                "budget": budget_for(view),
+                "over_budget": row["over_budget"],
+                "avg_duplicates": row["duplicates"] / row["requests"],
+                "avg_sql_ms": row["sql_ms"] / row["requests"],
+                "avg_template_ms": row["template_ms"] / row["requests"],
+                "avg_total_ms": row["total_ms"] / row["requests"],
+                "worst": row["worst"].most_common(DUPLICATES_SHOWN),
+            }
+            for view, row in _report.items()
+        ]
+    return sorted(rows, key=lambda r: r["avg_queries"], reverse=True)
+
+
+def reset():
+    with _report_lock:
+        _report.clear()
+
+
+# --------- Middleware ----------
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "(sin vista)"
+
+
+class QueryInstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not enabled():
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        stats.total_time = time.perf_counter() - start
+
+        view_name = _view_name(request)
+        response["Server-Timing"] = stats.server_timing()
+        response.query_stats = stats   # los tests leen el recuento de aquí
+        _record(view_name, stats)
+
+        fields = {"view": view_name, "method": request.method, "status": response.status_code, **stats.as_dict()}
+        line = " ".join(f"{key}={value}" for key, value in fields.items())
+        budget = budget_for(view_name)
+        if budget is not None and stats.queries > budget:
+            logger.warning("%s budget=%s", line, budget, extra={"query_stats": fields})
+        else:
+            logger.info(line, extra={"query_stats": fields})
+        return response
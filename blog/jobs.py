@@ -0,0 +1,136 @@
+"""
+Cola de trabajos respaldada por la base de datos (modelo BackgroundJob).
+
+- ``enqueue(kind, **payload)`` inserta una fila dentro de la transacción en
+  curso: si la escritura que lo origina se revierte, el trabajo también.
+- ``@handler(kind)`` registra la función que lo procesa; recibe ``**payload``.
+- ``manage.py run_jobs`` (línea ``worker`` del Procfile) va drenando la cola.
+- Con ``JOBS_EAGER = True`` (desarrollo sin worker) el trabajo se ejecuta al
+  confirmar la transacción, en el mismo proceso. Si falla queda ``failed``
+  (no hay worker que lo reintente).
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+LOCK_TIMEOUT = timedelta(minutes=10)  # un "running" más viejo se considera abandonado
+
+_HANDLERS = {}
+_NON_ATOMIC = set()
+
+
+def handler(kind, atomic=True):
+    """
+    Decorador: registra la función que procesa los trabajos de tipo ``kind``.
+    Con ``atomic=False`` no se envuelve en una transacción (trabajos largos
+    fuera de la base de datos, p. ej. procesar imágenes).
+    """
+    def decorator(func):
+        _HANDLERS[kind] = func
+        if not atomic:
+            _NON_ATOMIC.add(kind)
+        return func
+    return decorator
+
+
+def is_eager():
+    return getattr(settings, "JOBS_EAGER", False)
+
+
+def enqueue(kind, **payload):
+    if kind not in _HANDLERS:
+        raise ValueError(f"No hay handler registrado para {kind!r}")
+    job = BackgroundJob.objects.create(kind=kind, payload=payload)
+    if is_eager():
+        transaction.on_commit(lambda: run_claimed([_claim(job.pk)], retry=False))
+    return job
+
+
+# --------- Worker ----------
+def _claim(job_id):
+    now = timezone.now()
+    claimed = BackgroundJob.objects.filter(pk=job_id, status="pending").update(
+        status="running", locked_at=now
+    )
+    return BackgroundJob.objects.get(pk=job_id) if claimed else None
+
+
+def claim_batch(limit=50):
+    """Marca como 'running' hasta ``limit`` trabajos listos y los devuelve."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", run_after__lte=now)
+            .order_by("id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # El filtro por status evita que dos workers tomen la misma fila
+        BackgroundJob.objects.filter(id__in=ids, status="pending").update(status="running", locked_at=now)
+    return list(BackgroundJob.objects.filter(id__in=ids, status="running", locked_at=now))
+
+
+def _run_one(job, retry=True):
+    func = _HANDLERS.get(job.kind)
+    job.attempts += 1
+    try:
+        if func is None:
+            raise LookupError(f"No hay handler registrado para {job.kind!r}")
+        if job.kind in _NON_ATOMIC:
+            func(**job.payload)
+        else:
+            with transaction.atomic():
+                func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= MAX_ATTEMPTS or not retry:
+            job.status = "failed"
+            job.finished_at = timezone.now()
+        else:
+            # Reintento con espera exponencial: 2, 4, 8, 16 s...
+            job.status = "pending"
+            job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        logger.exception("Trabajo %s falló (intento %s)", job, job.attempts)
+    else:
+        job.status = "done"
+        job.last_error = ""
+        job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=["status", "attempts", "run_after", "locked_at", "last_error", "finished_at"])
+    return job.status == "done"
+
+
+def run_claimed(jobs, retry=True):
+    """Ejecuta trabajos ya reclamados. Devuelve cuántos terminaron bien."""
+    return sum(1 for job in jobs if job is not None and _run_one(job, retry))
+
+
+def run_pending(limit=50):
+    """Un ciclo del worker. Devuelve (procesados, correctos)."""
+    jobs = claim_batch(limit)
+    return len(jobs), run_claimed(jobs)
+
+
+def requeue_stale():
+    """Devuelve a la cola los trabajos 'running' de un worker que murió."""
+    cutoff = timezone.now() - LOCK_TIMEOUT
+    return BackgroundJob.objects.filter(status="running", locked_at__lt=cutoff).update(
+        status="pending", locked_at=None
+    )
+
+
+def purge_finished(days=7):
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = BackgroundJob.objects.filter(status="done", finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,30 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog import timeline
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Reparte a los timelines los posts publicados en los últimos N días (idempotente)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+        post_ids = list(
+            Post.objects.filter(status="published", created__gte=since)
+            .order_by("created").values_list("id", flat=True)
+        )
+        start = time.monotonic()
+        total = 0
+        for post_id in post_ids:
+            total += timeline.fanout(post_id)
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(post_ids)} posts repartidos ({total} entradas) · {elapsed:.2f}s"
+        ))
@@ -0,0 +1,75 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+from blog import reactions
+from blog.instrumentation import RequestStats
+from blog.models import Post, REACTION_CHOICES
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark de blog/reactions.py: sentencias SQL y tiempo por reacción. "
+        "Usa bases temporales migradas desde cero (no toca db.sqlite3) y confirma cada "
+        "reacción, como en producción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reactions", type=int, default=500, help="Número de reacciones a aplicar.")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--no-activity", action="store_true", help="Sin comentario automático.")
+
+    def handle(self, *args, **options):
+        # Una base temporal por alias (con SQLITE_SPLIT_INTERACTIONS las reacciones
+        # van en otra); la réplica es un espejo de default (TEST MIRROR)
+        with tempfile.TemporaryDirectory() as tmp:
+            for alias in connections:
+                test = connections[alias].settings_dict["TEST"]
+                if not test.get("MIRROR"):
+                    test["NAME"] = os.path.join(tmp, f"{alias}.sqlite3")
+            old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+            try:
+                self._run(options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def _run(self, options):
+        author = User.objects.create_user("bench-author")
+        post = Post.objects.create(title="bench reactions", author=author, content="bench", status="published")
+        users = [User.objects.create_user(f"bench-{i}") for i in range(options["users"])]
+        types = [key for key, _ in REACTION_CHOICES]
+        activity = not options["no_activity"]
+
+        timings, statements = [], []
+        for i in range(options["reactions"]):
+            user = users[i % len(users)]
+            reaction_type = types[(i // len(users)) % len(types)]
+            stats = RequestStats()
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                start = time.perf_counter()
+                reactions.react(post, user, reaction_type, toggle=True, activity=activity)
+                timings.append(time.perf_counter() - start)
+            statements.append(stats.queries)
+
+        ms = sorted(t * 1000 for t in timings)
+        p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+        self.stdout.write(f"reacciones: {len(ms)}  (comentario automático: {'sí' if activity else 'no'})")
+        self.stdout.write(
+            f"sentencias/reacción: media {statistics.mean(statements):.1f}, "
+            f"mín {min(statements)}, máx {max(statements)}"
+        )
+        self.stdout.write(
+            f"tiempo/reacción: p50 {statistics.median(ms):.2f} ms, p95 {p95:.2f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(ms) / sum(timings):.0f} reacciones/s"
+        ))
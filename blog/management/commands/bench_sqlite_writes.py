@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog import sqlite
+
+SCHEMA = """
+CREATE TABLE counters (id INTEGER PRIMARY KEY, n INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, worker INTEGER, payload TEXT, created REAL);
+"""
+
+
+def _transaction(conn, worker, i):
+    # Como una vista: lee (get_or_create) y luego escribe en la misma transacción
+    try:
+        conn.execute("BEGIN")
+        conn.execute("SELECT n FROM counters WHERE id = ?", (i % 10,)).fetchone()
+        conn.execute("UPDATE counters SET n = n + 1 WHERE id = ?", (i % 10,))
+        conn.execute("INSERT INTO events (worker, payload, created) VALUES (?, ?, ?)",
+                     (worker, "x" * 200, time.time()))
+        conn.execute("COMMIT")
+    except sqlite3.OperationalError:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def _worker(path, pragmas, retry, writes, worker):
+    conn = sqlite3.connect(path, isolation_level=None)   # timeout del driver: 5 s (igual que Django)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    latencies, errors = [], 0
+    for i in range(writes):
+        start = time.perf_counter()
+        try:
+            if retry:
+                sqlite.call_with_retry(_transaction, conn, worker, i)
+            else:
+                _transaction(conn, worker, i)
+        except sqlite3.OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de escrituras concurrentes en SQLite: varios procesos haciendo "
+        "transacciones cortas con la configuración de serie y con el perfil de producción "
+        "(SQLITE_PRAGMAS + reintentos). Usa una base temporal, no toca db.sqlite3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Procesos escritores.")
+        parser.add_argument("--writes", type=int, default=300, help="Transacciones por proceso.")
+
+    def _run(self, label, pragmas, retry, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.sqlite3")
+            conn = sqlite3.connect(path)
+            conn.executescript(SCHEMA)
+            conn.executemany("INSERT INTO counters (id) VALUES (?)", [(i,) for i in range(10)])
+            conn.commit()
+            conn.close()
+
+            args = [(path, pragmas, retry, options["writes"], w) for w in range(options["workers"])]
+            start = time.perf_counter()
+            with multiprocessing.Pool(options["workers"]) as pool:
+                results = pool.starmap(_worker, args)
+            elapsed = time.perf_counter() - start
+
+        ms = sorted(t * 1000 for latencies, _ in results for t in latencies)
+        errors = sum(e for _, e in results)
+        ok = len(ms) - errors
+        p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+        self.stdout.write(
+            f"{label:<11} {ok:>6} ok {errors:>5} errores · {ok / elapsed:8.0f} tx/s · "
+            f"p50 {statistics.median(ms):7.2f} ms · p99 {p99:8.2f} ms"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['workers']} procesos × {options['writes']} transacciones (lectura + 2 escrituras)"
+        )
+        self._run("de serie", {}, False, options)
+        self._run("producción", settings.SQLITE_PRAGMAS, True, options)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los derivados WebP/JPEG de portadas y avatares existentes (pendientes, "
+        "fallidos o desactualizados; --force para todos)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenera aunque ya estén listos.")
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        for target, (model, field, _, _) in images.TARGETS.items():
+            qs = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            if not options["force"]:
+                qs = qs.filter(~Q(**{f"{field}_state": "ready"}))
+            ok = total = 0
+            for pk in qs.values_list("pk", flat=True).iterator(chunk_size=options["batch_size"]):
+                total += 1
+                ok += images.process(target, pk)
+            self.stdout.write(f"{target}: {ok}/{total} listos")
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(f"Derivados generados · {elapsed:.2f}s"))
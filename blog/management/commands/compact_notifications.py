@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from blog import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica la retención de notificaciones (NOTIFICATION_RETENTION): archiva o borra "
+        "las viejas por lotes cortos e informa filas y tiempo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--pause", type=float, default=0.0, help="Pausa (s) entre lotes.")
+        parser.add_argument("--read-days", type=int, help="Sobrescribe READ_DAYS.")
+        parser.add_argument("--unread-days", type=int, help="Sobrescribe UNREAD_DAYS.")
+        parser.add_argument("--no-archive", action="store_true", help="Borra sin copiar al archivo.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta, no toca nada.")
+
+    def handle(self, *args, **options):
+        conf = retention.policy(
+            READ_DAYS=options["read_days"],
+            UNREAD_DAYS=options["unread_days"],
+            ARCHIVE=False if options["no_archive"] else None,
+        )
+        self.stdout.write(
+            f"Política: leídas > {conf['READ_DAYS']} días, no leídas > {conf['UNREAD_DAYS']} días, "
+            f"archivo {'sí' if conf['ARCHIVE'] else 'no'}"
+        )
+        report = retention.compact(
+            conf,
+            chunk_size=options["chunk_size"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+        )
+        if report["dry_run"]:
+            self.stdout.write(self.style.WARNING(
+                f"[dry-run] {report['deleted']} notificaciones saldrían de la tabla "
+                f"({report['archived']} al archivo) · {report['elapsed']:.2f}s"
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['deleted']} notificaciones borradas, {report['archived']} archivadas "
+            f"en {report['chunks']} lotes · {report['elapsed']:.2f}s"
+        ))
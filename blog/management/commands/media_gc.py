@@ -0,0 +1,63 @@
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog import media_gc
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra de MEDIA_ROOT los archivos que ya no usa ningún post ni perfil "
+        "(más viejos que el periodo de gracia). --dry-run solo informa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=24)
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta, no borra nada.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--max-files", type=int, help="Archivos a revisar en esta ejecución.")
+        parser.add_argument("--resume", action="store_true", help="Sigue donde quedó la ejecución anterior.")
+        parser.add_argument(
+            "--state-file", default=os.path.join(settings.BASE_DIR, ".media_gc.json"),
+            help="Dónde se guarda el cursor para --resume.",
+        )
+
+    def _save_state(self, path, last):
+        with open(path, "w") as fh:
+            json.dump({"after": last}, fh)
+
+    def handle(self, *args, **options):
+        state_file = options["state_file"]
+        after = None
+        if options["resume"] and os.path.exists(state_file):
+            with open(state_file) as fh:
+                after = json.load(fh).get("after")
+            self.stdout.write(f"Reanudando después de {after}")
+
+        # En dry-run no se mueve el cursor
+        on_chunk = None if options["dry_run"] else (lambda last: self._save_state(state_file, last))
+        report = media_gc.collect(
+            grace=timedelta(hours=options["grace_hours"]),
+            dry_run=options["dry_run"],
+            chunk_size=options["chunk_size"],
+            max_files=options["max_files"],
+            after=after,
+            on_chunk=on_chunk,
+        )
+        if report["finished"] and os.path.exists(state_file) and not options["dry_run"]:
+            os.remove(state_file)
+
+        elapsed = report["elapsed"] or 1e-9
+        mb = report["scanned_bytes"] / 1e6
+        self.stdout.write(
+            f"{report['references']} referencias · {report['scanned']} archivos ({mb:.1f} MB) revisados "
+            f"· {report['scanned'] / elapsed:.0f} archivos/s, {mb / elapsed:.1f} MB/s"
+        )
+        verb = "se borrarían" if report["dry_run"] else "borrados"
+        msg = f"{report['orphans']} huérfanos {verb} ({report['orphan_bytes'] / 1e6:.1f} MB) · {elapsed:.2f}s"
+        if not report["finished"]:
+            msg += f" · pendiente desde {report['last']} (usa --resume)"
+        self.stdout.write(self.style.WARNING(msg) if report["dry_run"] else self.style.SUCCESS(msg))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from blog import routers
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia a su base (INTERACTION_DATABASES) las filas de notificaciones, reacciones y "
+        "votos que siguen en default. Las originales no se borran: quedan de respaldo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        batch_size = options["batch_size"]
+        models = routers.split_models()
+        if not models:
+            self.stdout.write(self.style.WARNING(
+                "No hay tablas repartidas (SQLITE_SPLIT_INTERACTIONS=True activa el reparto)."
+            ))
+            return
+
+        for model in models:
+            alias = routers.database_for(model)
+            source = model._base_manager.using(DEFAULT_DB_ALIAS).order_by("pk")
+            copied, last = 0, None
+            while True:
+                chunk = source.filter(pk__gt=last) if last is not None else source
+                rows = list(chunk[:batch_size])
+                if not rows:
+                    break
+                with transaction.atomic(using=alias):
+                    # Mismos ids: las FK del resto de tablas siguen valiendo
+                    model._base_manager.using(alias).bulk_create(rows, ignore_conflicts=True)
+                copied += len(rows)
+                last = rows[-1].pk
+            total = model._base_manager.using(alias).count()
+            self.stdout.write(f"  {model._meta.label}: {copied} copiadas → {alias} ({total} en destino)")
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(f"{len(models)} tablas copiadas en {elapsed:.2f}s"))
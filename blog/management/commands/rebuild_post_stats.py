@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero la tabla PostStats (reseñas y comentarios)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        with transaction.atomic():
+            total = stats.rebuild_all(batch_size=options["batch_size"])
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} posts recalculados en {elapsed:.2f}s"))
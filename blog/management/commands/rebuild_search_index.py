@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice FTS5 de búsqueda de posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            self.stdout.write(self.style.WARNING("La base de datos no es SQLite; no hay índice FTS5."))
+            return
+        start = time.monotonic()
+        total = search.rebuild_index(batch_size=options["batch_size"])
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} posts indexados en {elapsed:.2f}s"))
@@ -0,0 +1,33 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import timeline
+from blog.models import Subscription
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el timeline materializado de mi-feed (todos los usuarios con suscripciones o uno)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username a reconstruir (por defecto, todos).")
+        parser.add_argument("--limit", type=int, default=timeline.BACKFILL_LIMIT,
+                            help="Posts más recientes que se cargan por usuario (los anteriores no entran en mi-feed).")
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            user_ids = list(User.objects.filter(username=options["user"]).values_list("id", flat=True))
+            if not user_ids:
+                raise CommandError(f"No existe el usuario {options['user']}")
+        else:
+            user_ids = list(Subscription.objects.values_list("user_id", flat=True).distinct())
+
+        start = time.monotonic()
+        total = 0
+        for user_id in user_ids:
+            total += timeline.rebuild_user(user_id, limit=options["limit"])
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(user_ids)} timelines reconstruidos ({total} entradas) · {elapsed:.2f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import stats
+from blog.models import Post, ReactionCounter
+from blog.routers import atomic_for
+
+
+class Command(BaseCommand):
+    help = "Compara ReactionCounter con la tabla Reaction y corrige los contadores desviados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa, no corrige.")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        batch_size = options["batch_size"]
+        ids = list(Post.objects.order_by("id").values_list("id", flat=True))
+        drifted = []
+
+        for offset in range(0, len(ids), batch_size):
+            chunk = ids[offset:offset + batch_size]
+            with atomic_for(ReactionCounter):
+                computed = stats.computed_reaction_counts(chunk)
+                stored = stats.reaction_counts_for(chunk)
+                bad = [
+                    pid for pid in chunk
+                    if any(count != computed.get((pid, key), 0) for key, count in stored[pid].items())
+                ]
+                if bad and not options["dry_run"]:
+                    stats.rebuild_reaction_counters(bad)
+            drifted.extend(bad)
+
+        for pid in drifted[:20]:
+            self.stdout.write(f"  post {pid}: contadores desviados")
+        elapsed = time.monotonic() - start
+        verb = "encontrados" if options["dry_run"] else "corregidos"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(ids)} posts revisados, {len(drifted)} {verb} en {elapsed:.2f}s"
+        ))
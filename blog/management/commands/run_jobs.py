@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import jobs
+
+
+class Command(BaseCommand):
+    help = "Worker de la cola BackgroundJob: procesa trabajos pendientes (notificaciones, etc.)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--sleep", type=float, default=1.0, help="Espera (s) cuando la cola está vacía.")
+        parser.add_argument("--once", action="store_true", help="Vacía la cola y termina.")
+        parser.add_argument("--purge-days", type=int, default=7, help="Borra trabajos terminados más viejos.")
+
+    def handle(self, *args, **options):
+        total = ok = 0
+        last_maintenance = 0.0
+        self.stdout.write("👷 Worker de trabajos iniciado")
+        try:
+            while True:
+                # Mantenimiento cada minuto: trabajos abandonados y limpieza
+                if time.monotonic() - last_maintenance > 60:
+                    requeued = jobs.requeue_stale()
+                    if requeued:
+                        self.stdout.write(f"{requeued} trabajos abandonados devueltos a la cola")
+                    jobs.purge_finished(options["purge_days"])
+                    last_maintenance = time.monotonic()
+
+                processed, succeeded = jobs.run_pending(options["batch_size"])
+                total += processed
+                ok += succeeded
+                if not processed:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} trabajos procesados ({ok} correctos)"))
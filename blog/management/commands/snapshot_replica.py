@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog import replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia db.sqlite3 a la réplica de solo lectura (READ_REPLICA_PATH) con la API de "
+        "backup de SQLite. Con --interval la repite cada N segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=None,
+            help=f"Segundos entre copias (READ_REPLICA_INTERVAL = {settings.READ_REPLICA_INTERVAL}).",
+        )
+        parser.add_argument("--once", action="store_true", help="Una sola copia y termina.")
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or settings.READ_REPLICA_INTERVAL
+        if interval >= replica.max_lag() and not options["once"]:
+            self.stdout.write(self.style.WARNING(
+                f"--interval {interval:g}s ≥ READ_REPLICA_MAX_LAG ({replica.max_lag()}s): "
+                "la réplica caducará entre copias y se leerá del primario."
+            ))
+        try:
+            while True:
+                started = time.monotonic()
+                report = replica.snapshot()
+                self.stdout.write(
+                    f"📸 réplica: {report['size'] / 1024 / 1024:.1f} MB en {report['elapsed']:.2f}s"
+                )
+                if options["once"]:
+                    break
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Réplica en {replica.replica_path()}"))
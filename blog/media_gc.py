@@ -0,0 +1,156 @@
+"""
+Recolector de archivos huérfanos en MEDIA_ROOT.
+
+1. Índice de referencias: ``Post.cover``, ``Profile.avatar``, sus derivados
+   (``*_variants``) y las URLs de ``<img src>`` dentro de ``Post.content``
+   (imágenes subidas con CKEditor).
+2. Recorre MEDIA_ROOT en orden estable con ``os.scandir`` (sin listar todo en
+   memoria) y, por lotes, borra —o solo informa con ``dry_run``— los archivos
+   sin referencia y más viejos que el periodo de gracia.
+3. Antes de borrar un lote se vuelve a consultar la base de datos por si algo
+   empezó a usarlos mientras tanto. ``after`` permite reanudar tras el último
+   archivo procesado (``manage.py media_gc --resume``).
+"""
+import os
+import re
+import time
+from datetime import timedelta
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import MediaBlob, Post, Profile
+
+DEFAULT_GRACE = timedelta(hours=24)
+IGNORED_NAMES = {".gitkeep", ".gitignore"}
+IMG_SRC_RE = re.compile(r"""<img\b[^>]*?\bsrc\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+
+# --------- Índice de referencias ----------
+def media_name(url):
+    """Nombre relativo a MEDIA_ROOT de una URL de MEDIA_URL (None si es externa)."""
+    path = urlsplit(url).path
+    prefix = urlsplit(settings.MEDIA_URL).path
+    if not path.startswith(prefix):
+        return None
+    return unquote(path[len(prefix):])
+
+
+def _variant_names(variants):
+    for ext in ("webp", "jpeg"):
+        yield from (variants or {}).get(ext, {}).values()
+
+
+def reference_index(chunk_size=500):
+    refs = set()
+    posts = Post.objects.values_list("cover", "cover_variants", "content")
+    for cover, variants, content in posts.iterator(chunk_size=chunk_size):
+        if cover:
+            refs.add(cover)
+        refs.update(_variant_names(variants))
+        for src in IMG_SRC_RE.findall(content or ""):
+            name = media_name(src)
+            if name:
+                refs.add(name)
+    profiles = Profile.objects.exclude(avatar="").values_list("avatar", "avatar_variants")
+    for avatar, variants in profiles.iterator(chunk_size=chunk_size):
+        if avatar:
+            refs.add(avatar)
+        refs.update(_variant_names(variants))
+    return refs
+
+
+def _still_referenced(names):
+    """De ``names``, los que un campo usa ahora mismo (pudo cambiar tras el índice)."""
+    names = list(names)
+    refs = set(Post.objects.filter(cover__in=names).values_list("cover", flat=True))
+    refs |= set(Profile.objects.filter(avatar__in=names).values_list("avatar", flat=True))
+    refs |= set(MediaBlob.objects.filter(name__in=names, refcount__gt=0).values_list("name", flat=True))
+    return refs
+
+
+# --------- Recorrido ----------
+def _key(name):
+    return tuple(name.split("/"))
+
+
+def walk(root, after=None):
+    """(nombre relativo, stat) de cada archivo bajo ``root``, en orden; salta hasta ``after``."""
+    after_key = _key(after) if after else None
+
+    def _walk(path, prefix):
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            name = f"{prefix}{entry.name}"
+            key = _key(name)
+            if entry.is_dir(follow_symlinks=False):
+                # Carpeta entera anterior al cursor: ni se abre
+                if after_key and key < after_key[:len(key)]:
+                    continue
+                yield from _walk(entry.path, f"{name}/")
+            elif entry.is_file(follow_symlinks=False):
+                if entry.name in IGNORED_NAMES or (after_key and key <= after_key):
+                    continue
+                yield name, entry.stat(follow_symlinks=False)
+
+    if os.path.isdir(root):
+        yield from _walk(root, "")
+
+
+# --------- Recolección ----------
+def _sweep(batch, dry_run):
+    """Borra (o no, en dry-run) un lote de huérfanos. Devuelve (archivos, bytes)."""
+    alive = _still_referenced(name for name, _ in batch)
+    batch = [(name, size) for name, size in batch if name not in alive]
+    if not dry_run:
+        for name, _ in batch:
+            default_storage.delete(name)
+        MediaBlob.objects.filter(name__in=[name for name, _ in batch]).delete()
+    return len(batch), sum(size for _, size in batch)
+
+
+def collect(grace=DEFAULT_GRACE, dry_run=False, chunk_size=500, max_files=None,
+            after=None, on_chunk=None, now=None):
+    """
+    Recorre MEDIA_ROOT y recoge los huérfanos. ``max_files`` corta el
+    recorrido (para repartirlo en varias ejecuciones); ``on_chunk(último)``
+    se llama tras cada lote para guardar el cursor. Devuelve un informe.
+    """
+    now = now or timezone.now()
+    cutoff = (now - grace).timestamp()
+    start = time.monotonic()
+    refs = reference_index()
+    report = {
+        "references": len(refs), "scanned": 0, "scanned_bytes": 0,
+        "orphans": 0, "orphan_bytes": 0, "last": None, "finished": True, "dry_run": dry_run,
+    }
+
+    batch = []
+    for name, st in walk(str(settings.MEDIA_ROOT), after=after):
+        if max_files is not None and report["scanned"] >= max_files:
+            report["finished"] = False
+            break
+        report["scanned"] += 1
+        report["scanned_bytes"] += st.st_size
+        report["last"] = name
+        if name not in refs and st.st_mtime < cutoff:
+            batch.append((name, st.st_size))
+        if len(batch) >= chunk_size:
+            files, size = _sweep(batch, dry_run)
+            report["orphans"] += files
+            report["orphan_bytes"] += size
+            batch = []
+            if on_chunk:
+                on_chunk(name)
+    if batch:
+        files, size = _sweep(batch, dry_run)
+        report["orphans"] += files
+        report["orphan_bytes"] += size
+    if on_chunk and report["last"]:
+        on_chunk(report["last"])
+
+    report["elapsed"] = time.monotonic() - start
+    return report
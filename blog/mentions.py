@@ -0,0 +1,63 @@
+"""
+Menciones @usuario en comentarios.
+
+``resolve(text)`` se llama una vez al crear el comentario: deduplica los
+nombres, los busca con una sola consulta ``username__in`` y devuelve los
+tramos (spans) que se guardan en ``Comment.mentions``. Las notificaciones
+(blog/notifications.py) y el filtro ``mention_links`` leen esos tramos en vez
+de volver a parsear el texto.
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+MENTION_RE = re.compile(r'@(\w+)')  # Busca palabras después de @
+
+
+def parse(text):
+    """Lista de (inicio, fin, username) para cada @mención del texto."""
+    return [(m.start(), m.end(), m.group(1)) for m in MENTION_RE.finditer(text or "")]
+
+
+def resolve(text):
+    """
+    Tramos de menciones a usuarios existentes:
+    ``[{"start", "end", "username", "user_id"}, ...]``. Una consulta como mucho.
+    """
+    found = parse(text)
+    names = {username for _, _, username in found}
+    if not names:
+        return []
+    ids = dict(User.objects.filter(username__in=names).values_list("username", "id"))
+    return [
+        {"start": start, "end": end, "username": username, "user_id": ids[username]}
+        for start, end, username in found
+        if username in ids
+    ]
+
+
+def user_ids(spans):
+    """Ids mencionados, sin repetir y en orden de aparición."""
+    return list(dict.fromkeys(span["user_id"] for span in spans or []))
+
+
+def render(text, spans):
+    """HTML escapado de ``text`` con cada mención convertida en enlace al perfil."""
+    text = text or ""
+    if not spans:
+        return escape(text)
+    parts, pos = [], 0
+    for span in sorted(spans, key=lambda s: s["start"]):
+        start, end = span["start"], span["end"]
+        # Tramo que ya no coincide con el texto (p. ej. editado): se ignora
+        if start < pos or text[start:end] != f"@{span['username']}":
+            continue
+        parts.append(escape(text[pos:start]))
+        url = reverse("blog:profile_detail", args=[span["username"]])
+        parts.append(format_html('<a href="{}" class="mention">@{}</a>', url, span["username"]))
+        pos = end
+    parts.append(escape(text[pos:]))
+    return mark_safe("".join(parts))
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    from blog import search
+
+    search.create_index(schema_editor)
+
+    Post = apps.get_model("blog", "Post")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    ct = ContentType.objects.filter(app_label="blog", model="post").first()
+
+    tags = {}
+    if ct is not None:
+        for object_id, name in TaggedItem.objects.filter(content_type=ct).values_list("object_id", "tag__name"):
+            tags.setdefault(object_id, []).append(name)
+
+    rows = [(p.pk, *search.document_for(p, tags.get(p.pk, []))) for p in Post.objects.all()]
+    if rows:
+        schema_editor.connection.cursor().executemany(
+            f"INSERT INTO {search.FTS_TABLE} (rowid, title, excerpt, tags, body) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    from blog import search
+
+    search.drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0021_post_is_visible"),
+        ("taggit", "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
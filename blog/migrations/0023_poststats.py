@@ -0,0 +1,78 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:29
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def backfill_post_stats(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    PostStats = apps.get_model("blog", "PostStats")
+    Review = apps.get_model("blog", "Review")
+    Comment = apps.get_model("blog", "Comment")
+    Reaction = apps.get_model("blog", "Reaction")
+    db = schema_editor.connection.alias  # Reaction puede estar enrutada a otra base
+
+    rows = {
+        pid: PostStats(post_id=pid) for pid in Post.objects.values_list("id", flat=True)
+    }
+    for r in Review.objects.values("post_id").annotate(
+        total=Count("id"), rsum=Sum("rating"), rcount=Count("rating")
+    ):
+        row = rows[r["post_id"]]
+        row.review_count, row.rating_sum, row.rating_count = (
+            r["total"],
+            r["rsum"] or 0,
+            r["rcount"],
+        )
+    for c in (
+        Comment.objects.filter(status="visible")
+        .exclude(is_reaction=True, text__startswith="Reacción automática:")
+        .values("post_id")
+        .annotate(total=Count("id"))
+    ):
+        rows[c["post_id"]].comment_count = c["total"]
+    for r in (
+        Reaction.objects.using(db).values("post_id", "type").annotate(total=Count("id"))
+    ):
+        field = f"{r['type']}_count"
+        if hasattr(rows[r["post_id"]], field):
+            setattr(rows[r["post_id"]], field, r["total"])
+    PostStats.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0022_post_fts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostStats",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="blog.post",
+                    ),
+                ),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                ("rating_count", models.PositiveIntegerField(default=0)),
+                ("review_count", models.PositiveIntegerField(default=0)),
+                ("comment_count", models.PositiveIntegerField(default=0)),
+                ("like_count", models.PositiveIntegerField(default=0)),
+                ("love_count", models.PositiveIntegerField(default=0)),
+                ("funny_count", models.PositiveIntegerField(default=0)),
+                ("wow_count", models.PositiveIntegerField(default=0)),
+                ("sad_count", models.PositiveIntegerField(default=0)),
+                ("angry_count", models.PositiveIntegerField(default=0)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_post_stats, migrations.RunPython.noop),
+    ]
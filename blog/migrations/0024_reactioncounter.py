@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+REACTION_TYPES = ["like", "love", "funny", "wow", "sad", "angry"]
+
+
+def move_reaction_counts(apps, schema_editor):
+    """Pasa las columnas <tipo>_count de PostStats a filas de ReactionCounter."""
+    PostStats = apps.get_model("blog", "PostStats")
+    ReactionCounter = apps.get_model("blog", "ReactionCounter")
+    db = (
+        schema_editor.connection.alias
+    )  # ReactionCounter puede estar enrutada a otra base
+
+    rows = []
+    for ps in PostStats.objects.iterator():
+        for key in REACTION_TYPES:
+            rows.append(
+                ReactionCounter(
+                    post_id=ps.post_id, type=key, count=getattr(ps, f"{key}_count")
+                )
+            )
+    ReactionCounter.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0023_poststats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReactionCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("like", "👍"),
+                            ("love", ""),
+                            ("funny", "😂"),
+                            ("wow", "😮"),
+                            ("sad", "😢"),
+                            ("angry", "😡"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reaction_counters",
+                        to="blog.post",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("post", "type")},
+            },
+        ),
+        migrations.RunPython(move_reaction_counts, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="poststats",
+            name="angry_count",
+        ),
+        migrations.RemoveField(
+            model_name="poststats",
+            name="funny_count",
+        ),
+        migrations.RemoveField(
+            model_name="poststats",
+            name="like_count",
+        ),
+        migrations.RemoveField(
+            model_name="poststats",
+            name="love_count",
+        ),
+        migrations.RemoveField(
+            model_name="poststats",
+            name="sad_count",
+        ),
+        migrations.RemoveField(
+            model_name="poststats",
+            name="wow_count",
+        ),
+    ]
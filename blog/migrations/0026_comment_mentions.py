@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:41
+
+import re
+
+from django.db import migrations, models
+
+MENTION_RE = re.compile(r"@(\w+)")
+
+
+def backfill_mentions(apps, schema_editor):
+    """Resuelve las @menciones de los comentarios existentes (una consulta de usuarios)."""
+    Comment = apps.get_model("blog", "Comment")
+    User = apps.get_model("auth", "User")
+
+    comments = list(Comment.objects.filter(text__contains="@").only("id", "text"))
+    names = {name for c in comments for name in MENTION_RE.findall(c.text)}
+    ids = dict(User.objects.filter(username__in=names).values_list("username", "id"))
+    for c in comments:
+        c.mentions = [
+            {
+                "start": m.start(),
+                "end": m.end(),
+                "username": m.group(1),
+                "user_id": ids[m.group(1)],
+            }
+            for m in MENTION_RE.finditer(c.text)
+            if m.group(1) in ids
+        ]
+    Comment.objects.bulk_update(comments, ["mentions"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0025_backgroundjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="mentions",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_mentions, migrations.RunPython.noop),
+    ]
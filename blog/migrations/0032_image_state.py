@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+def initial_state(apps, schema_editor):
+    # Con derivados ya generados: 'ready'; con imagen sin derivados: 'pending'
+    # (los recoge `manage.py build_image_variants`)
+    for model_name, field in (("Post", "cover"), ("Profile", "avatar")):
+        model = apps.get_model("blog", model_name)
+        with_image = model.objects.exclude(**{field: ""}).exclude(
+            **{f"{field}__isnull": True}
+        )
+        with_image.filter(**{f"{field}_variants__has_key": "jpeg"}).update(
+            **{f"{field}_state": "ready"}
+        )
+        with_image.exclude(**{f"{field}_variants__has_key": "jpeg"}).update(
+            **{f"{field}_state": "pending"}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0031_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="cover_state",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Sin imagen"),
+                    ("pending", "Procesando"),
+                    ("ready", "Lista"),
+                    ("failed", "Error"),
+                ],
+                default="",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="avatar_state",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Sin imagen"),
+                    ("pending", "Procesando"),
+                    ("ready", "Lista"),
+                    ("failed", "Error"),
+                ],
+                default="",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(initial_state, migrations.RunPython.noop),
+    ]
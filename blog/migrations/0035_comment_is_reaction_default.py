@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:05
+
+from django.db import migrations, models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat
+
+AUTO_COMMENT_PREFIX = "Reacción automática:"
+# Versiones anteriores escribían "<usuario> reaccionó con <tipo>" como comentario
+LEGACY_VERB = " reaccionó"
+
+
+def classify_reaction_comments(apps, schema_editor):
+    """
+    Los comentarios a mano se creaban con is_reaction=True (el default
+    anterior) y los automáticos antiguos con is_reaction=False. Se corrigen
+    ambos y se recalcula comment_count de los posts afectados.
+    """
+    Comment = apps.get_model("blog", "Comment")
+    PostStats = apps.get_model("blog", "PostStats")
+
+    Comment.objects.filter(is_reaction=True).exclude(
+        text__startswith=AUTO_COMMENT_PREFIX
+    ).update(is_reaction=False)
+
+    legacy = Comment.objects.annotate(
+        auto_prefix=Concat("author__username", Value(LEGACY_VERB))
+    ).filter(text__startswith=F("auto_prefix"))
+    automatic = Comment.objects.filter(is_reaction=False).filter(
+        Q(text__startswith=AUTO_COMMENT_PREFIX) | Q(pk__in=legacy.values("pk"))
+    )
+    post_ids = set(automatic.values_list("post_id", flat=True))
+    automatic.update(is_reaction=True)
+
+    for post_id in post_ids:
+        PostStats.objects.filter(post_id=post_id).update(
+            comment_count=Comment.objects.filter(
+                post_id=post_id, status="visible", is_reaction=False
+            ).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0034_interaction_split"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="is_reaction",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(classify_reaction_comments, migrations.RunPython.noop),
+    ]
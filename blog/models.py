@@ -11,6 +11,26 @@ from django_ckeditor_5.fields import CKEditor5Field
 from taggit.managers import TaggableManager
 from django.db.models import Q
 
+from .storage import content_storage
+
+
+# Estado de los derivados de una imagen (ver blog/images.py)
+IMAGE_STATE_CHOICES = [
+    ("", "Sin imagen"),
+    ("pending", "Procesando"),
+    ("ready", "Lista"),
+    ("failed", "Error"),
+]
+
+
+def interaction_fk(to, **kwargs):
+    """
+    FK de las tablas de interacción (notificaciones, reacciones, votos), que
+    pueden vivir en otro archivo SQLite (ver blog/routers.py): sin restricción
+    en la base ni cascada del ORM; el borrado lo hacen las señales.
+    """
+    return models.ForeignKey(to, on_delete=models.DO_NOTHING, db_constraint=False, **kwargs)
+
 
 # ----------------------------
 # Perfil de usuario
@@ -18,7 +38,10 @@ from django.db.models import Q
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    avatar = models.ImageField(upload_to='avatars/', storage=content_storage, blank=True, null=True)
+    # Derivados WebP/JPEG del avatar (ver blog/images.py)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
+    avatar_state = models.CharField(max_length=10, choices=IMAGE_STATE_CHOICES, default="", blank=True, editable=False)
     bio = models.TextField(blank=True, verbose_name="Biografía")
 
     # 🔹 Nuevos campos añadidos
@@ -46,6 +69,14 @@ class Profile(models.Model):
     def __str__(self):
         return f'Perfil de {self.user.username}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Avatar con el que se cargó: para el refcount de MediaBlob
+        if "avatar" in instance.__dict__:
+            instance._loaded_avatar = instance.__dict__["avatar"]
+        return instance
+
 
 # ----------------------------
 # Post (noticia o rumor)
@@ -70,7 +101,10 @@ class Post(models.Model):
     slug = models.SlugField(max_length=220, unique=True, db_index=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     is_visible = models.BooleanField(default=True)  # 👈 nuevo campo
-    cover = models.ImageField(upload_to='covers/', blank=True, null=True)
+    cover = models.ImageField(upload_to='covers/', storage=content_storage, blank=True, null=True)
+    # Derivados WebP/JPEG de la portada (ver blog/images.py)
+    cover_variants = models.JSONField(default=dict, blank=True, editable=False)
+    cover_state = models.CharField(max_length=10, choices=IMAGE_STATE_CHOICES, default="", blank=True, editable=False)
     platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES, default="pc")
     excerpt = models.CharField(max_length=300, blank=True)
     content = RichTextUploadingField()
@@ -86,6 +120,16 @@ class Post(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado con el que se cargó: las señales detectan la publicación sin otra consulta
+        instance._loaded_status = instance.__dict__.get("status")
+        # Portada con la que se cargó: para el refcount de MediaBlob
+        if "cover" in instance.__dict__:
+            instance._loaded_cover = instance.__dict__["cover"]
+        return instance
+
     def get_absolute_url(self):
         return reverse('blog:post_detail', args=[self.slug])
 
@@ -101,13 +145,26 @@ class Post(models.Model):
             self.slug = candidate
         super().save(*args, **kwargs)
 
+    def _get_stats(self):
+        """Fila de PostStats (usa select_related('stats') en listados)."""
+        try:
+            return self.stats
+        except PostStats.DoesNotExist:
+            return None
+
     @property
     def average_rating(self):
+        stats = self._get_stats()
+        if stats is not None:
+            return stats.average_rating
         agg = self.reviews.aggregate(avg=models.Avg('rating'))
         return round(agg['avg'] or 0, 2)
 
     @property
     def total_reviews(self):
+        stats = self._get_stats()
+        if stats is not None:
+            return stats.review_count
         return self.reviews.count()
 
 
@@ -130,8 +187,12 @@ class Comment(models.Model):
     text = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
     created = models.DateTimeField(auto_now_add=True)
-    
-    is_reaction = models.BooleanField(default=True)
+
+    # True solo en el comentario automático de una reacción (blog/reactions.py):
+    # no se muestra en el hilo ni cuenta en PostStats.comment_count
+    is_reaction = models.BooleanField(default=False)
+    # Tramos de @menciones resueltos al crear (ver blog/mentions.py)
+    mentions = models.JSONField(default=list, blank=True)
 
     # 🔹 Nuevo: relación para respuestas
     parent = models.ForeignKey(
@@ -152,18 +213,22 @@ class Comment(models.Model):
     def __str__(self):
         return f"Comentario de {self.author} en {self.post}"
 
+    # up_votes / down_votes los asigna blog.threads.load_comment_thread;
+    # si no están, se cuentan como antes.
     @property
     def score(self):
-        upvotes = self.votes.filter(value=1).count()
-        downvotes = self.votes.filter(value=-1).count()
-        return upvotes - downvotes
+        return self.likes_count - self.dislikes_count
 
     @property
     def likes_count(self):
+        if hasattr(self, "up_votes"):
+            return self.up_votes
         return self.votes.filter(value=1).count()
 
     @property
     def dislikes_count(self):
+        if hasattr(self, "down_votes"):
+            return self.down_votes
         return self.votes.filter(value=-1).count()
 
 
@@ -178,8 +243,8 @@ class CommentVote(models.Model):
         (0, 'Neutral'),
     )
 
-    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name="votes")
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comment_votes")
+    comment = interaction_fk(Comment, related_name="votes")
+    user = interaction_fk(User, related_name="comment_votes")
     value = models.SmallIntegerField(choices=VOTE_CHOICES, default=0)
 
     class Meta:
@@ -220,12 +285,17 @@ class Review(models.Model):
     def __str__(self):
         return f"{self.user} – {self.comment[:30]}"
 
+    # like_votes / dislike_votes los asigna blog.threads.load_reviews
     @property
     def likes_count(self):
+        if hasattr(self, "like_votes"):
+            return self.like_votes
         return self.votes.filter(vote="like").count()
 
     @property
     def dislikes_count(self):
+        if hasattr(self, "dislike_votes"):
+            return self.dislike_votes
         return self.votes.filter(vote="dislike").count()
 
 
@@ -239,8 +309,8 @@ class ReviewVote(models.Model):
         ('dislike', '👎'),
     )
 
-    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='votes')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_votes')
+    review = interaction_fk(Review, related_name='votes')
+    user = interaction_fk(User, related_name='review_votes')
     vote = models.CharField(max_length=7, choices=VOTE_CHOICES)
 
     class Meta:
@@ -286,24 +356,65 @@ class PostBlock(models.Model):
 # Notificaciones
 # ----------------------------
 
+# Verbo en plural para las notificaciones agrupadas ("ana y 14 más comentaron...")
+PLURAL_VERBS = {
+    "comentó en tu publicación": "comentaron en tu publicación",
+    "dejó una reseña en tu publicación": "dejaron una reseña en tu publicación",
+    "te mencionó en un comentario": "te mencionaron en comentarios",
+    "respondió a tu comentario": "respondieron a tu comentario",
+    "respondió a tu reseña": "respondieron a tu reseña",
+}
+
+
 class Notification(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")  # El que recibe
-    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sent_notifications")  # El que actúa
+    user = interaction_fk(User, related_name="notifications")  # El que recibe
+    actor = interaction_fk(User, related_name="sent_notifications")  # El que actúa (el último)
     verb = models.CharField(max_length=255)  # Ej: "comentó tu post"
 
-    target_post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True)
-    target_review = models.ForeignKey(Review, on_delete=models.CASCADE, null=True, blank=True)
-    target_comment = models.ForeignKey(Comment, on_delete=models.CASCADE, null=True, blank=True)
+    # 🔹 Agrupación (ver blog/notifications.py): una fila por (user, verb, post, franja)
+    bucket = models.DateTimeField(null=True, blank=True)
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actors = models.JSONField(default=list, blank=True)  # [[id, username], ...] distintos, más recientes primero
+
+    target_post = interaction_fk(Post, null=True, blank=True)
+    target_review = interaction_fk(Review, null=True, blank=True)
+    target_comment = interaction_fk(Comment, null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Bandeja con filtro "solo no leídas" paginada por fecha
+            models.Index(fields=["user", "is_read", "created_at"], name="blog_notif_inbox_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "verb", "target_post", "bucket"],
+                condition=Q(bucket__isnull=False),
+                name="uniq_notification_group",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.actor} {self.verb} → {self.user}"
 
+    @property
+    def others_count(self):
+        return max(self.actor_count - 1, 0)
+
+    @property
+    def latest_actors(self):
+        return self.recent_actors[:3]
+
+    @property
+    def display_verb(self):
+        """Verbo en plural si la fila agrupa a varios actores."""
+        if self.actor_count > 1:
+            return PLURAL_VERBS.get(self.verb, self.verb)
+        return self.verb
+
     def get_absolute_url(self):
         """Redirige según el target disponible."""
         if self.target_comment:
@@ -315,6 +426,31 @@ class Notification(models.Model):
         return "#"
 
 
+class ArchivedNotification(models.Model):
+    """
+    Copia plana de una notificación sacada de la tabla principal por la
+    política de retención (blog/retention.py). Solo historial: no tiene
+    relaciones con comentarios ni reseñas, y guarda la URL ya calculada.
+    """
+    original_id = models.BigIntegerField()
+    user = interaction_fk(User, related_name="archived_notifications")
+    actor = interaction_fk(User, null=True, blank=True, related_name="+")
+    verb = models.CharField(max_length=255)
+    actor_count = models.PositiveIntegerField(default=1)
+    target_post = interaction_fk(Post, null=True, blank=True, related_name="+")
+    target_url = models.CharField(max_length=500, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"], name="blog_archnotif_user_idx")]
+
+    def __str__(self):
+        return f"[archivo] {self.actor_id} {self.verb} → {self.user_id}"
+
+
 # ----------------------------
 # Reacciones (emojis) en posts
 # ----------------------------
@@ -328,8 +464,8 @@ REACTION_CHOICES = [
     ('angry', '😡'),
 ]
 class Reaction(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="reactions")
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reactions")
+    post = interaction_fk(Post, related_name="reactions")
+    user = interaction_fk(User, related_name="reactions")
     type = models.CharField(max_length=10, choices=REACTION_CHOICES)
     rating = models.IntegerField(null=True, blank=True)   # 👈 opcional
     opinion = models.TextField(null=True, blank=True)  # 👈 opcional
@@ -343,6 +479,53 @@ class Reaction(models.Model):
         return f"{self.user.username} reaccionó {self.type} a {self.post}"
 
 
+class ReactionCounter(models.Model):
+    """
+    Contador por (post, tipo de reacción). Se actualiza con ``F()`` en la misma
+    transacción que la reacción (ver blog/stats.py); los endpoints JSON y las
+    tarjetas leen de aquí en vez de agrupar la tabla Reaction.
+    `manage.py reconcile_reaction_counts` corrige desviaciones.
+    """
+    post = interaction_fk(Post, related_name="reaction_counters")
+    type = models.CharField(max_length=10, choices=REACTION_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("post", "type")
+
+    def __str__(self):
+        return f"{self.post_id} · {self.type}: {self.count}"
+
+
+# ----------------------------
+# Estadísticas denormalizadas por post
+# ----------------------------
+
+class PostStats(models.Model):
+    """
+    Proyección con los contadores de un post (reseñas y comentarios).
+    Se actualiza de forma incremental desde blog/stats.py en la misma transacción
+    que la escritura; `manage.py rebuild_post_stats` la recalcula desde cero.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)  # solo comentarios visibles
+    # Las reacciones viven en ReactionCounter (una fila por tipo)
+
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Estadísticas de {self.post_id}"
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 2)
+
+
 class Subscription(models.Model):
     """
     Una suscripción apunta a EXACTAMENTE un objetivo:
@@ -377,4 +560,77 @@ class Subscription(models.Model):
     def __str__(self):
         if self.author_id:
             return f"{self.user.username} → Autor:{self.author.username}"
-        return f"{self.user.username} → Tag:{self.tag.slug}"
\ No newline at end of file
+        return f"{self.user.username} → Tag:{self.tag.slug}"
+
+# ----------------------------
+# Timeline materializado (mi-feed)
+# ----------------------------
+
+class TimelineEntry(models.Model):
+    """
+    Un post en el feed de un usuario (ver blog/timeline.py). Se rellena al
+    publicar (fan-out a seguidores del autor y de los tags); ``created`` es la
+    fecha del post, copiada para leer el feed por rango de índice.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="timeline")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="timeline_entries")
+    created = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [models.Index(fields=["user", "-created", "-id"], name="blog_timeline_user_idx")]
+
+    def __str__(self):
+        return f"{self.post_id} en el feed de {self.user_id}"
+
+
+# ----------------------------
+# Archivos subidos (almacenamiento por contenido, ver blog/storage.py)
+# ----------------------------
+
+class MediaBlob(models.Model):
+    """Un archivo guardado una sola vez por su sha256 y cuántos campos lo usan."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)  # cuando el refcount llegó a 0
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+# ----------------------------
+# Cola de trabajos en segundo plano
+# ----------------------------
+
+class BackgroundJob(models.Model):
+    """
+    Trabajo pendiente guardado en la base de datos (ver blog/jobs.py).
+    Se encola en la misma transacción que la escritura que lo origina y lo
+    procesa `manage.py run_jobs`.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pendiente"),
+        ("running", "En curso"),
+        ("done", "Terminado"),
+        ("failed", "Fallido"),
+    ]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "run_after"], name="blog_job_pending_idx")]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
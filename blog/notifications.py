@@ -0,0 +1,266 @@
+"""
+Generación de notificaciones fuera del request (trabajos de blog/jobs.py).
+
+La vista solo encola ``notifications.comment_created`` o
+``notifications.review_created``; aquí se resuelven destinatarios y bloqueos
+en bloque y se escribe todo con un único ``bulk_create``. Los eventos
+repetidos (mismo destinatario, verbo y post dentro de una franja de tiempo) se
+agrupan en una sola fila: "ana y 14 más comentaron en tu publicación".
+
+También vive aquí la caché de la campanita (contador de no leídas y últimas
+8 por usuario), que se invalida al crear o marcar notificaciones.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
+
+from . import jobs, mentions
+from .models import Comment, Notification, NotificationBlock, Post, Review
+from .routers import atomic_for
+
+LATEST_LIMIT = 8
+BELL_CACHE_TIMEOUT = 600
+# Actores distintos que recuerda una fila agrupada (para no contar dos veces al
+# mismo); pasado ese límite actor_count pasa a contar eventos.
+ACTOR_HISTORY = 50
+GROUP_UPDATE_FIELDS = [
+    "actor", "actor_count", "recent_actors", "target_comment", "target_review", "created_at", "is_read",
+]
+
+
+# --------- Caché de la campanita ----------
+def _unread_key(user_id):
+    return f"notif:unread:{user_id}"
+
+
+def _latest_key(user_id):
+    return f"notif:latest:{user_id}"
+
+
+def unread_count(user_id):
+    return cache.get_or_set(
+        _unread_key(user_id),
+        lambda: Notification.objects.filter(user_id=user_id, is_read=False).count(),
+        BELL_CACHE_TIMEOUT,
+    )
+
+
+def latest(user_id):
+    """Últimas notificaciones ya hidratadas (actor con perfil y targets)."""
+    return cache.get_or_set(
+        _latest_key(user_id),
+        lambda: hydrate(
+            Notification.objects.filter(user_id=user_id).order_by("-created_at")[:LATEST_LIMIT]
+        ),
+        BELL_CACHE_TIMEOUT,
+    )
+
+
+# --------- Bandeja ----------
+def inbox_queryset(user, unread_only=False):
+    """Notificaciones del usuario (sin JOINs: actor y targets los carga ``hydrate``)."""
+    qs = Notification.objects.filter(user=user)
+    if unread_only:
+        qs = qs.filter(is_read=False)
+    return qs
+
+
+def _attach(items, field, objects):
+    """Asigna a cada notificación su ``field`` desde ``objects`` ({pk: objeto})."""
+    fk = Notification._meta.get_field(field)
+    for n in items:
+        fk.set_cached_value(n, objects.get(getattr(n, fk.attname)))
+
+
+def hydrate(items):
+    """
+    Carga actores (con perfil), posts, comentarios y reseñas de ``items`` con
+    una consulta por tabla y los asigna en Python: Notification puede vivir
+    en otra base (blog/routers.py), así que no hay JOIN. Un target borrado
+    queda en None. Precalcula ``target_url``. Devuelve la lista.
+    """
+    items = list(items)
+    comments = Comment.objects.in_bulk({n.target_comment_id for n in items} - {None})
+    reviews = Review.objects.in_bulk({n.target_review_id for n in items} - {None})
+    post_ids = {n.target_post_id for n in items} | {
+        obj.post_id for obj in [*comments.values(), *reviews.values()]
+    }
+    posts = Post.objects.in_bulk(post_ids - {None})
+    for obj in [*comments.values(), *reviews.values()]:
+        obj._meta.get_field("post").set_cached_value(obj, posts.get(obj.post_id))
+    actors = User.objects.select_related("profile").in_bulk({n.actor_id for n in items})
+
+    _attach(items, "actor", actors)
+    _attach(items, "target_post", posts)
+    _attach(items, "target_comment", comments)
+    _attach(items, "target_review", reviews)
+    for n in items:
+        n.target_url = n.get_absolute_url()
+    return items
+
+
+def invalidate(*user_ids):
+    """Borra la caché de la campanita de ``user_ids`` al confirmar la transacción."""
+    keys = [key for uid in set(user_ids) for key in (_unread_key(uid), _latest_key(uid))]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys), using=router.db_for_write(Notification))
+
+
+# --------- Generación ----------
+def _blocked_by(recipient_ids, actor_id):
+    """Ids (de ``recipient_ids``) que bloquearon al actor. Una consulta."""
+    if not recipient_ids:
+        return set()
+    return set(
+        NotificationBlock.objects.filter(blocker_id__in=recipient_ids, blocked_user_id=actor_id)
+        .values_list("blocker_id", flat=True)
+    )
+
+
+def group_bucket(when=None):
+    """Inicio de la franja de agrupación (``NOTIFICATION_GROUP_HOURS``, 6 h por defecto)."""
+    when = when or timezone.now()
+    window = int(getattr(settings, "NOTIFICATION_GROUP_HOURS", 6) * 3600)
+    start = int(when.timestamp()) // window * window
+    return datetime.fromtimestamp(start, tz=dt_timezone.utc)
+
+
+def _merge_actor(notification, actor):
+    """Suma ``actor`` a una fila agrupada (un mismo actor no cuenta dos veces)."""
+    recent = [a for a in notification.recent_actors if a[0] != actor.id]
+    if len(recent) == len(notification.recent_actors):
+        notification.actor_count += 1
+    notification.recent_actors = [[actor.id, actor.username], *recent][:ACTOR_HISTORY]
+    notification.actor = actor
+
+
+def _deliver(actor_id, candidates):
+    """
+    ``candidates``: lista de (user_id, verb, targets). Descarta al propio actor
+    y a quien lo bloqueó. Si el destinatario ya tiene una fila del mismo
+    (verb, post) en la franja actual se agrupa en ella; el resto se crea con
+    un solo ``bulk_create``.
+    """
+    candidates = [c for c in candidates if c[0] and c[0] != actor_id]
+    blocked = _blocked_by({user_id for user_id, _, _ in candidates}, actor_id)
+    candidates = [c for c in candidates if c[0] not in blocked]
+    if not candidates:
+        return 0
+
+    actor = User.objects.only("id", "username").get(pk=actor_id)
+    with atomic_for(Notification):   # su base puede no ser la del trabajo
+        return _write_groups(actor, candidates)
+
+
+def _existing_groups(bucket, candidates):
+    """Filas agrupables ya existentes en esta franja: una consulta."""
+    return {
+        (n.user_id, n.verb, n.target_post_id): n
+        for n in Notification.objects.filter(
+            bucket=bucket,
+            user_id__in={user_id for user_id, _, _ in candidates},
+            verb__in={verb for _, verb, _ in candidates},
+            target_post_id__in={t.get("target_post_id") for _, _, t in candidates},
+        )
+    }
+
+
+def _merge_group(group, actor, targets, now):
+    _merge_actor(group, actor)
+    for field, value in targets.items():
+        setattr(group, field, value)
+    group.created_at = now
+    group.is_read = False
+
+
+def _write_groups(actor, candidates):
+    bucket = group_bucket()
+    now = timezone.now()
+    existing = _existing_groups(bucket, candidates)
+
+    to_create, to_update = {}, []
+    for user_id, verb, targets in candidates:
+        key = (user_id, verb, targets.get("target_post_id"))
+        group = existing.get(key)
+        if group is not None:
+            _merge_group(group, actor, targets, now)
+            to_update.append(group)
+        elif key not in to_create:
+            to_create[key] = (Notification(
+                user_id=user_id, actor=actor, verb=verb,
+                bucket=bucket if key[2] else None,
+                recent_actors=[[actor.id, actor.username]],
+                **targets,
+            ), targets)
+
+    db = router.db_for_write(Notification)
+    created = len(to_create)
+    try:
+        with transaction.atomic(using=db):
+            Notification.objects.bulk_create([n for n, _ in to_create.values()])
+    except IntegrityError:
+        # Otro trabajo creó el grupo entre el SELECT y el INSERT
+        # (uniq_notification_group): fila a fila, y la que choca se agrupa
+        created = 0
+        for (user_id, verb, post_id), (notification, targets) in to_create.items():
+            try:
+                with transaction.atomic(using=db):
+                    notification.save()
+                created += 1
+            except IntegrityError:
+                group = Notification.objects.get(user_id=user_id, verb=verb, target_post_id=post_id, bucket=bucket)
+                _merge_group(group, actor, targets, now)
+                to_update.append(group)
+    if to_update:
+        Notification.objects.bulk_update(to_update, GROUP_UPDATE_FIELDS)
+    # bulk_create/bulk_update no disparan señales: se invalida a mano
+    invalidate(*(user_id for user_id, _, _ in candidates))
+    return created + len(to_update)
+
+
+@jobs.handler("notifications.comment_created")
+def comment_created(comment_id):
+    comment = (
+        Comment.objects.select_related("post", "parent")
+        .filter(pk=comment_id).first()
+    )
+    if comment is None:
+        return 0  # se borró antes de procesar el trabajo
+
+    post = comment.post
+    targets = {"target_post_id": post.id, "target_comment_id": comment.id}
+    candidates = []
+    # ⚡ Autor del comentario padre
+    if comment.parent_id:
+        candidates.append((comment.parent.author_id, "respondió a tu comentario", targets))
+    # ⚡ Autor del post principal
+    candidates.append((post.author_id, "comentó en tu publicación", targets))
+    # ✅ Menciones con @usuario (ya resueltas al crear el comentario)
+    spans = comment.mentions if comment.mentions else mentions.resolve(comment.text)
+    for user_id in mentions.user_ids(spans):
+        candidates.append((user_id, "te mencionó en un comentario", targets))
+    return _deliver(comment.author_id, candidates)
+
+
+@jobs.handler("notifications.review_created")
+def review_created(review_id):
+    review = (
+        Review.objects.select_related("post", "parent")
+        .filter(pk=review_id).first()
+    )
+    if review is None:
+        return 0
+
+    post = review.post
+    if review.parent_id:
+        # Respuesta: se avisa al autor de la reseña original
+        candidates = [(review.parent.user_id, "respondió a tu reseña",
+                       {"target_post_id": post.id, "target_review_id": review.parent_id})]
+    else:
+        candidates = [(post.author_id, "dejó una reseña en tu publicación",
+                       {"target_post_id": post.id, "target_review_id": review.id})]
+    return _deliver(review.user_id, candidates)
@@ -0,0 +1,208 @@
+"""
+Caché de página completa para visitantes anónimos.
+
+- Opt-in con ``PAGE_CACHE["ENABLED"]`` (ver settings.py).
+- La clave incluye ruta, query string (página / cursor / búsqueda) y la
+  versión de cada "ámbito" del que depende la página: ``list`` para los
+  listados y ``post:<slug>`` para el detalle. Las señales de Post, Review,
+  Comment y Reaction suben la versión (``bump``) y las claves viejas caducan solas.
+- Single-flight: solo una petición recalcula una página; el resto sirve la
+  copia anterior (si existe) o espera un momento a que aparezca la nueva.
+- Requiere una caché compartida entre procesos: con LocMem cada worker tendría
+  sus propias versiones y un ``bump`` no llegaría a los demás (ver check_backend).
+- Las páginas que pintan un token CSRF no se cachean: el token va ligado a la
+  cookie del visitante y a otro le fallaría el POST. Las plantillas públicas
+  solo lo pintan para usuarios autenticados, que ya no pasan por la caché.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+from . import replica
+
+DEFAULTS = {
+    "ENABLED": False,
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 300,          # vida de una página cacheada
+    "STALE_TIMEOUT": 3600,   # vida de la copia "vieja" servida durante el recálculo
+    "LOCK_TIMEOUT": 15,      # tiempo máximo que un proceso retiene el lock de recálculo
+    "WAIT_TIMEOUT": 2.0,     # cuánto espera una petición sin copia vieja
+    "WAIT_INTERVAL": 0.05,
+}
+
+LIST_SCOPE = "list"
+_PREFIX = "pagecache"
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "PAGE_CACHE", {})}
+
+
+def _cache():
+    cache = caches[_config()["CACHE_ALIAS"]]
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            f"PAGE_CACHE necesita una caché compartida; {type(cache).__name__} es por "
+            "proceso y las invalidaciones no llegarían al resto de workers."
+        )
+    return cache
+
+
+def check_backend():
+    """Falla al arrancar (BlogConfig.ready) si la caché activada no es compartida."""
+    if _config()["ENABLED"]:
+        _cache()
+
+
+def post_scope(slug):
+    return f"post:{slug}"
+
+
+# --------- Versiones ----------
+def _version_key(scope):
+    return f"{_PREFIX}:v:{scope}"
+
+
+def get_versions(scopes):
+    cache = _cache()
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        if key not in found:
+            # Las versiones no caducan; si se perdieron se reinician con la hora
+            cache.add(key, int(time.time()), None)
+            found[key] = cache.get(key)
+        versions[scope] = found[key]
+    return versions
+
+
+def bump(*scopes):
+    """Invalida todas las páginas que dependen de ``scopes``."""
+    if not _config()["ENABLED"]:
+        return
+    cache = _cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time()), None)
+
+
+# --------- Claves de página ----------
+def _request_fingerprint(request):
+    query = sorted(request.GET.lists())
+    raw = f"{request.path}?{query}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _page_key(fingerprint, versions):
+    raw = ";".join(f"{scope}={versions[scope]}" for scope in sorted(versions))
+    return f"{_PREFIX}:page:{fingerprint}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _stale_key(fingerprint):
+    return f"{_PREFIX}:stale:{fingerprint}"
+
+
+def _is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Hay mensajes pendientes (flash) → la página es personal
+    if "messages" in request.COOKIES:
+        return False
+    return True
+
+
+def _uses_csrf_token(request):
+    # get_token() (lo llama {% csrf_token %}) marca la petición
+    return bool(request.META.get("CSRF_COOKIE_NEEDS_UPDATE"))
+
+
+def _is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies or _uses_csrf_token(request):
+        return False
+    return True
+
+
+def _from_cache(entry, state):
+    content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response["X-Page-Cache"] = state
+    return response
+
+
+def cache_anonymous_page(scopes_for):
+    """
+    Decorador para vistas. ``scopes_for(request, *args, **kwargs)`` devuelve
+    la lista de ámbitos de los que depende la página.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            conf = _config()
+            if not conf["ENABLED"] or not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            cache = _cache()
+            fingerprint = _request_fingerprint(request)
+            versions = get_versions(scopes_for(request, *args, **kwargs))
+            key = _page_key(fingerprint, versions)
+
+            entry = cache.get(key)
+            if entry is not None:
+                return _from_cache(entry, "HIT")
+
+            lock_key = f"{key}:lock"
+            if not cache.add(lock_key, 1, conf["LOCK_TIMEOUT"]):
+                # Otro proceso está renderizando: copia vieja o esperar un poco
+                stale = cache.get(_stale_key(fingerprint))
+                if stale is not None:
+                    return _from_cache(stale, "STALE")
+                deadline = time.monotonic() + conf["WAIT_TIMEOUT"]
+                while time.monotonic() < deadline:
+                    time.sleep(conf["WAIT_INTERVAL"])
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return _from_cache(entry, "HIT")
+                return view_func(request, *args, **kwargs)
+
+            try:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, "render") and callable(response.render):
+                    response = response.render()
+                if _is_cacheable_response(request, response):
+                    entry = (response.content, response["Content-Type"])
+                    timeout = conf["TIMEOUT"]
+                    if getattr(response, "from_replica", False):
+                        # Leída de la réplica (blog/replica.py): no alargar su retraso
+                        timeout = min(timeout, replica.max_lag())
+                    cache.set(key, entry, timeout)
+                    cache.set(_stale_key(fingerprint), entry, conf["STALE_TIMEOUT"])
+                    response["X-Page-Cache"] = "MISS"
+                return response
+            finally:
+                cache.delete(lock_key)
+
+        return _wrapped
+    return decorator
+
+
+def list_scopes(request, *args, **kwargs):
+    return [LIST_SCOPE]
+
+
+def post_detail_scopes(request, *args, **kwargs):
+    return [post_scope(kwargs.get("slug"))]
@@ -0,0 +1,189 @@
+"""
+Paginación por cursor (keyset) para listados de posts.
+
+En vez de ``OFFSET`` + ``COUNT(*)`` se filtra por la última clave vista
+(por defecto ``(created, id)``), así la página N cuesta lo mismo que la primera.
+Los cursores son opacos: van firmados con ``django.core.signing``.
+"""
+import hashlib
+from datetime import datetime
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import DateTimeField, Q
+
+CURSOR_PARAM = "cursor"
+CURSOR_SALT = "blog.pagination.cursor"
+COUNT_CACHE_TIMEOUT = 300
+
+
+def encode_cursor(values, direction="next"):
+    payload = {
+        "k": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        "d": direction,
+    }
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Devuelve (valores, dirección) o (None, None) si el cursor no es válido."""
+    if not token:
+        return None, None
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+        return list(payload["k"]), payload["d"]
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None, None
+
+
+class KeysetPage:
+    """Página de resultados con la misma interfaz básica que ``Page`` de Django."""
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<KeysetPage ({len(self.object_list)} objetos)>"
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def estimated_total(self):
+        return self.paginator.estimated_total
+
+
+class KeysetPaginator:
+    """
+    Pagina ``queryset`` ordenado por ``ordering`` (todos descendentes o todos
+    ascendentes; el último campo debe ser único, normalmente ``id``).
+    """
+
+    def __init__(self, queryset, per_page, ordering=("-created", "-id"), estimate_total=False):
+        descending = {f.startswith("-") for f in ordering}
+        if len(descending) != 1:
+            raise ValueError("KeysetPaginator necesita que todos los campos vayan en la misma dirección")
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [f.lstrip("-") for f in ordering]
+        self.descending = descending.pop()
+        self.estimate_total = estimate_total
+
+    # --------- Claves ----------
+    def _key_of(self, obj):
+        return [getattr(obj, f) for f in self.fields]
+
+    def _parse_key(self, raw_values):
+        if len(raw_values) != len(self.fields):
+            raise ValueError("cursor con número de claves incorrecto")
+        values = []
+        opts = self.queryset.model._meta
+        for name, raw in zip(self.fields, raw_values):
+            field = opts.get_field(name)
+            if isinstance(field, DateTimeField) and isinstance(raw, str):
+                raw = datetime.fromisoformat(raw)
+            values.append(raw)
+        return values
+
+    def _after(self, values, forward):
+        """Q de las filas estrictamente después (forward) o antes de la clave."""
+        op = "lt" if self.descending == forward else "gt"
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            step = Q(**{f"{name}__{op}": values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering]
+
+    # --------- Total estimado ----------
+    @property
+    def estimated_total(self):
+        """COUNT(*) cacheado unos minutos: sirve para mostrar "≈ N resultados"."""
+        if not self.estimate_total:
+            return None
+        key = "keyset-count:" + hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+        return cache.get_or_set(key, self.queryset.count, COUNT_CACHE_TIMEOUT)
+
+    # --------- Páginas ----------
+    def page(self, cursor=None):
+        raw_values, direction = decode_cursor(cursor)
+        values = None
+        if raw_values is not None:
+            try:
+                values = self._parse_key(raw_values)
+            except (LookupError, ValueError, TypeError):
+                values = None
+
+        if values is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = False
+        elif direction == "prev":
+            qs = self.queryset.filter(self._after(values, forward=False))
+            rows = list(qs.order_by(*self._reversed_ordering())[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            qs = self.queryset.filter(self._after(values, forward=True))
+            rows = list(qs.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = True
+
+        next_cursor = encode_cursor(self._key_of(rows[-1]), "next") if has_next and rows else None
+        previous_cursor = encode_cursor(self._key_of(rows[0]), "prev") if has_previous and rows else None
+        return KeysetPage(rows, self, has_next, has_previous, next_cursor, previous_cursor)
+
+
+def paginate_keyset(request, queryset, per_page, **kwargs):
+    """Atajo para vistas de función: devuelve la página según ``?cursor=``."""
+    paginator = KeysetPaginator(queryset, per_page, **kwargs)
+    return paginator.page(request.GET.get(CURSOR_PARAM))
+
+
+class KeysetPaginationMixin:
+    """Mixin para ListView: sustituye la paginación por OFFSET por la de cursor."""
+    keyset_ordering = ("-created", "-id")
+    keyset_estimate_total = False
+
+    def use_keyset_pagination(self):
+        return True
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(
+            queryset, page_size,
+            ordering=self.keyset_ordering,
+            estimate_total=self.keyset_estimate_total,
+        )
+        page = paginator.page(self.request.GET.get(CURSOR_PARAM))
+        return paginator, page, page.object_list, page.has_other_pages()
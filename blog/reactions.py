@@ -0,0 +1,138 @@
+"""
+Servicio único de escritura de reacciones.
+
+``toggle_reaction``, ``react_api`` y ``api_views.ReactionView`` pasan todos por
+``react()``: una transacción con una lectura de la reacción actual, una
+escritura (INSERT / UPDATE / DELETE), los contadores de ReactionCounter, el
+comentario automático opcional y una lectura final de los contadores.
+
+Reaction y ReactionCounter pueden vivir en otra base (blog/routers.py): la
+transacción de ``retry_write`` se abre en la suya y el comentario automático
+(en ``default``) se escribe al confirmarla, con su propia transacción. Así
+nunca queda un comentario de una reacción revertida; si esa segunda escritura
+falla, la siguiente reacción del usuario lo deja al día (``_sync_activity``
+mira la reacción actual). Sin reparto todo va en la misma transacción.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from . import stats
+from .models import Comment, REACTION_CHOICES, Reaction
+from .routers import atomic_for, database_for
+from .sqlite import retry_write
+
+VALID_TYPES = frozenset(key for key, _ in REACTION_CHOICES)
+AUTO_COMMENT_PREFIX = "Reacción automática:"
+
+ReactionResult = namedtuple("ReactionResult", ["reaction", "old_type", "new_type", "counts"])
+
+
+def is_valid_type(reaction_type):
+    return reaction_type in VALID_TYPES
+
+
+def activity_enabled():
+    """Comentario automático por reacción (``REACTION_ACTIVITY_COMMENTS`` en settings)."""
+    return getattr(settings, "REACTION_ACTIVITY_COMMENTS", True)
+
+
+# --------- Comentario automático ----------
+def _activity_text(reaction_type):
+    emoji = dict(REACTION_CHOICES).get(reaction_type) or reaction_type
+    return f"{AUTO_COMMENT_PREFIX} {emoji}"
+
+
+def _activity_qs(post, user):
+    # Solo comentarios generados aquí: nunca se pisa un comentario escrito a mano
+    return Comment.objects.filter(
+        post=post, author=user, is_reaction=True, text__startswith=AUTO_COMMENT_PREFIX
+    )
+
+
+def _upsert_activity(post, user, reaction_type):
+    text = _activity_text(reaction_type)
+    if _activity_qs(post, user).update(text=text):
+        return
+    # No cuenta en PostStats.comment_count ni aparece en el hilo (is_reaction=True)
+    Comment.objects.create(
+        post=post, author=user, text=text, status="visible", is_reaction=True
+    )
+
+
+def _delete_activity(post, user):
+    _activity_qs(post, user).delete()
+
+
+@retry_write
+def _sync_activity(post, user, reaction_type):
+    if reaction_type:
+        _upsert_activity(post, user, reaction_type)
+    else:
+        _delete_activity(post, user)
+
+
+def _sync_activity_on_commit(post, user, reaction_type):
+    using = database_for(Reaction)
+    if using == DEFAULT_DB_ALIAS:
+        _sync_activity(post, user, reaction_type)  # misma transacción que la reacción
+        return
+
+    def sync():
+        # La reacción confirmada ahora mismo (otra petición pudo cambiarla después)
+        current = (
+            Reaction.objects.filter(post=post, user=user).values_list("type", flat=True).first()
+        )
+        _sync_activity(post, user, current)
+    # robust: si falla se registra en el log, la reacción ya quedó confirmada
+    transaction.on_commit(sync, using=using, robust=True)
+
+
+# --------- Escritura ----------
+def _write(post, user, reaction_type, toggle):
+    existing = Reaction.objects.filter(post=post, user=user).first()
+    old_type = existing.type if existing else None
+
+    if existing is None:
+        try:
+            with atomic_for(Reaction):
+                return Reaction.objects.create(post=post, user=user, type=reaction_type), None
+        except IntegrityError:
+            # Otra petición del mismo usuario insertó primero: seguimos como cambio
+            existing = Reaction.objects.get(post=post, user=user)
+            old_type = existing.type
+
+    if old_type == reaction_type:
+        if toggle:
+            existing.delete()
+            return None, old_type
+        return existing, old_type
+
+    existing.type = reaction_type
+    existing.save(update_fields=["type"])
+    return existing, old_type
+
+
+@retry_write(model=Reaction)
+def react(post, user, reaction_type, toggle=False, activity=None):
+    """
+    Aplica la reacción de ``user`` a ``post``.
+
+    - ``toggle=True``: repetir el mismo tipo quita la reacción (botones del detalle).
+    - ``toggle=False``: siempre deja ``reaction_type`` (API).
+    Devuelve ``ReactionResult``; ``reaction`` es None si se quitó.
+    """
+    if not is_valid_type(reaction_type):
+        raise ValueError(f"Tipo de reacción inválido: {reaction_type!r}")
+    if activity is None:
+        activity = activity_enabled()
+
+    reaction, old_type = _write(post, user, reaction_type, toggle)
+    new_type = reaction.type if reaction else None
+    stats.reaction_changed(post.id, old_type, new_type)
+
+    if activity and old_type != new_type:
+        _sync_activity_on_commit(post, user, new_type)
+
+    return ReactionResult(reaction, old_type, new_type, stats.reaction_counts(post.id))
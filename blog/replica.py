@@ -0,0 +1,194 @@
+"""
+Réplica de solo lectura de ``db.sqlite3`` para las vistas de lectura pesadas
+(opcional, ``READ_REPLICA = True``).
+
+- ``snapshot()`` copia la base con la API de backup de SQLite (una sola
+  transacción de lectura: con WAL los escritores no esperan) a un temporal y
+  lo renombra sobre ``READ_REPLICA_PATH``. La fecha de modificación del
+  archivo es el instante de la copia. ``manage.py snapshot_replica
+  --interval 15`` la repite periódicamente.
+- ``use_replica``: decorador de vista. Durante la vista (y el render de su
+  plantilla) ``ReplicaRouter`` manda las lecturas de ``default`` a la réplica
+  si tiene menos de ``READ_REPLICA_MAX_LAG`` segundos. Si no, se lee del
+  primario como siempre.
+- Leer lo propio: ``ReplicaPinMiddleware`` anota en una cookie la hora del
+  último POST del navegador; mientras la réplica sea anterior a esa hora ese
+  navegador lee del primario.
+
+Las tablas repartidas en otras bases (blog/routers.py) nunca se leen de aquí.
+"""
+import contextvars
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import routers
+
+ALIAS = "replica"
+PRIMARY_APPS = {"sessions"}   # una sesión recién creada aún no está en la réplica
+PIN_COOKIE = "replica_pin"
+SAFE_METHODS = ("GET", "HEAD")
+
+_active = contextvars.ContextVar("replica_active", default=False)
+
+
+def enabled():
+    return getattr(settings, "READ_REPLICA", False) and ALIAS in settings.DATABASES
+
+
+def max_lag():
+    return getattr(settings, "READ_REPLICA_MAX_LAG", 60)
+
+
+def replica_path():
+    return str(settings.READ_REPLICA_PATH)
+
+
+def snapshot_time():
+    """Instante (epoch) de la réplica actual, o None si no existe."""
+    try:
+        return os.stat(replica_path()).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+# --------- Copia ----------
+def snapshot(source=None, target=None):
+    """Copia ``source`` (default) en ``target`` de forma atómica. Devuelve un informe."""
+    source = str(source or settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"])
+    target = str(target or replica_path())
+    tmp = f"{target}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    start = time.monotonic()
+    taken_at = time.time()
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(tmp)
+    try:
+        src.backup(dst)   # pages=-1: todo en un paso, una foto consistente
+        # Sin WAL: la réplica se abre en solo lectura y sin archivos -wal/-shm
+        dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+    os.utime(tmp, (taken_at, taken_at))
+    os.replace(tmp, target)   # las conexiones abiertas siguen con la copia anterior
+    return {"size": os.path.getsize(target), "elapsed": time.monotonic() - start}
+
+
+# --------- Enrutado ----------
+class ReplicaRouter:
+    """Va antes que InteractionRouter; fuera de ``use_replica`` no opina."""
+
+    def db_for_read(self, model, **hints):
+        if (
+            _active.get()
+            and model._meta.app_label not in PRIMARY_APPS
+            and routers.database_for(model) == DEFAULT_DB_ALIAS
+        ):
+            return ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Un objeto leído de la réplica es el mismo que en default
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ALIAS:
+            return False
+        return None
+
+
+@contextmanager
+def primary():
+    """Lee del primario dentro de una vista con ``use_replica``."""
+    token = _active.set(False)
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def _pinned_at(request):
+    try:
+        return float(request.COOKIES[PIN_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+def _usable(request):
+    """Instante de la réplica si esta petición puede leer de ella; si no, None."""
+    if not enabled() or request.method not in SAFE_METHODS:
+        return None
+    taken_at = snapshot_time()
+    if taken_at is None or time.time() - taken_at > max_lag():
+        return None
+    pinned = _pinned_at(request)
+    if pinned is not None and taken_at <= pinned:
+        return None   # la réplica aún no tiene su último POST
+    return taken_at
+
+
+def _refresh_connection(taken_at):
+    # Tras un snapshot nuevo, una conexión persistente seguiría leyendo el
+    # archivo anterior (ya renombrado): se cierra y la próxima consulta abre el nuevo
+    conn = connections[ALIAS]
+    if conn.connection is not None and getattr(conn, "snapshot_taken_at", None) != taken_at:
+        conn.close()
+    if conn.connection is None:
+        conn.snapshot_taken_at = taken_at
+
+
+def use_replica(view_func):
+    """Decorador de vistas de solo lectura (ver docstring del módulo)."""
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        taken_at = _usable(request)
+        if taken_at is None:
+            return view_func(request, *args, **kwargs)
+
+        _refresh_connection(taken_at)
+        token = _active.set(True)
+        try:
+            response = view_func(request, *args, **kwargs)
+            # Las TemplateResponse se renderizan después: aquí, para que lean de la réplica
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            response.from_replica = True   # page_cache acorta su vida en caché
+            return response
+        finally:
+            _active.reset(token)
+    return _wrapped
+
+
+def pin(response):
+    """Este navegador lee del primario hasta que haya un snapshot posterior a ahora."""
+    if enabled():
+        response.set_cookie(
+            PIN_COOKIE, f"{time.time():.3f}", max_age=max_lag(), httponly=True, samesite="Lax"
+        )
+    return response
+
+
+class ReplicaPinMiddleware:
+    """Tras un POST (o PUT/DELETE...) el navegador lee del primario hasta el próximo snapshot."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and request.method != "OPTIONS":
+            pin(response)
+        return response
@@ -0,0 +1,106 @@
+"""
+Retención de notificaciones.
+
+Política (``NOTIFICATION_RETENTION`` en settings):
+- ``READ_DAYS``: las leídas más viejas que esto salen de la tabla principal.
+- ``UNREAD_DAYS``: lo mismo para las no leídas (límite más largo).
+- ``ARCHIVE``: si es True se copian antes a ArchivedNotification.
+
+``compact()`` trabaja por lotes de ``chunk_size`` filas, cada uno en su propia
+transacción corta, para no retener el lock de escritura de SQLite.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import notifications
+from .models import ArchivedNotification, Notification
+from .routers import atomic_for
+
+DEFAULTS = {
+    "READ_DAYS": 30,
+    "UNREAD_DAYS": 180,
+    "ARCHIVE": True,
+}
+
+
+def policy(**overrides):
+    conf = {**DEFAULTS, **getattr(settings, "NOTIFICATION_RETENTION", {})}
+    conf.update({k: v for k, v in overrides.items() if v is not None})
+    return conf
+
+
+def expired_queryset(conf, now=None):
+    now = now or timezone.now()
+    return Notification.objects.filter(
+        Q(is_read=True, created_at__lt=now - timedelta(days=conf["READ_DAYS"]))
+        | Q(is_read=False, created_at__lt=now - timedelta(days=conf["UNREAD_DAYS"]))
+    )
+
+
+def _archive_rows(rows):
+    return [
+        ArchivedNotification(
+            original_id=n.id,
+            user_id=n.user_id,
+            actor_id=n.actor_id,
+            verb=n.verb,
+            actor_count=n.actor_count,
+            target_post_id=n.target_post_id,
+            target_url=n.target_url,
+            is_read=n.is_read,
+            created_at=n.created_at,
+        )
+        for n in rows
+    ]
+
+
+def _compact_chunk(conf, now, chunk_size):
+    """Archiva/borra un lote. Devuelve (filas borradas, filas archivadas)."""
+    # Notification y ArchivedNotification comparten base (ver blog/routers.py)
+    with atomic_for(Notification):
+        qs = expired_queryset(conf, now).order_by("id")
+        if conf["ARCHIVE"]:
+            rows = notifications.hydrate(qs[:chunk_size])
+            ids = [n.id for n in rows]
+            ArchivedNotification.objects.bulk_create(_archive_rows(rows))
+        else:
+            ids = list(qs.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return 0, 0
+        # .delete() manda post_delete: invalidate_notification_bell limpia la campanita
+        _, per_model = Notification.objects.filter(id__in=ids).delete()
+        deleted = per_model.get(Notification._meta.label, 0)
+    return deleted, len(ids) if conf["ARCHIVE"] else 0
+
+
+def compact(conf=None, chunk_size=500, pause=0.0, dry_run=False, now=None):
+    """
+    Aplica la política. Devuelve un informe con filas borradas, archivadas,
+    lotes y segundos empleados.
+    """
+    conf = conf or policy()
+    now = now or timezone.now()
+    start = time.monotonic()
+    report = {"deleted": 0, "archived": 0, "chunks": 0, "dry_run": dry_run}
+
+    if dry_run:
+        qs = expired_queryset(conf, now)
+        report["deleted"] = qs.count()
+        report["archived"] = report["deleted"] if conf["ARCHIVE"] else 0
+    else:
+        while True:
+            deleted, archived = _compact_chunk(conf, now, chunk_size)
+            if not deleted:
+                break
+            report["deleted"] += deleted
+            report["archived"] += archived
+            report["chunks"] += 1
+            if pause:
+                time.sleep(pause)  # deja pasar a otras escrituras entre lotes
+
+    report["elapsed"] = time.monotonic() - start
+    return report
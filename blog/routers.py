@@ -0,0 +1,76 @@
+"""
+Reparto opcional de las tablas de interacción en otros archivos SQLite.
+
+``INTERACTION_DATABASES`` (settings) asigna cada modelo de mucho tráfico
+(notificaciones, reacciones y votos) a un alias. Si ese alias está en
+``DATABASES`` —``SQLITE_SPLIT_INTERACTIONS=True``— el modelo se lee, escribe y
+migra allí, con su propio bloqueo de escritura; si no, todo sigue en
+``default``.
+
+Como pueden vivir en otra base, esas tablas no tienen restricciones de clave
+foránea ni JOINs con el resto:
+
+- sus FK son ``db_constraint=False`` / ``DO_NOTHING`` y el borrado en cascada
+  lo hacen las señales (blog/signals.py);
+- actores, posts y targets se cargan aparte y se asignan en Python
+  (``notifications.hydrate``, ``threads``).
+
+Migrar: ``manage.py migrate`` y ``manage.py migrate --database <alias>``;
+``manage.py move_interactions`` copia las filas que ya estaban en ``default``.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+
+
+def database_for(model):
+    """Alias donde vive ``model`` (``default`` si no está repartido)."""
+    alias = getattr(settings, "INTERACTION_DATABASES", {}).get(model._meta.label_lower)
+    if alias and alias in settings.DATABASES:
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+def split_models():
+    """Modelos que hoy viven fuera de ``default``."""
+    from django.apps import apps
+
+    return [m for m in apps.get_app_config("blog").get_models() if database_for(m) != DEFAULT_DB_ALIAS]
+
+
+def atomic_for(model):
+    """``transaction.atomic`` en la base de ``model``."""
+    return transaction.atomic(using=router.db_for_write(model))
+
+
+class InteractionRouter:
+    """
+    Devuelve siempre un alias explícito: si devolviera None, Django usaría la
+    base de la instancia de las pistas y ``notification.actor`` se buscaría
+    en la base de notificaciones.
+    """
+
+    def db_for_read(self, model, **hints):
+        return database_for(model)
+
+    def db_for_write(self, model, **hints):
+        return database_for(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # FK sin restricción entre bases: se permite asignarlas
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # default tiene todas las tablas (las de interacción quedan vacías o de
+        # respaldo tras ``move_interactions``): así las migraciones de datos
+        # antiguas funcionan igual. Las otras bases, solo sus modelos.
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        if model_name is None:
+            return False
+        from django.apps import apps
+
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            return False
+        return db == database_for(model)
@@ -0,0 +1,166 @@
+"""
+Búsqueda de texto completo sobre posts usando SQLite FTS5.
+
+La tabla virtual ``blog_post_fts`` guarda (por rowid = Post.id) el título,
+el resumen, los tags y el contenido sin etiquetas HTML. Se mantiene
+sincronizada desde ``signals.py`` al guardar/borrar un Post o cambiar sus tags.
+Si la base de datos no es SQLite se usa el filtro ``icontains`` de siempre.
+"""
+import html
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = "blog_post_fts"
+
+# Pesos BM25 por columna: título, resumen, tags, contenido
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+# Marcadores que usa snippet(); se reemplazan por <mark> después de escapar
+_HL_START = "\x02"
+_HL_END = "\x03"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled(using=None):
+    """True si la conexión es SQLite (FTS5 disponible)."""
+    conn = connection if using is None else connections[using]
+    return conn.vendor == "sqlite"
+
+
+def create_index(schema_editor=None):
+    """Crea la tabla virtual FTS5 (idempotente)."""
+    sql = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "title, excerpt, tags, body, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    if schema_editor is not None:
+        schema_editor.execute(sql)
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+
+def drop_index(schema_editor=None):
+    sql = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+    if schema_editor is not None:
+        schema_editor.execute(sql)
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+
+def document_for(post, tag_names=None):
+    """Devuelve la fila (title, excerpt, tags, body) que se indexa para un post."""
+    if tag_names is None:
+        tag_names = post.tags.names() if post.pk else []
+    body = html.unescape(strip_tags(post.content or ""))
+    return (
+        post.title or "",
+        post.excerpt or "",
+        " ".join(tag_names),
+        " ".join(body.split()),
+    )
+
+
+def index_post(post, tag_names=None):
+    """Inserta o reemplaza la fila FTS de un post."""
+    if not fts_enabled():
+        return
+    row = document_for(post, tag_names)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, tags, body) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [post.pk, *row],
+        )
+
+
+def unindex_post(post_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild_index(batch_size=500):
+    """Reconstruye el índice completo. Devuelve el número de posts indexados."""
+    from .models import Post
+
+    if not fts_enabled():
+        return 0
+    create_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    total = 0
+    qs = Post.objects.order_by("id").prefetch_related("tags")
+    for start in range(0, qs.count(), batch_size):
+        rows = []
+        for post in qs[start:start + batch_size]:
+            tag_names = [t.name for t in post.tags.all()]
+            rows.append((post.pk, *document_for(post, tag_names)))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, tags, body) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        total += len(rows)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def build_match_query(q):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura.
+    Cada palabra se cita (sin operadores) y la última se busca por prefijo,
+    así la búsqueda funciona mientras se escribe.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        return ""
+    parts = ['"%s"' % t for t in tokens[:-1]]
+    parts.append('"%s"*' % tokens[-1])
+    return " ".join(parts)
+
+
+def search_posts(qs, q):
+    """
+    Filtra ``qs`` (queryset de Post) por ``q`` y lo ordena por relevancia BM25.
+    Cada post del resultado trae ``search_rank`` y ``search_snippet``.
+    """
+    if not fts_enabled(qs.db):
+        return qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
+
+    match = build_match_query(q)
+    if not match:
+        return qs.none()
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    return qs.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = blog_post.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+        select={
+            "search_rank": f"bm25({FTS_TABLE}, {weights})",
+            "search_snippet": (
+                f"snippet({FTS_TABLE}, -1, '{_HL_START}', '{_HL_END}', '…', 24)"
+            ),
+        },
+    ).order_by("search_rank", "-created")
+
+
+def highlight(snippet):
+    """Escapa el snippet y cambia los marcadores de FTS5 por <mark>."""
+    if not snippet:
+        return ""
+    out = escape(snippet).replace(_HL_START, "<mark>").replace(_HL_END, "</mark>")
+    return mark_safe(out)
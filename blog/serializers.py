@@ -5,6 +5,7 @@ from .models import Reaction
 class ReactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reaction
+        # Solo valida y serializa: la escritura la hace blog/reactions.py
         # dejamos solo los campos que queremos exponer; post y user serán read-only
         fields = ["id", "type", "created_at", "post", "user"]
         read_only_fields = ["id", "user", "post", "created_at"]
@@ -14,15 +15,3 @@ class ReactionSerializer(serializers.ModelSerializer):
             "rating": {"required": False, "allow_null": True},
             "opinion": {"required": False, "allow_blank": True},
         }
-
-    def create(self, validated_data):
-        request = self.context.get("request")
-        post = self.context.get("post")
-        user = request.user
-
-        reaction, created = Reaction.objects.update_or_create(
-            post=post,
-            user=user,
-            defaults={"type": validated_data.get("type")}
-        )
-        return reaction
@@ -1,7 +1,13 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from taggit.models import Tag, TaggedItem
+from .models import (
+    Profile, Post, PostStats, Review, Comment, Reaction, ReactionCounter, REACTION_CHOICES, Notification,
+    Subscription, ArchivedNotification, CommentVote, ReviewVote,
+)
+from . import context_processors, follows, images, jobs, search, storage, page_cache, notifications, timeline
 
 @receiver(post_save, sender=User)
 def create_or_update_profile(sender, instance, created, **kwargs):
@@ -9,3 +15,249 @@ def create_or_update_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
     else:
         instance.profile.save()
+
+
+@receiver(post_save, sender=Post)
+def create_post_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        PostStats.objects.get_or_create(post=instance)
+        # Filas de ReactionCounter en cero: los clics solo hacen UPDATE ... + 1
+        ReactionCounter.objects.bulk_create(
+            [ReactionCounter(post=instance, type=key) for key, _ in REACTION_CHOICES],
+            ignore_conflicts=True,
+        )
+
+
+# ----------------------------
+# Índice de búsqueda (FTS5)
+# ----------------------------
+
+@receiver(post_save, sender=Post)
+def index_post_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_on_delete(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def reindex_post_on_tags_change(sender, instance, action, **kwargs):
+    # Los tags se guardan después del post (form.save_m2m), hay que reindexar
+    if isinstance(instance, Post) and action in ("post_add", "post_remove", "post_clear"):
+        search.index_post(instance)
+
+
+# ----------------------------
+# Invalidación de la caché de páginas anónimas
+# ----------------------------
+
+def _bump_after_commit(*scopes, using=None):
+    transaction.on_commit(lambda: page_cache.bump(*scopes), using=using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    _bump_after_commit(page_cache.LIST_SCOPE, page_cache.post_scope(instance.slug))
+
+
+def _post_slug(instance):
+    try:
+        return instance.post.slug
+    except Post.DoesNotExist:
+        return None
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_pages(sender, instance, **kwargs):
+    # El promedio de reseñas aparece en las tarjetas del listado
+    slug = _post_slug(instance)
+    if slug:
+        _bump_after_commit(page_cache.LIST_SCOPE, page_cache.post_scope(slug))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def invalidate_post_interaction_pages(sender, instance, **kwargs):
+    # Las tarjetas del listado muestran las reacciones (reaction_badges): también se invalida
+    slug = _post_slug(instance)
+    if slug:
+        _bump_after_commit(
+            page_cache.LIST_SCOPE, page_cache.post_scope(slug), using=instance._state.db
+        )
+
+
+# ----------------------------
+# Caché de la campanita (notificaciones)
+# ----------------------------
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_bell(sender, instance, **kwargs):
+    notifications.invalidate(instance.user_id)
+
+
+# ----------------------------
+# Caché de la barra de tags
+# ----------------------------
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_nav_tags(sender, instance, **kwargs):
+    context_processors.invalidate_nav_tags()
+
+
+# ----------------------------
+# Borrado en cascada de las tablas de interacción
+# ----------------------------
+# Sus FK no tienen restricción ni CASCADE (pueden vivir en otra base, ver
+# blog/routers.py): al borrar el padre se limpian aquí, en la base de cada tabla.
+INTERACTION_CASCADE = {
+    Post: [(Reaction, "post"), (ReactionCounter, "post"), (Notification, "target_post")],
+    Comment: [(CommentVote, "comment"), (Notification, "target_comment")],
+    Review: [(ReviewVote, "review"), (Notification, "target_review")],
+    User: [
+        (Reaction, "user"), (CommentVote, "user"), (ReviewVote, "user"),
+        (Notification, "user"), (Notification, "actor"), (ArchivedNotification, "user"),
+    ],
+}
+INTERACTION_SET_NULL = {
+    Post: [(ArchivedNotification, "target_post")],
+    User: [(ArchivedNotification, "actor")],
+}
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=User)
+def delete_interactions(sender, instance, **kwargs):
+    for model, field in INTERACTION_CASCADE.get(sender, ()):
+        model.objects.filter(**{f"{field}_id": instance.pk}).delete()
+    for model, field in INTERACTION_SET_NULL.get(sender, ()):
+        model.objects.filter(**{f"{field}_id": instance.pk}).update(**{field: None})
+
+
+# ----------------------------
+# Autores/tags seguidos (FollowSet en caché)
+# ----------------------------
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_follow_set(sender, instance, **kwargs):
+    follows.invalidate(instance.user_id)
+
+
+# ----------------------------
+# Timeline materializado (mi-feed)
+# ----------------------------
+
+@receiver(post_save, sender=Post)
+def fanout_post_on_publish(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    was = getattr(instance, "_loaded_status", None)
+    instance._loaded_status = instance.status
+    if instance.status == "published" and was != "published":
+        jobs.enqueue("timeline.fanout", post_id=instance.pk)
+    elif was == "published" and instance.status != "published":
+        timeline.remove_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def fanout_post_on_tags_change(sender, instance, action, **kwargs):
+    # Los tags llegan después del post: sus seguidores se reparten aquí
+    if not isinstance(instance, Post) or instance.status != "published":
+        return
+    if action == "post_add":
+        jobs.enqueue("timeline.fanout", post_id=instance.pk)
+    elif action in ("post_remove", "post_clear"):
+        jobs.enqueue("timeline.prune_post", post_id=instance.pk)
+
+
+# ----------------------------
+# Derivados de imágenes (portadas y avatares)
+# ----------------------------
+
+@receiver(post_save, sender=Post)
+def schedule_cover_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        images.schedule(instance, "post_cover")
+
+
+@receiver(post_save, sender=Profile)
+def schedule_avatar_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        images.schedule(instance, "avatar")
+
+
+# ----------------------------
+# Refcount de MediaBlob (portadas y avatares)
+# ----------------------------
+
+def _remember_loaded_file(instance, field):
+    # Cargado con only()/defer() y el campo asignado después: se lee lo que había
+    loaded = f"_loaded_{field}"
+    if instance._state.adding or hasattr(instance, loaded) or field not in instance.__dict__:
+        return
+    old = (
+        type(instance)._base_manager.using(instance._state.db)
+        .filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+    setattr(instance, loaded, old or "")
+
+
+@receiver(pre_save, sender=Post)
+def remember_cover_blob(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_loaded_file(instance, "cover")
+
+
+@receiver(pre_save, sender=Profile)
+def remember_avatar_blob(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_loaded_file(instance, "avatar")
+
+
+def _track_file_change(instance, field, created):
+    current = getattr(instance, field).name or ""
+    loaded = f"_loaded_{field}"
+    if created:
+        old = ""
+    elif hasattr(instance, loaded):
+        old = getattr(instance, loaded) or ""
+    else:
+        return  # el campo no se cargó ni se asignó (only/defer): no cambió
+    if current != old:
+        storage.track_file(current)
+        storage.release_file(old)
+    setattr(instance, loaded, current)
+
+
+@receiver(post_save, sender=Post)
+def track_cover_blob(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        _track_file_change(instance, "cover", created)
+
+
+@receiver(post_save, sender=Profile)
+def track_avatar_blob(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        _track_file_change(instance, "avatar", created)
+
+
+@receiver(post_delete, sender=Post)
+def release_cover_blob(sender, instance, **kwargs):
+    storage.release_file(instance.cover.name)
+
+
+@receiver(post_delete, sender=Profile)
+def release_avatar_blob(sender, instance, **kwargs):
+    storage.release_file(instance.avatar.name)
@@ -0,0 +1,95 @@
+"""
+Perfil de producción para SQLite (``SQLITE_PRODUCTION`` en settings).
+
+- ``apply_pragmas``: en cada conexión nueva (señal ``connection_created``)
+  aplica ``SQLITE_PRAGMAS``: WAL, synchronous=NORMAL, busy_timeout, mmap,
+  caché de páginas y temporales en memoria.
+- ``retry_write``: ejecuta una escritura corta en su propia transacción y la
+  repite con espera exponencial aleatoria (jitter) si la base está bloqueada.
+- Las conexiones persistentes se configuran con ``CONN_MAX_AGE`` (settings).
+"""
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, router, transaction
+
+from . import writer
+
+RETRY_ATTEMPTS = 6
+RETRY_BASE_DELAY = 0.02   # s; se dobla en cada intento (2, 4, 8... × base)
+RETRY_MAX_DELAY = 0.5
+LOCK_ERRORS = (OperationalError, sqlite3.OperationalError)
+
+
+def pragmas():
+    """PRAGMAs a aplicar en cada conexión (vacío fuera del perfil de producción)."""
+    if not getattr(settings, "SQLITE_PRODUCTION", False):
+        return {}
+    return getattr(settings, "SQLITE_PRAGMAS", {})
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Receptor de ``connection_created``."""
+    values = pragmas()
+    if connection.vendor != "sqlite" or not values:
+        return
+    read_only = "mode=ro" in str(connection.settings_dict["NAME"])   # réplica (blog/replica.py)
+    with connection.cursor() as cursor:
+        for name, value in values.items():
+            if read_only and name == "journal_mode":
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+# --------- Reintentos ----------
+def is_locked(exc):
+    message = str(exc).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def backoff(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Espera del intento ``attempt`` (0, 1, 2...): "full jitter" entre 0 y base·2^n."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retry(func, *args, attempts=RETRY_ATTEMPTS, **kwargs):
+    """Llama a ``func`` y la repite si SQLite responde "database is locked"."""
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except LOCK_ERRORS as exc:
+            if not is_locked(exc) or attempt == attempts - 1:
+                raise
+            time.sleep(backoff(attempt))
+
+
+def retry_write(func=None, *, model=None):
+    """
+    Decorador para escrituras cortas: las ejecuta en ``transaction.atomic()`` y
+    reintenta la transacción completa si la base está bloqueada. Dentro de
+    otra transacción no reintenta (habría que repetir también lo de fuera).
+    Con ``SQLITE_WRITER`` se delegan al hilo escritor (blog/writer.py).
+
+    ``@retry_write(model=Reaction)``: la transacción se abre en la base de ese
+    modelo (puede no ser ``default``, ver blog/routers.py); esas escrituras
+    no pasan por el hilo escritor, que solo agrupa las de ``default``.
+    """
+    if func is None:
+        return lambda f: retry_write(f, model=model)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        using = router.db_for_write(model) if model is not None else DEFAULT_DB_ALIAS
+        if transaction.get_connection(using).in_atomic_block:
+            return func(*args, **kwargs)
+        if using == DEFAULT_DB_ALIAS and writer.enabled() and not writer.on_writer_thread():
+            return writer.submit(func, *args, **kwargs).result(timeout=writer.RESULT_TIMEOUT)
+
+        def run():
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        return call_with_retry(run)
+    return wrapper
@@ -0,0 +1,191 @@
+"""
+Mantenimiento de PostStats y de los contadores de reacciones (ReactionCounter).
+
+Las vistas llaman a estas funciones dentro de la misma ``transaction.atomic()``
+que la escritura (reseña, comentario, moderación o reacción). Los contadores se
+actualizan con ``F()`` para no perder incrementos concurrentes; si la fila no
+existe todavía se recalcula completa con ``rebuild_post``.
+"""
+from django.db.models import Count, F, Sum
+
+from .models import Comment, Post, PostStats, REACTION_CHOICES, Reaction, ReactionCounter, Review
+
+
+def _bump(post_id, **deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = PostStats.objects.filter(post_id=post_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        rebuild_post(post_id)
+
+
+# --------- Reseñas ----------
+def review_created(review):
+    rating = int(review.rating) if review.rating else 0
+    _bump(
+        review.post_id,
+        review_count=1,
+        rating_sum=rating,
+        rating_count=1 if rating else 0,
+    )
+
+
+def review_rating_changed(review, old_rating):
+    old = int(old_rating) if old_rating else 0
+    new = int(review.rating) if review.rating else 0
+    _bump(
+        review.post_id,
+        rating_sum=new - old,
+        rating_count=(1 if new else 0) - (1 if old else 0),
+    )
+
+
+# --------- Comentarios ----------
+def _counts(comment):
+    """Solo cuentan los comentarios escritos a mano (no los automáticos de reacciones)."""
+    return not comment.is_reaction
+
+
+def comment_created(comment):
+    if comment.status == "visible" and _counts(comment):
+        _bump(comment.post_id, comment_count=1)
+
+
+def comment_status_changed(comment, old_status):
+    was_visible = old_status == "visible"
+    is_visible = comment.status == "visible"
+    if was_visible != is_visible and _counts(comment):
+        _bump(comment.post_id, comment_count=1 if is_visible else -1)
+
+
+# --------- Reacciones ----------
+def _bump_reaction(post_id, reaction_type, delta):
+    """Aplica ``delta``; devuelve False si tuvo que recalcular el post entero."""
+    qs = ReactionCounter.objects.filter(post_id=post_id, type=reaction_type)
+    if delta < 0:
+        qs = qs.filter(count__gte=-delta)
+    if qs.update(count=F("count") + delta):
+        return True
+    # Fila inexistente (o contador desviado): se recalcula ese post
+    rebuild_reaction_counters([post_id])
+    return False
+
+
+def reaction_changed(post_id, old_type=None, new_type=None):
+    """Mueve un voto de reacción de `old_type` a `new_type` (cualquiera puede ser None)."""
+    if old_type == new_type:
+        return
+    # El recálculo lee la tabla Reaction ya escrita: incluye también `new_type`
+    if old_type and not _bump_reaction(post_id, old_type, -1):
+        return
+    if new_type:
+        _bump_reaction(post_id, new_type, 1)
+
+
+def reaction_counts_for(post_ids):
+    """{post_id: {tipo: total}} con todos los tipos presentes (una consulta)."""
+    result = {pid: {key: 0 for key, _ in REACTION_CHOICES} for pid in post_ids}
+    rows = ReactionCounter.objects.filter(post_id__in=list(result)).values_list("post_id", "type", "count")
+    for post_id, reaction_type, count in rows:
+        if reaction_type in result[post_id]:
+            result[post_id][reaction_type] = count
+    return result
+
+
+def reaction_counts(post_id):
+    return reaction_counts_for([post_id])[post_id]
+
+
+def computed_reaction_counts(post_ids=None):
+    """{(post_id, tipo): total} calculado desde la tabla Reaction."""
+    valid_types = {key for key, _ in REACTION_CHOICES}
+    reactions = Reaction.objects.filter(type__in=valid_types)
+    if post_ids is not None:
+        reactions = reactions.filter(post_id__in=post_ids)
+    return {
+        (r["post_id"], r["type"]): r["total"]
+        for r in reactions.values("post_id", "type").annotate(total=Count("id"))
+    }
+
+
+def rebuild_reaction_counters(post_ids):
+    """Reescribe los contadores de reacciones de ``post_ids`` desde cero."""
+    computed = computed_reaction_counts(post_ids)
+    existing = set(Post.objects.filter(id__in=post_ids).values_list("id", flat=True))
+    rows = [
+        ReactionCounter(post_id=pid, type=key, count=computed.get((pid, key), 0))
+        for pid in existing
+        for key, _ in REACTION_CHOICES
+    ]
+    ReactionCounter.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["post", "type"], update_fields=["count"]
+    )
+
+
+# --------- Recalcular desde cero ----------
+def _computed_rows(post_ids=None):
+    """Calcula los contadores con agregados agrupados (una consulta por tabla)."""
+    reviews = Review.objects.all()
+    comments = Comment.objects.filter(status="visible", is_reaction=False)
+    posts = Post.objects.all()
+    if post_ids is not None:
+        reviews = reviews.filter(post_id__in=post_ids)
+        comments = comments.filter(post_id__in=post_ids)
+        posts = posts.filter(id__in=post_ids)
+
+    rows = {pid: PostStats(post_id=pid) for pid in posts.values_list("id", flat=True)}
+
+    for r in reviews.values("post_id").annotate(
+        total=Count("id"), rsum=Sum("rating"), rcount=Count("rating")
+    ):
+        row = rows.get(r["post_id"])
+        if row:
+            row.review_count = r["total"]
+            row.rating_sum = r["rsum"] or 0
+            row.rating_count = r["rcount"]
+
+    for c in comments.values("post_id").annotate(total=Count("id")):
+        row = rows.get(c["post_id"])
+        if row:
+            row.comment_count = c["total"]
+
+    return rows
+
+
+COUNTER_FIELDS = ["rating_sum", "rating_count", "review_count", "comment_count", "updated"]
+
+
+def rebuild_post(post_id):
+    rows = _computed_rows([post_id])
+    row = rows.get(post_id)
+    if row is None:
+        return None
+    PostStats.objects.bulk_create(
+        [row], update_conflicts=True, unique_fields=["post"], update_fields=COUNTER_FIELDS
+    )
+    return row
+
+
+def refresh_comments(post_id):
+    """Recalcula solo comment_count (borrados en cascada de hilos)."""
+    total = Comment.objects.filter(post_id=post_id, status="visible", is_reaction=False).count()
+    if not PostStats.objects.filter(post_id=post_id).update(comment_count=total):
+        rebuild_post(post_id)
+
+
+def rebuild_all(batch_size=500):
+    """Recalcula todas las filas. Devuelve el número de posts procesados."""
+    ids = list(Post.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        rows = _computed_rows(chunk)
+        PostStats.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=["post"],
+            update_fields=COUNTER_FIELDS,
+        )
+    return len(ids)
@@ -0,0 +1,104 @@
+"""
+Almacenamiento direccionado por contenido para portadas, avatares y subidas
+de CKEditor.
+
+``ContentAddressedStorage._save`` calcula el sha256 mientras copia el archivo
+a un temporal y lo guarda una sola vez en ``blobs/<ab>/<cd>/<sha256>.<ext>`` (la
+extensión de la primera subida: el blob se busca por hash en MediaBlob).
+Si ese contenido ya existía se descarta el temporal: volver a subir la misma
+imagen solo cambia metadatos. Cada blob tiene una fila MediaBlob con su
+``refcount`` (cuántos ``Post.cover`` / ``Profile.avatar`` lo usan), que
+mantienen las señales vía ``track_file`` / ``release_file``.
+
+Los archivos antiguos (``covers/``, ``avatars/``...) siguen sirviéndose igual.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = "blobs"
+CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(digest, ext):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide el contenido (en _save), no hay colisiones
+        return name
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()
+        tmp_dir = os.path.join(self.location, BLOB_DIR, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        MediaBlob = apps.get_model("blog", "MediaBlob")
+
+        digest, size = hashlib.sha256(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            # El blob se identifica solo por el hash: la misma imagen subida como
+            # .jpg y luego .jpeg reutiliza el nombre que ya tiene su MediaBlob
+            existing = (
+                MediaBlob.objects.filter(sha256=digest.hexdigest())
+                .values_list("name", flat=True)
+                .first()
+            )
+            final = existing or blob_name(digest.hexdigest(), ext)
+            path = self.path(final)
+            if os.path.exists(path):
+                os.remove(tmp_path)   # ya estaba: deduplicado
+                os.utime(path)        # vuelve a contar el periodo de gracia de media_gc
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if existing is None:
+            MediaBlob.objects.get_or_create(
+                sha256=digest.hexdigest(), defaults={"name": final, "size": size}
+            )
+        return final
+
+
+content_storage = ContentAddressedStorage()
+
+
+# --------- Contador de referencias ----------
+def track_file(name):
+    """Una referencia más a ``name`` (no hace nada si no es un blob)."""
+    if name and name.startswith(f"{BLOB_DIR}/"):
+        apps.get_model("blog", "MediaBlob").objects.filter(name=name).update(
+            refcount=F("refcount") + 1, released_at=None
+        )
+
+
+def release_file(name):
+    """Una referencia menos. A cero se anota ``released_at`` (candidato a borrarse)."""
+    if name and name.startswith(f"{BLOB_DIR}/"):
+        MediaBlob = apps.get_model("blog", "MediaBlob")
+        MediaBlob.objects.filter(name=name, refcount__gt=0).update(refcount=F("refcount") - 1)
+        MediaBlob.objects.filter(name=name, refcount=0, released_at__isnull=True).update(
+            released_at=timezone.now()
+        )
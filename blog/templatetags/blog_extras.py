@@ -0,0 +1,73 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from blog import images, mentions
+from blog.pagination import CURSOR_PARAM
+
+register = template.Library()
+
+
+@register.filter
+def mention_links(comment):
+    """{{ comment|mention_links|linebreaksbr }}: texto con @menciones enlazadas."""
+    return mentions.render(comment.text, getattr(comment, "mentions", None))
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor):
+    """{% cursor_url page_obj.next_cursor %}: la URL actual con ese ``?cursor=`` (sin ``page``)."""
+    params = context["request"].GET.copy()
+    params.pop("page", None)
+    params[CURSOR_PARAM] = cursor
+    return f"?{params.urlencode()}"
+
+
+# --------- Imágenes responsive (derivados de blog/images.py) ----------
+DEFAULT_IMG_ATTRS = {"loading": "lazy", "decoding": "async"}
+
+
+def _attrs(attrs):
+    return format_html_join(" ", '{}="{}"', ((k.replace("_", "-"), v) for k, v in attrs.items()))
+
+
+def _picture(fallback_url, variants, sizes, attrs, fallback_width=640):
+    attrs = {**DEFAULT_IMG_ATTRS, **attrs}
+    jpeg = images.srcset(variants, "jpeg")
+    if not jpeg:
+        # Sin derivados (aún pendientes o fallidos): la imagen original
+        return format_html('<img src="{}" {}>', fallback_url, _attrs(attrs))
+    return format_html(
+        '<picture style="display:contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" {}>'
+        "</picture>",
+        images.srcset(variants, "webp"), sizes,
+        images.best(variants, "jpeg", fallback_width), jpeg, sizes, _attrs(attrs),
+    )
+
+
+@register.simple_tag
+def responsive_img(image, variants, sizes="100vw", **attrs):
+    """{% responsive_img p.cover p.cover_variants sizes="..." class="..." alt=p.title %}"""
+    if not image:
+        return ""
+    if images.needs_refresh(image, variants):
+        variants = None  # mapa de otra imagen (se está procesando la nueva)
+    return _picture(image.url, variants, sizes, attrs)
+
+
+@register.simple_tag
+def avatar_img(profile, size=48, **attrs):
+    """{% avatar_img user.profile 48 class="rounded-circle" %}: avatar cuadrado o el por defecto."""
+    attrs = {"width": size, "height": size, "alt": "avatar", **attrs}
+    avatar = getattr(profile, "avatar", None)
+    if not avatar:
+        return format_html('<img src="{}" {}>', static("img/default-avatar.png"), _attrs(attrs))
+    variants = getattr(profile, "avatar_variants", None)
+    if images.needs_refresh(avatar, variants):
+        variants = None
+    return _picture(
+        avatar.url, variants, f"{size}px", attrs,
+        fallback_width=int(size) * 2,
+    )
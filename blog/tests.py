@@ -1,3 +1,742 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.db import connection, router, transaction
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    instrumentation, jobs, media_gc, notifications, page_cache, reactions, replica, routers, search, stats,
+    writes,
+)
+from .models import (
+    BackgroundJob, Comment, CommentVote, MediaBlob, Notification, Post, PostStats, Reaction, ReactionCounter,
+    Review, ReviewVote, Subscription, Tag, TimelineEntry,
+)
+from .pagination import KeysetPaginator, encode_cursor
+from .storage import ContentAddressedStorage
+from .templatetags.blog_extras import cursor_url
+
+# También con las tablas repartidas (blog/routers.py); la réplica es un espejo de default
+TEST_DATABASES = {alias for alias in settings.DATABASES if alias != replica.ALIAS}
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class SearchTests(TestCase):
+    """Búsqueda FTS5 (blog/search.py): ranking, fragmento e índice sincronizado."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.author = User.objects.create_user("autor", password="x")
+
+    def _post(self, title, content="<p>x</p>"):
+        return Post.objects.create(title=title, author=self.author, content=content, status="published")
+
+    def _found(self, q):
+        return list(search.search_posts(Post.objects.all(), q).values_list("title", flat=True))
+
+    def test_title_match_ranks_above_body_match(self):
+        self._post("Un RPG cualquiera", "<p>Hablamos de zelda de pasada</p>")
+        self._post("Zelda: análisis")
+        self.assertEqual(self._found("zelda"), ["Zelda: análisis", "Un RPG cualquiera"])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        self._post("Reseña", "<p>zelda &lt;script&gt;alert(1)&lt;/script&gt;</p>")
+        response = self.client.get(reverse("blog:post_list"), {"q": "zelda"})
+        self.assertContains(response, "<mark>zelda</mark>")
+        self.assertContains(response, "&lt;script&gt;alert(1)&lt;/script&gt;")
+        self.assertNotContains(response, "<script>alert(1)")
+
+    def test_index_follows_tags_and_delete(self):
+        post = self._post("Metroid")
+        post.tags.add("aventura")
+        self.assertEqual(self._found("aventura"), ["Metroid"])
+        post.tags.remove("aventura")
+        self.assertEqual(self._found("aventura"), [])
+
+        post.delete()
+        self.assertEqual(self._found("metroid"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {search.FTS_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class KeysetPaginationTests(TestCase):
+    """Paginación por cursor (blog/pagination.py)."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.author = User.objects.create_user("autor", password="x")
+
+    def _posts(self, n, tag=None):
+        posts = [
+            Post.objects.create(title=f"post {i}", author=self.author, content="x", status="published")
+            for i in range(n)
+        ]
+        for post in posts:
+            if tag:
+                post.tags.add(tag)
+        return posts
+
+    def test_next_and_prev_with_equal_timestamps(self):
+        posts = self._posts(5)
+        Post.objects.update(created=posts[0].created)   # empate: decide el id
+        paginator = KeysetPaginator(Post.objects.all(), 2)
+
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append([p.id for p in page])
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        expected = sorted((p.id for p in posts), reverse=True)
+        self.assertEqual(pages, [expected[0:2], expected[2:4], expected[4:]])
+
+        back = paginator.page(page.previous_cursor)
+        self.assertEqual([p.id for p in back], expected[2:4])
+        self.assertTrue(back.has_previous())
+        first = paginator.page(back.previous_cursor)
+        self.assertEqual([p.id for p in first], expected[0:2])
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursors_fall_back_to_the_first_page(self):
+        self._posts(3)
+        paginator = KeysetPaginator(Post.objects.all(), 2)
+        first = [p.id for p in paginator.page()]
+        token = paginator.page().next_cursor
+        for cursor in ("basura", token[:-2] + "xx", encode_cursor([1]), encode_cursor(["no-es-fecha", 1])):
+            with self.subTest(cursor=cursor):
+                self.assertEqual([p.id for p in paginator.page(cursor)], first)
+
+        response = self.client.get(reverse("blog:post_list"), {"cursor": "basura"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_tag_list_pages_stay_in_the_tag(self):
+        tagged = self._posts(12, tag="aventura")
+        self._posts(3)
+        url = reverse("blog:post_by_tag", args=["aventura"])
+        response = self.client.get(url)
+        first = [p.id for p in response.context["posts"]]
+        next_url = url + cursor_url({"request": response.wsgi_request}, response.context["page_obj"].next_cursor)
+        second = [p.id for p in self.client.get(next_url).context["posts"]]
+
+        self.assertEqual(len(first), 10)
+        self.assertEqual(sorted(first + second), sorted(p.id for p in tagged))
+
+
+# Sin collectstatic no existe el manifest de whitenoise
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ReviewSectionQueryCountTests(TestCase):
+    """La sección de reseñas del detalle debe costar las mismas consultas con 1 o 50 reseñas."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.author = User.objects.create_user("autor", password="x")
+        self.post = Post.objects.create(
+            title="Zelda", author=self.author, content="<p>x</p>", status="published"
+        )
+        self.voter = User.objects.create_user("votante", password="x")
+
+    def _add_reviews(self, n):
+        for i in range(n):
+            reviewer = User.objects.create_user(f"reviewer{Review.objects.count()}", password="x")
+            review = Review.objects.create(
+                post=self.post, user=reviewer, rating=4, comment=f"reseña {i}", status="visible"
+            )
+            reply = Review.objects.create(
+                post=self.post, user=self.author, parent=review, comment="gracias", status="visible"
+            )
+            ReviewVote.objects.create(review=review, user=self.voter, vote="like")
+            ReviewVote.objects.create(review=reply, user=self.voter, vote="dislike")
+
+    def _detail_queries(self):
+        cache.clear()  # medir siempre en frío (navbar y campanita van cacheadas)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.post.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_query_count_does_not_grow_with_reviews(self):
+        self._add_reviews(1)
+        baseline = self._detail_queries()
+
+        self._add_reviews(49)
+        self.assertEqual(self._detail_queries(), baseline)
+
+    def test_query_count_for_logged_in_owner(self):
+        self.client.force_login(self.author)
+        self._add_reviews(1)
+        baseline = self._detail_queries()
+
+        self._add_reviews(24)
+        self.assertEqual(self._detail_queries(), baseline)
+
+    def test_annotated_vote_counts_are_rendered(self):
+        self._add_reviews(1)
+        self.client.force_login(self.voter)
+        response = self.client.get(self.post.get_absolute_url())
+        self.assertContains(response, "👍 1")
+        self.assertContains(response, "👎 1")
+        self.assertContains(response, "Ver 1 respuesta")
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class CommentThreadTests(TestCase):
+    """El comentario automático de una reacción no es un comentario del hilo."""
+
+    databases = TEST_DATABASES
+
+    def test_reaction_activity_is_not_in_thread(self):
+        author = User.objects.create_user("autor", password="x")
+        post = Post.objects.create(title="Zelda", author=author, content="<p>x</p>", status="published")
+        fan = User.objects.create_user("fan", password="x")
+        writes.create_comment(post, fan, "me encantó")
+        reactions.react(post, fan, "like", activity=True)
+
+        response = self.client.get(post.get_absolute_url())
+        self.assertContains(response, "me encantó")
+        self.assertNotContains(response, reactions.AUTO_COMMENT_PREFIX)
+        self.assertEqual(PostStats.objects.get(post=post).comment_count, 1)
+
+    def test_reaction_activity_follows_committed_reaction(self):
+        # Con SQLITE_SPLIT_INTERACTIONS=True el comentario se escribe al confirmar la reacción
+        author = User.objects.create_user("autor", password="x")
+        post = Post.objects.create(title="Zelda", author=author, content="<p>x</p>", status="published")
+        fan = User.objects.create_user("fan", password="x")
+        activity = Comment.objects.filter(post=post, author=fan, is_reaction=True)
+        using = routers.database_for(Reaction)
+
+        with self.captureOnCommitCallbacks(using=using, execute=True):
+            reactions.react(post, fan, "like", toggle=True, activity=True)
+        self.assertEqual(list(activity.values_list("text", flat=True)), ["Reacción automática: 👍"])
+
+        with self.assertRaises(ValueError):
+            with self.captureOnCommitCallbacks(using=using, execute=True):
+                with transaction.atomic(using=using):
+                    reactions.react(post, fan, "love", toggle=True, activity=True)
+                    raise ValueError("la transacción de la reacción se revierte")
+        self.assertEqual(activity.get().text, "Reacción automática: 👍")
+
+        with self.captureOnCommitCallbacks(using=using, execute=True):
+            reactions.react(post, fan, "like", toggle=True, activity=True)
+        self.assertFalse(activity.exists())
+
+    def test_thread_renders_nested_with_constant_queries(self):
+        author = User.objects.create_user("autor", password="x")
+        post = Post.objects.create(title="Zelda", author=author, content="<p>x</p>", status="published")
+        voter = User.objects.create_user("votante", password="x")
+
+        def add_branches(n):
+            for i in range(n):
+                root = writes.create_comment(post, voter, f"raíz {i}")
+                reply = writes.create_comment(post, author, f"respuesta {i}", parent=root)
+                CommentVote.objects.create(comment=reply, user=voter, value=1)
+
+        def detail():
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(post.get_absolute_url())
+            return response, len(ctx)
+
+        add_branches(1)
+        response, baseline = detail()
+        self.assertContains(response, "respuesta 0")
+        self.assertContains(response, "⬆ 1 · ⬇ 0")
+
+        add_branches(20)
+        self.assertEqual(detail()[1], baseline)
+
+
+@override_settings(JOBS_EAGER=True)
+class NotificationGroupTests(TestCase):
+    """Agrupación de notificaciones por (destinatario, verbo, post, franja)."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.author = User.objects.create_user("autor", password="x")
+        self.post = Post.objects.create(title="Zelda", author=self.author, content="x", status="published")
+        self.inbox = Notification.objects.filter(user=self.author)
+
+    def _comment(self, username):
+        fan, _ = User.objects.get_or_create(username=username)
+        with self.captureOnCommitCallbacks(execute=True):
+            writes.create_comment(self.post, fan, "hola")
+
+    def test_actors_merge_within_a_bucket(self):
+        self._comment("ana")
+        self._comment("luis")
+        self._comment("ana")
+        group = self.inbox.get()
+        self.assertEqual(group.actor_count, 2)
+        self.assertEqual([name for _, name in group.recent_actors], ["ana", "luis"])
+
+    def test_a_new_bucket_starts_a_new_group(self):
+        self._comment("ana")
+        self.inbox.update(bucket=notifications.group_bucket() - timedelta(hours=6))
+        self._comment("luis")
+        self.assertEqual(sorted(self.inbox.values_list("actor_count", flat=True)), [1, 1])
+
+    def test_group_created_by_a_concurrent_job_is_merged(self):
+        self._comment("ana")
+        # El SELECT no la ve (como si otro trabajo la insertara justo después)
+        with mock.patch.object(notifications, "_existing_groups", return_value={}):
+            self._comment("luis")
+        group = self.inbox.get()
+        self.assertEqual((group.actor_count, group.actor.username), (2, "luis"))
+
+
+class JobTests(TestCase):
+    """Cola de trabajos (blog/jobs.py) procesada como lo hace run_jobs."""
+
+    databases = TEST_DATABASES
+
+    def test_worker_delivers_the_queued_notification(self):
+        author = User.objects.create_user("autor", password="x")
+        post = Post.objects.create(title="Zelda", author=author, content="x", status="published")
+        writes.create_comment(post, User.objects.create_user("fan", password="x"), "hola")
+        job = BackgroundJob.objects.get(kind="notifications.comment_created")
+        self.assertFalse(Notification.objects.exists())
+
+        processed, ok = jobs.run_pending()   # también el fan-out del post
+        self.assertEqual(ok, processed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(Notification.objects.get().user, author)
+
+    def test_failing_job_is_retried_with_backoff_then_failed(self):
+        job = jobs.enqueue("notifications.comment_created", comment_id="no-es-un-id")
+        for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+            with self.assertLogs("blog.jobs", "ERROR"):
+                self.assertEqual(jobs.run_pending(), (1, 0))
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn("ValueError", job.last_error)
+            if attempt < jobs.MAX_ATTEMPTS:
+                self.assertEqual(job.status, "pending")
+                self.assertGreater(job.run_after, timezone.now())
+                self.assertEqual(jobs.run_pending(), (0, 0))   # aún no toca
+                BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(job.status, "failed")
+
+
+class ReactionCounterTests(TestCase):
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        author = User.objects.create_user("autor", password="x")
+        self.post = Post.objects.create(title="Zelda", author=author, content="x", status="published")
+        self.fan = User.objects.create_user("fan", password="x")
+        reactions.react(self.post, self.fan, "like", activity=False)
+
+    def _assert_counts_match(self):
+        computed = stats.computed_reaction_counts([self.post.id])
+        for key, total in stats.reaction_counts(self.post.id).items():
+            self.assertEqual(total, computed.get((self.post.id, key), 0), key)
+
+    def test_switch_with_missing_counter_row(self):
+        ReactionCounter.objects.filter(post=self.post, type="like").delete()
+        reactions.react(self.post, self.fan, "love", activity=False)
+        self._assert_counts_match()
+
+    def test_switch_with_zeroed_counter(self):
+        ReactionCounter.objects.filter(post=self.post, type="like").update(count=0)
+        reactions.react(self.post, self.fan, "wow", activity=False)
+        self._assert_counts_match()
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+    PAGE_CACHE={"ENABLED": True},
+    CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "blog-test-page-cache"),
+    }},
+)
+class PageCacheTests(TestCase):
+    """Las páginas anónimas cacheadas se invalidan con cada interacción."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_anonymous_get_is_a_hit(self):
+        url = reverse("blog:post_list")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "HIT")
+
+    def test_write_bumps_the_scope(self):
+        author = User.objects.create_user("autor", password="x")
+        url = reverse("blog:post_list")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title="Zelda", author=author, content="<p>x</p>", status="published")
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertContains(response, "Zelda")
+
+    def test_pages_with_a_csrf_token_are_not_cached(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        def view(request):
+            return HttpResponse(Template("{% csrf_token %}").render(RequestContext(request)))
+
+        cached = page_cache.cache_anonymous_page(page_cache.list_scopes)(view)
+        self.assertNotIn("X-Page-Cache", cached(request))
+        self.assertNotIn("X-Page-Cache", cached(request))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_refuses_a_per_process_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            page_cache.check_backend()
+
+    def test_reaction_refreshes_cached_list(self):
+        author = User.objects.create_user("autor", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title="Zelda", author=author, content="<p>x</p>", status="published")
+        url = reverse("blog:post_list")
+        self.assertNotContains(self.client.get(url), 'title="like"')
+        self.assertNotContains(self.client.get(url), 'title="like"')   # servida desde la caché
+
+        fan = User.objects.create_user("fan", password="x")
+        with self.captureOnCommitCallbacks(using=routers.database_for(Reaction), execute=True):
+            reactions.react(post, fan, "like", activity=False)
+        self.assertContains(self.client.get(url), "👍 1")
+
+class ContentAddressedStorageTests(TestCase):
+
+    def test_same_bytes_with_another_extension_reuse_the_blob(self):
+        with tempfile.TemporaryDirectory() as media:
+            storage = ContentAddressedStorage(location=media)
+            first = storage.save("portada.jpg", ContentFile(b"imagen"))
+            second = storage.save("portada.jpeg", ContentFile(b"imagen"))
+
+            self.assertEqual(second, first)
+            self.assertEqual(MediaBlob.objects.get().name, first)
+            self.assertEqual(len(storage.listdir(first.rsplit("/", 1)[0])[1]), 1)
+
+
+class MediaBlobRefcountTests(TestCase):
+    """Refcount de MediaBlob mantenido por las señales de Post.cover."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.author = User.objects.create_user("autor", password="x")
+
+    def _post(self, data, name="portada.jpg"):
+        return Post.objects.create(
+            title="Zelda", author=self.author, content="x", cover=ContentFile(data, name=name)
+        )
+
+    def _refcounts(self):
+        return dict(MediaBlob.objects.values_list("sha256", "refcount"))
+
+    def test_same_content_is_one_blob_with_two_references(self):
+        first, second = self._post(b"imagen"), self._post(b"imagen", name="otra.png")
+        self.assertEqual(first.cover.name, second.cover.name)
+        self.assertEqual(list(self._refcounts().values()), [2])
+
+    def test_replace_and_delete_move_the_refcount(self):
+        first, second = self._post(b"imagen"), self._post(b"imagen")
+        old = MediaBlob.objects.get()
+
+        first.cover = ContentFile(b"nueva", name="nueva.jpg")
+        first.save()
+        new = MediaBlob.objects.exclude(pk=old.pk).get()
+        self.assertEqual(self._refcounts(), {old.sha256: 1, new.sha256: 1})
+
+        second.delete()
+        old.refresh_from_db()
+        self.assertEqual(old.refcount, 0)
+        self.assertIsNotNone(old.released_at)
+
+    def test_deferred_cover_is_left_alone_or_read_before_replacing(self):
+        post = self._post(b"imagen")
+        old = MediaBlob.objects.get()
+
+        partial = Post.objects.only("id", "title").get(pk=post.pk)
+        partial.title = "Zelda II"
+        partial.save()
+        self.assertEqual(self._refcounts(), {old.sha256: 1})
+
+        partial = Post.objects.defer("cover").get(pk=post.pk)
+        partial.cover = ContentFile(b"nueva", name="nueva.jpg")
+        partial.save()
+        new = MediaBlob.objects.exclude(pk=old.pk).get()
+        self.assertEqual(self._refcounts(), {old.sha256: 0, new.sha256: 1})
+
+class MediaGcTests(TestCase):
+    """Recolector de huérfanos (blog/media_gc.py y manage.py media_gc)."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = media.name
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.author = User.objects.create_user("autor", password="x")
+
+    def _file(self, name, hours_old=48):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(b"x")
+        when = time.time() - hours_old * 3600
+        os.utime(path, (when, when))
+        return path
+
+    def test_grace_period_and_body_images(self):
+        old = self._file("uploads/viejo.jpg")
+        fresh = self._file("uploads/nuevo.jpg", hours_old=1)
+        in_body = self._file("uploads/en-el-cuerpo.jpg")
+        Post.objects.create(
+            title="Zelda", author=self.author,
+            content=f'<p><img alt="" src="{settings.MEDIA_URL}uploads/en-el-cuerpo.jpg"></p>',
+        )
+
+        report = media_gc.collect()
+        self.assertEqual(report["orphans"], 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertTrue(os.path.exists(in_body))
+
+    def test_rechecks_the_database_before_deleting(self):
+        cover = self._file("covers/portada.jpg")
+        Post.objects.create(title="Zelda", author=self.author, content="x", cover="covers/portada.jpg")
+        # Índice tomado antes de que el post empezara a usarla
+        with mock.patch.object(media_gc, "reference_index", return_value=set()):
+            report = media_gc.collect()
+        self.assertEqual(report["orphans"], 0)
+        self.assertTrue(os.path.exists(cover))
+
+    def test_resume_from_the_state_file(self):
+        paths = [self._file(f"uploads/{letter}.jpg") for letter in "abcd"]
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        state = os.path.join(state_dir.name, "gc.json")
+        out = StringIO()
+
+        call_command("media_gc", max_files=2, state_file=state, stdout=out)
+        with open(state) as fh:
+            self.assertEqual(json.load(fh), {"after": "uploads/b.jpg"})
+        self.assertEqual([os.path.exists(p) for p in paths], [False, False, True, True])
+
+        call_command("media_gc", resume=True, state_file=state, stdout=out)
+        self.assertIn("Reanudando después de uploads/b.jpg", out.getvalue())
+        self.assertFalse(any(os.path.exists(p) for p in paths))
+        self.assertFalse(os.path.exists(state))
+
+
+@override_settings(JOBS_EAGER=True)
+class TimelineTests(TestCase):
+
+    databases = TEST_DATABASES
+
+    def test_removing_a_tag_prunes_its_followers(self):
+        author = User.objects.create_user("autor", password="x")
+        tag_fan = User.objects.create_user("fan_tag", password="x")
+        author_fan = User.objects.create_user("fan_autor", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title="Zelda", author=author, content="x", status="published")
+            post.tags.add("aventura")
+        Subscription.objects.create(user=tag_fan, tag=Tag.objects.get(name="aventura"))
+        Subscription.objects.create(user=author_fan, author=author)
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user=u, post=post, created=post.created) for u in (tag_fan, author_fan)]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.remove("aventura")
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(post=post).values_list("user__username", flat=True)),
+            ["fan_autor"],
+        )
+
+    def test_follow_and_unfollow_touch_only_that_target(self):
+        author = User.objects.create_user("autor", password="x")
+        other = User.objects.create_user("otro", password="x")
+        fan = User.objects.create_user("fan", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            tagged = Post.objects.create(title="Zelda", author=author, content="x", status="published")
+            tagged.tags.add("aventura")
+            plain = Post.objects.create(title="Mario", author=author, content="x", status="published")
+            foreign = Post.objects.create(title="Metroid", author=other, content="x", status="published")
+            foreign.tags.add("aventura")
+        tag = Tag.objects.get(name="aventura")
+        feed = TimelineEntry.objects.filter(user=fan)
+        # Una fila que ningún seguimiento justifica: la reconstrucción completa la borraría
+        TimelineEntry.objects.create(user=fan, post=foreign, created=foreign.created)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            writes.toggle_subscription(fan, author=author)
+        self.assertEqual(set(feed.values_list("post_id", flat=True)), {tagged.id, plain.id, foreign.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            writes.toggle_subscription(fan, tag=tag)
+            writes.toggle_subscription(fan, tag=tag)
+        # Zelda sigue llegando por el autor; Metroid solo llegaba por el tag
+        self.assertEqual(set(feed.values_list("post_id", flat=True)), {tagged.id, plain.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            writes.unsubscribe(fan, author=author)
+        self.assertFalse(feed.exists())
+
+@replica.use_replica
+def _read_alias_view(request):
+    return HttpResponse(" ".join(router.db_for_read(model) for model in (Post, Session, Reaction)))
+
+
+@skipUnless(replica.ALIAS in settings.DATABASES, "solo con READ_REPLICA=True")
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ReplicaTests(TestCase):
+    """Lecturas desde la réplica (blog/replica.py) y pin tras un POST."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.snapshot = os.path.join(tmp.name, "replica.sqlite3")
+        self.enterContext(override_settings(READ_REPLICA_PATH=self.snapshot))
+
+    def _take_snapshot(self, at):
+        open(self.snapshot, "w").close()
+        os.utime(self.snapshot, (at, at))
+
+    def _get(self, pinned_at=None):
+        request = RequestFactory().get("/")
+        if pinned_at is not None:
+            request.COOKIES[replica.PIN_COOKIE] = str(pinned_at)
+        return _read_alias_view(request)
+
+    def test_router_sends_default_reads_to_a_fresh_replica(self):
+        reaction_db = routers.database_for(Reaction)
+        expected_reaction = replica.ALIAS if reaction_db == "default" else reaction_db
+
+        self._take_snapshot(time.time())
+        response = self._get()
+        self.assertTrue(response.from_replica)
+        self.assertEqual(response.content.decode().split(), [replica.ALIAS, "default", expected_reaction])
+        self.assertEqual(router.db_for_read(Post), "default")   # fuera de la vista
+
+        self._take_snapshot(time.time() - replica.max_lag() - 1)
+        self.assertFalse(getattr(self._get(), "from_replica", False))
+
+    def test_post_pins_the_browser(self):
+        response = self.client.post(reverse("blog:login"), {"username": "nadie", "password": "x"})
+        self.assertIn(replica.PIN_COOKIE, response.cookies)
+        self.assertNotIn(replica.PIN_COOKIE, self.client.get(reverse("blog:login")).cookies)
+
+    def test_pin_expires_once_a_newer_snapshot_exists(self):
+        pinned_at = time.time()
+        self._take_snapshot(pinned_at - 1)
+        self.assertFalse(getattr(self._get(pinned_at), "from_replica", False))
+        self._take_snapshot(pinned_at + 1)
+        self.assertTrue(self._get(pinned_at).from_replica)
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+    QUERY_INSTRUMENTATION=True,
+    JOBS_EAGER=True,
+)
+class QueryBudgetTests(TestCase):
+    """Cada vista de instrumentation.QUERY_BUDGETS debe quedar dentro de su presupuesto."""
+
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.author = User.objects.create_user("autor", password="x")
+        self.reader = User.objects.create_user("lector", password="x")
+        Subscription.objects.create(user=self.reader, author=self.author)
+        Subscription.objects.create(user=self.author, author=self.reader)
+        for i in range(5):
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(
+                    title=f"Zelda {i}", author=self.author, content="<p>zelda</p>",
+                    status="published", platform="pc",
+                )
+                post.tags.add("aventura")
+                writes.create_review(post, self.reader, "bien", rating=4)
+                comment = writes.create_comment(post, self.reader, "hola @autor")
+                writes.toggle_comment_vote(comment, self.author, 1)
+            Post.objects.create(title=f"Borrador {i}", author=self.author, content="x", status="draft")
+        self.post = post
+
+    def _urls(self):
+        return {
+            "blog:post_list": reverse("blog:post_list"),
+            "blog:post_by_tag": reverse("blog:post_by_tag", args=["aventura"]),
+            "blog:search": reverse("blog:search") + "?q=zelda",
+            "blog:post_detail": self.post.get_absolute_url(),
+            "blog:post_by_platform": reverse("blog:post_by_platform", args=["pc"]),
+            "blog:profile_detail": reverse("blog:profile_detail", args=["autor"]),
+            "blog:my_personal_feed": reverse("blog:my_personal_feed"),
+            "blog:my_subscriptions": reverse("blog:my_subscriptions"),
+            "blog:notification_list": reverse("blog:notification_list"),
+            "blog:my_drafts": reverse("blog:my_drafts"),
+            "blog:mis_posts_publicados": reverse("blog:mis_posts_publicados"),
+            "blog:author_feed": reverse("blog:author_feed", args=["autor"]),
+            "blog:tag_feed": reverse("blog:tag_feed", args=["aventura"]),
+        }
+
+    def test_every_budget_has_a_url(self):
+        self.assertEqual(set(self._urls()), set(instrumentation.QUERY_BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        for logged_in in (False, True):
+            if logged_in:
+                self.client.force_login(self.author)
+            for name, url in self._urls().items():
+                with self.subTest(view=name, logged_in=logged_in):
+                    cache.clear()
+                    response = self.client.get(url)
+                    if response.status_code == 302:
+                        continue  # requiere sesión
+                    self.assertEqual(response.status_code, 200)
+                    stats = response.query_stats
+                    self.assertLessEqual(
+                        stats.queries, instrumentation.budget_for(name),
+                        f"{name}: {stats.queries} consultas; repetidas: {stats.top_duplicates()}",
+                    )
+
+    def test_server_timing_header_and_report(self):
+        instrumentation.reset()
+        response = self.client.get(reverse("blog:post_list"))
+        self.assertIn("db;desc=", response["Server-Timing"])
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+        [row] = instrumentation.report()
+        self.assertEqual((row["view"], row["requests"]), ("blog:post_list", 1))
+
+        self.author.is_staff = True
+        self.author.save()
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(reverse("blog:query_report")), "blog:post_list")
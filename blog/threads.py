@@ -0,0 +1,89 @@
+"""
+Carga de hilos (comentarios y reseñas) con un número fijo de consultas.
+
+En lugar de que la plantilla pregunte por ``comment.score`` o ``replies`` en
+cada nodo, se trae todo el hilo de una vez y se arma el árbol en Python. Los votos se
+cuentan con una consulta aparte (sin JOIN): sus tablas pueden vivir en otra
+base (ver blog/routers.py).
+"""
+from django.db.models import Count, Prefetch
+
+from .models import Comment, CommentVote, Review, ReviewVote
+
+
+def _vote_counts(model, fk, ids, field):
+    """{(id, valor): votos} de los objetos ``ids``, agrupado en una consulta."""
+    if not ids:
+        return {}
+    rows = (
+        model.objects.filter(**{f"{fk}__in": ids})
+        .values_list(fk, field)
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    return {(pk, value): total for pk, value, total in rows}
+
+
+def _visible_comments(post, include_hidden):
+    qs = Comment.objects.filter(post=post, is_reaction=False)  # sin los automáticos de reacciones
+    if not include_hidden:
+        qs = qs.filter(status="visible")
+    return qs.select_related("author__profile")
+
+
+def load_comment_thread(post, include_hidden=False):
+    """
+    Devuelve la lista de comentarios raíz del post; cada comentario trae
+    ``thread_replies`` (sus respuestas ya cargadas, en orden cronológico).
+    Dos consultas (comentarios y votos), sin importar el tamaño del hilo.
+    Las respuestas cuyo padre no es visible no se muestran.
+    """
+    comments = list(_visible_comments(post, include_hidden))
+    votes = _vote_counts(CommentVote, "comment_id", [c.id for c in comments], "value")
+    by_id = {c.id: c for c in comments}
+    parent_cache = Comment._meta.get_field("parent")
+
+    roots = []
+    for c in comments:
+        c.thread_replies = []
+        c.up_votes = votes.get((c.id, 1), 0)
+        c.down_votes = votes.get((c.id, -1), 0)
+    for c in comments:
+        if c.parent_id is None:
+            parent_cache.set_cached_value(c, None)
+            roots.append(c)
+            continue
+        parent = by_id.get(c.parent_id)
+        if parent is not None:
+            parent_cache.set_cached_value(c, parent)
+            parent.thread_replies.append(c)
+
+    for c in comments:
+        c.thread_replies.sort(key=lambda r: (r.created, r.id))
+    # Fijados primero, luego por score y por fecha
+    roots.sort(key=lambda c: (c.pinned, c.score, c.created), reverse=True)
+    return roots
+
+
+def load_reviews(post, include_hidden=False):
+    """
+    Plan de carga de la sección de reseñas: reseñas raíz con el avatar del
+    autor, más ``visible_replies`` (Prefetch) y los votos de todas contados en
+    una consulta. Tres consultas en total, sin importar cuántas reseñas haya.
+    """
+    roots = Review.objects.filter(post=post, parent__isnull=True)
+    replies = Review.objects.order_by("created")
+    if not include_hidden:
+        roots = roots.filter(status="visible")
+        replies = replies.filter(status="visible")
+    roots = list(
+        roots.select_related("user__profile").prefetch_related(
+            Prefetch("replies", queryset=replies.select_related("user__profile"), to_attr="visible_replies")
+        )
+    )
+    reviews = roots + [reply for r in roots for reply in r.visible_replies]
+    votes = _vote_counts(ReviewVote, "review_id", [r.id for r in reviews], "vote")
+    for r in reviews:
+        r.like_votes = votes.get((r.id, "like"), 0)
+        r.dislike_votes = votes.get((r.id, "dislike"), 0)
+    return roots
@@ -0,0 +1,215 @@
+"""
+Timeline materializado para mi-feed (fan-out on write).
+
+- Al publicar un post se encola ``timeline.fanout``: inserta una fila
+  TimelineEntry por cada seguidor del autor o de alguno de sus tags.
+- Autores/tags con más de ``TIMELINE_FANOUT_LIMIT`` seguidores no se reparten
+  al publicar: cada lector los trae al abrir su feed (``pull_heavy``).
+- Leer el feed es un rango sobre el índice (user, -created, -id) paginado
+  por cursor.
+- Al seguir se insertan los últimos ``BACKFILL_LIMIT`` posts del autor o tag
+  (``follow``); lo anterior no llega a mi-feed (``manage.py rebuild_timeline
+  --limit N`` para cargar más). Al dejar de seguir se borran solo las filas
+  que ningún otro seguimiento justifica (``unfollow``).
+- Al quitar tags a un post se saca de los timelines de quien ya no lo sigue
+  por ningún lado (``prune_post``).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import follows, jobs
+from .models import Post, Subscription, TimelineEntry
+
+BACKFILL_LIMIT = 200    # posts que se cargan al reconstruir el timeline de un usuario (tope del historial)
+PULL_INTERVAL = 30      # s entre dos pulls del mismo lector (como mucho un retraso así)
+INSERT_BATCH = 1000
+HEAVY_CACHE_KEY = "timeline:heavy"
+HEAVY_CACHE_TIMEOUT = 600
+
+
+def fanout_limit():
+    return getattr(settings, "TIMELINE_FANOUT_LIMIT", 5000)
+
+
+def _pull_key(user_id):
+    return f"timeline:pulled:{user_id}"
+
+
+# --------- Autores/tags "pesados" ----------
+def heavy_targets():
+    """(author_ids, tag_ids) con demasiados seguidores para el fan-out. Cacheado."""
+    def compute():
+        limit = fanout_limit()
+        authors = (
+            Subscription.objects.filter(author__isnull=False)
+            .values("author_id").annotate(n=Count("id")).filter(n__gt=limit)
+            .values_list("author_id", flat=True)
+        )
+        tags = (
+            Subscription.objects.filter(tag__isnull=False)
+            .values("tag_id").annotate(n=Count("id")).filter(n__gt=limit)
+            .values_list("tag_id", flat=True)
+        )
+        return set(authors), set(tags)
+    return cache.get_or_set(HEAVY_CACHE_KEY, compute, HEAVY_CACHE_TIMEOUT)
+
+
+# --------- Escritura ----------
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=INSERT_BATCH, ignore_conflicts=True)
+
+
+def followers_of(post, heavy=None):
+    """Usuarios que deben recibir ``post`` por fan-out (sin autores/tags pesados)."""
+    heavy_authors, heavy_tags = heavy or heavy_targets()
+    q = Q()
+    if post.author_id not in heavy_authors:
+        q |= Q(author_id=post.author_id)
+    tag_ids = [t for t in post.tags.values_list("id", flat=True) if t not in heavy_tags]
+    if tag_ids:
+        q |= Q(tag_id__in=tag_ids)
+    if not q:
+        return set()
+    return set(Subscription.objects.filter(q).values_list("user_id", flat=True))
+
+
+@jobs.handler("timeline.fanout")
+def fanout(post_id):
+    """Reparte un post publicado a sus seguidores. Idempotente."""
+    post = Post.objects.filter(pk=post_id, status="published").first()
+    if post is None:
+        remove_post(post_id)
+        return 0
+    users = followers_of(post)
+    _insert([TimelineEntry(user_id=uid, post_id=post.id, created=post.created) for uid in users])
+    return len(users)
+
+
+def remove_post(post_id):
+    """Saca un post de todos los timelines (se despublicó)."""
+    TimelineEntry.objects.filter(post_id=post_id).delete()
+
+
+@jobs.handler("timeline.prune_post")
+def prune_post(post_id):
+    """Tras quitar tags: saca el post de quien ya no sigue ni al autor ni a sus tags."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or post.status != "published":
+        remove_post(post_id)
+        return 0
+    # Incluye autores/tags pesados: sus filas (del pull) también se podan
+    still_following = Subscription.objects.filter(
+        Q(author_id=post.author_id) | Q(tag_id__in=post.tags.values("id"))
+    ).values("user_id")
+    deleted, _ = (
+        TimelineEntry.objects.filter(post_id=post_id).exclude(user_id__in=still_following).delete()
+    )
+    return deleted
+
+
+def _candidate_rows(authors, tags, limit, updated_since=None):
+    """(id, created) de los posts publicados de esos autores/tags, más nuevos primero."""
+    if not authors and not tags:
+        return []
+    qs = Post.objects.filter(status="published").filter(
+        Q(author_id__in=authors) | Q(tags__id__in=tags)
+    )
+    if updated_since is not None:
+        qs = qs.filter(updated__gte=updated_since)
+    return list(qs.distinct().order_by("-created", "-id").values_list("id", "created")[:limit])
+
+
+def rebuild_user(user_id, limit=BACKFILL_LIMIT):
+    """
+    Recalcula desde cero el timeline de un usuario con sus últimos ``limit``
+    posts. Los más antiguos se pierden de mi-feed (tope deliberado: seguir a
+    alguien no copia todo su historial).
+    """
+    # Directo de la tabla (no de la caché): la reconstrucción es la fuente de verdad
+    followed = follows.compute(user_id)
+    rows = _candidate_rows(followed.authors, followed.tags, limit)
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        _insert([TimelineEntry(user_id=user_id, post_id=pid, created=created) for pid, created in rows])
+    cache.delete(_pull_key(user_id))
+    return len(rows)
+
+
+@jobs.handler("timeline.rebuild_user")
+def rebuild_user_job(user_id):
+    return rebuild_user(user_id)
+
+
+def _target_posts(author_id=None, tag_id=None):
+    if author_id is not None:
+        return Post.objects.filter(author_id=author_id)
+    return Post.objects.filter(tags__id=tag_id)
+
+
+@jobs.handler("timeline.follow")
+def follow(user_id, author_id=None, tag_id=None, limit=BACKFILL_LIMIT):
+    """Tras seguir a un autor o tag: sus últimos ``limit`` posts entran en el timeline."""
+    subs = Subscription.objects.filter(user_id=user_id)
+    subs = subs.filter(author_id=author_id) if author_id is not None else subs.filter(tag_id=tag_id)
+    if not subs.exists():
+        return 0    # lo dejó de seguir antes de que corriera el trabajo
+    rows = (
+        _target_posts(author_id, tag_id).filter(status="published")
+        .distinct().order_by("-created", "-id").values_list("id", "created")[:limit]
+    )
+    _insert([TimelineEntry(user_id=user_id, post_id=pid, created=created) for pid, created in rows])
+    return len(rows)
+
+
+@jobs.handler("timeline.unfollow")
+def unfollow(user_id, author_id=None, tag_id=None):
+    """Tras dejar de seguir: saca los posts de ese autor o tag que no llegan por otro seguimiento."""
+    followed = follows.compute(user_id)
+    still_followed = Post.objects.filter(
+        Q(author_id__in=followed.authors) | Q(tags__id__in=followed.tags)
+    ).values("id")
+    deleted, _ = (
+        TimelineEntry.objects.filter(user_id=user_id, post_id__in=_target_posts(author_id, tag_id).values("id"))
+        .exclude(post_id__in=still_followed)
+        .delete()
+    )
+    return deleted
+
+
+# --------- Lectura ----------
+def pull_heavy(user_id):
+    """
+    Fallback pull: trae al timeline del lector los posts nuevos de los autores
+    y tags pesados que sigue. Sin autores/tags pesados no hace ninguna consulta;
+    con ellos, como mucho un pull cada ``PULL_INTERVAL`` segundos por lector.
+    """
+    heavy_authors, heavy_tags = heavy_targets()
+    if not heavy_authors and not heavy_tags:
+        return 0
+    followed = follows.load(user_id)
+    authors = followed.authors & heavy_authors
+    tags = followed.tags & heavy_tags
+    if not authors and not tags:
+        return 0
+
+    now = timezone.now()
+    last_pull = cache.get(_pull_key(user_id))
+    if last_pull is not None and (now - last_pull).total_seconds() < PULL_INTERVAL:
+        return 0
+    # `updated` cubre también los borradores que se publican más tarde
+    rows = _candidate_rows(authors, tags, BACKFILL_LIMIT, updated_since=last_pull)
+    if rows:
+        _insert([TimelineEntry(user_id=user_id, post_id=pid, created=created) for pid, created in rows])
+    cache.set(_pull_key(user_id), now, None)
+    return len(rows)
+
+
+def feed_queryset(user):
+    return (
+        TimelineEntry.objects.filter(user=user, post__status="published")
+        .select_related("post__author", "post__stats")
+        .prefetch_related("post__tags")
+    )
@@ -3,8 +3,9 @@ from django.contrib.auth import views as auth_views
 from . import views_subscriptions
 from . import views_subscriptions as subs
 from . import views
-from .views import ReactionView
+from .api_views import ReactionView
 from .feeds import AuthorFeed, TagFeed 
+from .replica import use_replica
 
 app_name = "blog"
 
@@ -64,8 +65,9 @@ urlpatterns = [
     path("review/<int:review_id>/unpin/", views.unpin_review, name="unpin_review"),
 
     # --------- Feeds ----------
-    path("feeds/author/<str:username>/", AuthorFeed(), name="author_feed"),
-    path("feeds/tag/<slug:slug>/", TagFeed(), name="tag_feed"),
+    # Solo lectura: réplica si está al día (blog/replica.py)
+    path("feeds/author/<str:username>/", use_replica(AuthorFeed()), name="author_feed"),
+    path("feeds/tag/<slug:slug>/", use_replica(TagFeed()), name="tag_feed"),
 
     # --------- Suscripciones (toggle) ----------
     path("subscribe/author/<str:username>/", subs.subscribe_author, name="subscribe_author"),
@@ -87,6 +89,9 @@ urlpatterns = [
     path("post/<int:post_id>/toggle-visibility/", views.toggle_visibility, name="toggle_visibility"),
 
 
+    # --------- Instrumentación de consultas (staff) ----------
+    path("instrumentacion/", views.query_report, name="query_report"),
+
     # --------- Perfil ajeno (siempre al final porque captura todo) ----------
     path("perfil/<str:username>/", views.profile_detail, name="profile_detail"),
 
@@ -27,14 +27,15 @@ from .models import Post, Reaction, REACTION_CHOICES
 from django.db.models import Count
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.contrib.auth.decorators import login_required
-from .serializers import ReactionSerializer
 from .models import CommentVote
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
 import logging
-from .api_views import ReactionView
+from . import notifications, reactions, search, stats, writes
+from .threads import load_comment_thread, load_reviews
+from .pagination import KeysetPaginationMixin, paginate_keyset
+from .replica import use_replica
+from .page_cache import cache_anonymous_page, list_scopes, post_detail_scopes
+from django.utils.decorators import method_decorator
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.views.decorators.http import require_POST
@@ -82,11 +83,12 @@ def my_drafts(request):
 @login_required
 def mark_all_notifications_read(request):
     if request.method == "POST":
-        request.user.notifications.filter(is_read=False).update(is_read=True)
+        writes.mark_all_notifications_read(request.user)
         return JsonResponse({"status": "ok"})
     return JsonResponse({"status": "error"}, status=400)
 
 # --------- Perfil ----------
+@use_replica
 def profile_detail(request, username=None):
     if username:
         profile_user = get_object_or_404(User, username=username)
@@ -95,12 +97,18 @@ def profile_detail(request, username=None):
             return redirect("blog:login")
         profile_user = request.user
 
-    # 🔹 Traer posts de este usuario (solo publicados)
-    user_posts = Post.objects.filter(author=profile_user, status="published").order_by("-created")
+    # 🔹 Traer posts de este usuario (solo publicados), paginados por cursor
+    user_posts = paginate_keyset(
+        request,
+        Post.objects.filter(author=profile_user, status="published"),
+        per_page=10,
+    )
 
     return render(request, "profile/detail.html", {
         "profile_user": profile_user,
         "user_posts": user_posts,   # 👈 aquí mandamos los posts
+        "page_obj": user_posts,
+        "is_paginated": user_posts.has_other_pages(),
     })
 
 
@@ -134,19 +142,11 @@ def vote_review(request, pk, action):
         messages.error(request, "Acción inválida.")
         return redirect(review.post.get_absolute_url())
 
-    vote, created = ReviewVote.objects.get_or_create(
-        review=review, user=request.user,
-        defaults={'vote': action}
-    )
-
-    if not created:
-        if vote.vote == action:
-            vote.delete()
-            messages.info(request, f"Quitaste tu {action}.")
-        else:
-            vote.vote = action
-            vote.save()
-            messages.success(request, f"Cambiaste a {action}.")
+    outcome = writes.toggle_review_vote(review, request.user, action)
+    if outcome == "removed":
+        messages.info(request, f"Quitaste tu {action}.")
+    elif outcome == "changed":
+        messages.success(request, f"Cambiaste a {action}.")
     else:
         messages.success(request, f"¡Gracias por tu {action}!")
 
@@ -196,127 +196,88 @@ def unpin_review(request, review_id):
 # --------- Listado / Búsqueda / Paginación ----------
 from django.db.models import Count, Q
 
-class PostListView(ListView):
+@method_decorator(cache_anonymous_page(list_scopes), name="dispatch")
+@method_decorator(use_replica, name="dispatch")   # lectura pesada: réplica (blog/replica.py)
+class PostListView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = 'post_list.html'
     context_object_name = 'posts'
     paginate_by = 10
+    keyset_estimate_total = True
+
+    def use_keyset_pagination(self):
+        # La búsqueda se ordena por relevancia (BM25), no por fecha:
+        # ahí se mantiene la paginación numerada.
+        return not self.request.GET.get('q')
 
     def get_queryset(self):
         qs = Post.objects.filter(status="published", is_visible=True)
         q = self.request.GET.get('q')
         tag = self.kwargs.get('tag_slug')
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
         if tag:
             qs = qs.filter(tags__slug=tag)
-        return qs.select_related('author').prefetch_related('tags')
+        if q:
+            # 🔎 FTS5 con ranking BM25 (ver blog/search.py)
+            qs = search.search_posts(qs, q)
+        # 'stats' trae el promedio sin agregados por tarjeta
+        return qs.select_related('author', 'stats').prefetch_related('tags')
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         # posts puede estar en ctx['posts'] (context_object_name) o en ctx['object_list']
         posts = ctx.get(self.context_object_name) or ctx.get('object_list') or []
-        # si está paginado, posts es la lista de objetos de la página; construimos ids
-        post_ids = [p.id for p in posts]
-
-        if post_ids:
-            qs = (
-                Reaction.objects
-                .filter(post_id__in=post_ids)
-                .values('post_id', 'type')
-                .annotate(count=Count('id'))
-            )
-            counts_map = {}
-            for r in qs:
-                pid = r['post_id']
-                counts_map.setdefault(pid, {})[r['type']] = r['count']
-        else:
-            counts_map = {}
 
-        # Adjuntar reaction_counts (diccionario) a cada post
+        # Adjuntar reacciones a cada post desde ReactionCounter (una consulta por página)
+        counts = stats.reaction_counts_for([p.id for p in posts])
         for p in posts:
-            p.reaction_counts = counts_map.get(p.id, {})
-
+            p.reaction_counts = counts[p.id]
+            p.reaction_badges = [
+                (key, emoji, counts[p.id][key]) for key, emoji in REACTION_CHOICES if counts[p.id][key]
+            ]
+            # Fragmento resaltado cuando viene de una búsqueda
+            p.search_excerpt = search.highlight(getattr(p, 'search_snippet', ''))
+
+        ctx['q'] = self.request.GET.get('q', '')
         return ctx
 
-from .models import Subscription  # importa tu modelo de suscripciones
-
+@method_decorator(cache_anonymous_page(post_detail_scopes), name="dispatch")
 class PostDetailView(DetailView):
     model = Post
     template_name = "post_detail.html"
     slug_field = "slug"
     slug_url_kwarg = "slug"
 
+    def get_queryset(self):
+        return Post.objects.select_related("author", "stats")
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         post = self.object
         user = self.request.user
 
-        # 🔹 Reseñas
-        if user.is_authenticated and (user == post.author or user.is_staff):
-            ctx["reviews"] = post.reviews.filter(parent__isnull=True)
-            ctx["is_owner"] = True
-        else:
-            ctx["reviews"] = post.reviews.filter(parent__isnull=True, status="visible")
-            ctx["is_owner"] = False
+        # 🔹 Contadores de reacciones (ReactionCounter)
+        post.reaction_counts = stats.reaction_counts(post.id)
+        ctx["reaction_counts"] = post.reaction_counts
 
-        # 🔹 Comentarios
-        if user.is_authenticated and (user == post.author or user.is_staff):
-            ctx["comments"] = post.comments.filter(parent__isnull=True)
-        else:
-            ctx["comments"] = post.comments.filter(parent__isnull=True, status="visible")
+        can_moderate = user.is_authenticated and (user == post.author or user.is_staff)
+        ctx["is_owner"] = can_moderate
+
+        # 🔹 Reseñas: plan de prefetch con consultas acotadas (ver blog/threads.py)
+        ctx["reviews"] = load_reviews(post, include_hidden=can_moderate)
+
+        # 🔹 Comentarios: hilo completo (comentarios + votos)
+        ctx["comments"] = load_comment_thread(post, include_hidden=can_moderate)
 
         # 🔹 Formularios
         ctx["review_form"] = ReviewForm()
 
-        # 🔹 Suscripciones
-        if user.is_authenticated:
-            ctx["author_subscribed"] = Subscription.objects.filter(
-                user=user, author=post.author
-            ).exists()
-            tag_slugs = post.tags.values_list("slug", flat=True)
-            subs = Subscription.objects.filter(user=user, tag__slug__in=tag_slugs)
-            ctx["subscribed_tag_slugs"] = set(subs.values_list("tag__slug", flat=True))
-        else:
-            ctx["author_subscribed"] = False
-            ctx["subscribed_tag_slugs"] = set()
-
-        # ✅ Extras necesarios para navbar y notificaciones
-        ctx["all_tags"] = Tag.objects.all()
-        if user.is_authenticated:
-            ctx["unread_count"] = user.notifications.filter(is_read=False).count()
-            ctx["notifications"] = user.notifications.all().order_by("-created_at")[:8]
-        else:
-            ctx["unread_count"] = 0
-            ctx["notifications"] = []
+        # Navbar, campanita y suscripciones (``follows``): los ponen los context
+        # processors (perezosos y cacheados)
 
         return ctx
 
 
 
-def procesar_menciones(comentario, actor, post):
-    """Detecta @username en el texto del comentario y crea notificaciones (si no está bloqueado)."""
-    patron = r'@(\w+)'  # Busca palabras después de @
-    usernames = re.findall(patron, comentario.text)
-
-    for uname in usernames:
-        try:
-            mencionado = User.objects.get(username=uname)
-            if mencionado != actor:  # no notificarse a sí mismo
-                # ⚡ Evitar si el usuario bloqueó al actor
-                if not NotificationBlock.objects.filter(blocker=mencionado, blocked_user=actor).exists():
-                    Notification.objects.create(
-                        user=mencionado,
-                        actor=actor,
-                        verb="te mencionó en un comentario",
-                        target_post=post,
-                        target_comment=comentario
-                    )
-        except User.DoesNotExist:
-            continue  # ignorar usuarios inexistentes
-
-
-
 # --------- Añadir reseña ----------
 @login_required
 def add_review(request, slug):
@@ -331,44 +292,15 @@ def add_review(request, slug):
         if parent_id:
             parent = Review.objects.filter(id=parent_id, post=post).first()
             if parent:
-                reply = Review.objects.create(
-                    post=post,
-                    user=request.user,
-                    parent=parent,
-                    comment=comment,
-                    status="visible"   # ✅ directo visible
-                )
-                # Notificación al autor original
-                if parent.user != request.user:
-                    Notification.objects.create(
-                        user=parent.user,
-                        actor=request.user,
-                        verb="respondió a tu reseña",
-                        target_post=post,
-                        target_review=parent   # ✅ mejor referencia a la reseña padre
-                    )
+                # ✅ directo visible; avisa al autor original (ver blog/writes.py)
+                writes.create_review(post, request.user, comment, parent=parent)
                 messages.success(request, "Respuesta publicada.")
             return redirect(post.get_absolute_url())
 
         # Caso: reseña principal
         if rating:
-            review = Review.objects.create(   # ✅ guardamos en variable
-                post=post,
-                user=request.user,
-                rating=rating,
-                comment=comment,
-                status="visible"   # ✅ directo visible
-            )
-            # ⚡ Notificar al autor del post si no es el mismo
-            if post.author != request.user:
-                if not NotificationBlock.objects.filter(blocker=post.author, blocked_user=request.user).exists():
-                    Notification.objects.create(
-                        user=post.author,
-                        actor=request.user,
-                        verb="dejó una reseña en tu publicación",
-                        target_post=post,
-                        target_review=review
-                    )
+            # ✅ directo visible; ⚡ notifica al autor del post
+            writes.create_review(post, request.user, comment, rating=rating)
             messages.success(request, "¡Tu reseña fue publicada!")
         else:
             messages.error(request, "Debes dar una calificación para publicar una reseña.")
@@ -405,11 +337,22 @@ def post_detail(request, slug):
 
 
 
+@cache_anonymous_page(list_scopes)
+@use_replica
 def post_by_platform(request, platform_slug):
-    posts = Post.objects.filter(platform=platform_slug)
+    posts = paginate_keyset(
+        request,
+        Post.objects.filter(platform=platform_slug)
+        .select_related("author", "stats")
+        .prefetch_related("tags"),
+        per_page=10,
+        estimate_total=True,
+    )
     return render(request, "post_list.html", {
         "posts": posts,
         "platform": platform_slug,
+        "page_obj": posts,
+        "is_paginated": posts.has_other_pages(),
     })
 
 
@@ -432,39 +375,8 @@ def add_comment(request, slug):
             if parent_id:
                 parent = Comment.objects.filter(id=parent_id).first()
 
-            comentario = Comment.objects.create(
-                post=post,
-                author=request.user,
-                text=text,
-                parent=parent,   # ✅ guardamos el padre si existe
-                status="visible"  # ✅ directo visible
-            )
-
-            # ⚡ Notificar al autor del comentario padre (si no bloqueó al actor)
-            if parent and parent.author and parent.author != request.user:
-                if not NotificationBlock.objects.filter(blocker=parent.author, blocked_user=request.user).exists():
-                    Notification.objects.create(
-                        user=parent.author,
-                        actor=request.user,
-                        verb="respondió a tu comentario",
-                        target_post=post,
-                        target_comment=comentario
-                    )
-
-            # ⚡ Notificar al autor del post principal (si no es el mismo que comenta)
-            if post.author != request.user:
-                if not NotificationBlock.objects.filter(blocker=post.author, blocked_user=request.user).exists():
-                    Notification.objects.create(
-                        user=post.author,
-                        actor=request.user,
-                        verb="comentó en tu publicación",
-                        target_post=post,
-                        target_comment=comentario
-                    )
-
-            # ✅ Procesar menciones con @usuario
-            procesar_menciones(comentario, request.user, post)
-
+            # ✅ directo visible, con @menciones y notificaciones (ver blog/writes.py)
+            writes.create_comment(post, request.user, text, parent=parent)
             messages.success(request, "Comentario publicado.")
 
     return redirect(post.get_absolute_url())
@@ -472,8 +384,17 @@ def add_comment(request, slug):
 
 @login_required
 def notification_list(request):
-    notifications = request.user.notifications.all().order_by("-created_at")
-    return render(request, "notifications/list.html", {"notifications": notifications})
+    # 🔔 Bandeja paginada por cursor; ?unread=1 muestra solo las no leídas
+    unread_only = request.GET.get("unread") == "1"
+    qs = notifications.inbox_queryset(request.user, unread_only=unread_only)
+    page_obj = paginate_keyset(request, qs, 20, ordering=("-created_at", "-id"))
+    notifications.hydrate(page_obj.object_list)
+    return render(request, "notifications/list.html", {
+        "notifications": page_obj.object_list,
+        "page_obj": page_obj,
+        "is_paginated": page_obj.has_other_pages(),
+        "unread_only": unread_only,
+    })
 
 
 
@@ -482,8 +403,8 @@ def notification_list(request):
 def notification_mark_read(request, pk):
     n = get_object_or_404(Notification, pk=pk, user=request.user)
     n.is_read = True
-    n.save()
-    return redirect("notification_list")
+    n.save(update_fields=["is_read"])
+    return redirect("blog:notification_list")
 
 
 
@@ -503,14 +424,14 @@ def notification_disable_user(request, user_id):
     actor = get_object_or_404(User, pk=user_id)
     NotificationBlock.objects.get_or_create(blocker=request.user, blocked_user=actor)
     messages.info(request, f"Has desactivado las notificaciones de {actor.username}.")
-    return redirect("notification_list")
+    return redirect("blog:notification_list")
 
 @login_required
 def notification_enable_user(request, user_id):
     actor = get_object_or_404(User, pk=user_id)
     NotificationBlock.objects.filter(blocker=request.user, blocked_user=actor).delete()
     messages.success(request, f"Has activado nuevamente las notificaciones de {actor.username}.")
-    return redirect("notification_list")
+    return redirect("blog:notification_list")
 
 
 
@@ -583,7 +504,9 @@ def moderate_review(request, pk, action):
             block.delete()
             messages.success(request, f"Usuario {review.user.username} desbloqueado en este post.")
     elif action == "delete":
-        review.delete()
+        with transaction.atomic():
+            review.delete()   # borra también sus respuestas (CASCADE)
+            stats.rebuild_post(review.post_id)
         messages.error(request, "Reseña eliminada.")
     else:
         return HttpResponseForbidden("Acción no válida")
@@ -602,21 +525,29 @@ def moderate_comment(request, pk, action):
     if request.user != comment.post.author:
         return HttpResponseForbidden("No autorizado")
 
+    old_status = comment.status
+
     # ❌ Quitamos "approve"
     if action == "hide":
-        comment.status = "hidden"
-        comment.save()
+        with transaction.atomic():
+            comment.status = "hidden"
+            comment.save()
+            stats.comment_status_changed(comment, old_status)
     elif action == "block":
-        block, created = PostBlock.objects.get_or_create(
-            post=comment.post,
-            user=comment.author
-        )
-        if not created:
-            block.delete()
-        comment.status = "blocked"
-        comment.save()
+        with transaction.atomic():
+            block, created = PostBlock.objects.get_or_create(
+                post=comment.post,
+                user=comment.author
+            )
+            if not created:
+                block.delete()
+            comment.status = "blocked"
+            comment.save()
+            stats.comment_status_changed(comment, old_status)
     elif action == "delete":
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()   # borra también sus respuestas (CASCADE)
+            stats.refresh_comments(comment.post_id)
     else:
         return HttpResponseForbidden("Acción no válida")
 
@@ -634,252 +565,32 @@ def vote_comment(request, pk, vote_type):
 
     value = 1 if vote_type == "up" else -1
 
-    vote, created = CommentVote.objects.get_or_create(user=request.user, comment=comment)
-    if not created and vote.value == value:
-        vote.delete()  # quitar voto si repite
-    else:
-        vote.value = value
-        vote.save()
+    writes.toggle_comment_vote(comment, request.user, value)  # repetir el voto lo quita
 
     return redirect(comment.post.get_absolute_url())
 
 # --------- Reacciones (emojis) ----------
-from .models import Reaction
-@login_required
-def toggle_reaction(request, post_id):
-    post = Post.objects.get(id=post_id)
-    reaction_type = request.POST.get("reaction")
-
-    existing = Reaction.objects.filter(user=request.user, post=post).first()
-
-    if existing:
-        if existing.type == reaction_type:
-            # si el user repite la misma → se elimina
-            existing.delete()
-        else:
-            # si cambia → se actualiza
-            existing.type = reaction_type
-            existing.save()
-    else:
-        # nueva reacción
-        Reaction.objects.create(user=request.user, post=post, type=reaction_type)
-
-    # devolver conteo actualizado
-    counts = {r[0]: post.reactions.filter(type=r[0]).count() for r in dict(Reaction._meta.get_field("type").choices)}
-
-    return JsonResponse({"success": True, "counts": counts})
-# --------- Endpoint AJAX para reacciones ----------
-from .models import Reaction
-from django.utils import timezone
-from django.db.models import Count
-
-@require_POST
-@login_required
-def react_api(request):
-    """
-    Recibe JSON { post, type, rating? }.
-    - Crea/actualiza Reaction (post,user)
-    - Crea/actualiza Review automático (post,user) con texto 'Reacción automática: {type}'
-    - Devuelve counts y review_html + review_id
-    NO crea ni devuelve comentarios (para evitar que aparezcan en la sección Comentarios).
-    """
-    # parse JSON
-    try:
-        data = json.loads(request.body.decode('utf-8'))
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        return HttpResponseBadRequest("Invalid JSON")
-
-    post_id = data.get('post')
-    rtype = data.get('type')
-    rating = data.get('rating', 5)
-
-    if not post_id or not rtype:
-        return HttpResponseBadRequest("Missing 'post' or 'type'")
-
-    # validar tipo de reacción (ajusta REACTION_CHOICES si se llama distinto)
-    valid_types = set(dict(REACTION_CHOICES).keys())
-    if rtype not in valid_types:
-        return HttpResponseBadRequest("Invalid reaction type")
-
-    # obtener post
-    try:
-        post = Post.objects.get(pk=post_id)
-    except Post.DoesNotExist:
-        return HttpResponseBadRequest("Post not found")
-
-    # crear/actualizar Reaction
-    try:
-        with transaction.atomic():
-            reaction, created = Reaction.objects.update_or_create(
-                post=post,
-                user=request.user,
-                defaults={'type': rtype}
-            )
-    except Reaction.MultipleObjectsReturned:
-        qs = Reaction.objects.filter(post=post, user=request.user).order_by('id')
-        reaction = qs.first()
-        qs.exclude(id=reaction.id).delete()
-        reaction.type = rtype
-        reaction.save()
-        created = False
-
-    # crear/actualizar Review automático (asegurando que solo exista 1)
-    try:
-        with transaction.atomic():
-            rev_qs = Review.objects.filter(post=post, user=request.user).order_by('id')
-            if rev_qs.exists():
-                review = rev_qs.first()
-                # actualizar solo si es una reseña automática o está vacía
-                if (not review.comment) or review.comment.startswith('Reacción automática:'):
-                    review.comment = f'Reacción automática: {rtype}'
-                    review.rating = rating
-                    review.save(update_fields=['comment', 'rating'])
-            else:
-                review = Review.objects.create(
-                    post=post,
-                    user=request.user,
-                    comment=f'Reacción automática: {rtype}',
-                    rating=rating,
-                    created=timezone.now(),
-                    status='visible'
-                )
-    except Review.MultipleObjectsReturned:
-        qs = Review.objects.filter(post=post, user=request.user).order_by('id')
-        review = qs.first()
-        qs.exclude(id=review.id).delete()
-        if (not review.comment) or review.comment.startswith('Reacción automática:'):
-            review.comment = f'Reacción automática: {rtype}'
-            review.rating = rating
-            review.save(update_fields=['comment', 'rating'])
-
-    # recompute reaction counts por tipo
-    qs_counts = Reaction.objects.filter(post=post).values('type').annotate(count=Count('id'))
-    counts = {r['type']: r['count'] for r in qs_counts}
-    for t in valid_types:
-        counts.setdefault(t, 0)
-
-    # renderizar HTML parcial de review (usa tu partial que refleje la UI de reseñas)
-    # Asegúrate de tener templates/blog/partials/review_item.html
-    review_html = render_to_string('blog/partials/review_item.html', {'r': review, 'user': request.user})
-
-    return JsonResponse({
-        'status': 'ok',
-        'counts': counts,
-        'review_html': review_html,
-        'review_id': review.id,
-        "counts": counts,
-    })
-
-def _find_auto_comment_qs(post, user):
-    """
-    Devuelve un queryset de comentarios que parecen ser comentarios automáticos
-    de reacción para este (post, user). No lanzamos si el campo no existe.
-    """
-    qs_list = []
-    try:
-        qs_list.append(Comment.objects.filter(post=post, author=user))
-    except Exception:
-        pass
-    try:
-        qs_list.append(Comment.objects.filter(post=post, user=user))
-    except Exception:
-        pass
-
-    # Filtrar por texto indicativo de "reacción automática"
-    combined_q = None
-    for qs in qs_list:
-        try:
-            q = qs.filter(Q(text__startswith='Reacción automática:') | Q(text__icontains='reaccionó con'))
-            if combined_q is None:
-                combined_q = q
-            else:
-                combined_q = combined_q | q
-        except Exception:
-            # tal vez el campo se llama 'content' o 'text' no existe
-            try:
-                q2 = qs.filter(Q(content__startswith='Reacción automática:') | Q(content__icontains='reaccionó con'))
-                if combined_q is None:
-                    combined_q = q2
-                else:
-                    combined_q = combined_q | q2
-            except Exception:
-                pass
-
-    return combined_q if combined_q is not None else Comment.objects.none()
-
-
-def _upsert_reaction_comment(post, user, text):
-    """
-    Crea o actualiza un comment marcado como 'is_reaction' para (post,user).
-    Devuelve la instancia Comment.
-    NOTA: ajusta campos (author/text/status) según tu modelo si se llaman distinto.
-    """
-    qs = Comment.objects.filter(post=post, author=user, is_reaction=True)
-    if qs.exists():
-        comment = qs.first()
-        comment.text = text
-        comment.status = "visible"
-        comment.is_reaction = True
-        comment.created = comment.created or timezone.now()
-        comment.save(update_fields=['text', 'status', 'is_reaction'])
-        return comment
-    # crear nuevo
-    return Comment.objects.create(
-        post=post,
-        author=user,
-        text=text,
-        status="visible",
-        is_reaction=True,
-        created=timezone.now()
-    )
-
-
-def _delete_reaction_comment(post, user):
-    """Elimina comment automático si existe (usa si implementas toggle off)."""
-    Comment.objects.filter(post=post, author=user, is_reaction=True).delete()
-
-# ---------- toggle_reaction (actualiza para borrar comentario si la reacción se elimina) ----------
+# Toda la escritura pasa por blog/reactions.py (ver también api_views.ReactionView)
 @login_required
 def toggle_reaction(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     reaction_type = request.POST.get("reaction")
+    if not reactions.is_valid_type(reaction_type):
+        return HttpResponseBadRequest("Invalid reaction type")
 
-    existing = Reaction.objects.filter(user=request.user, post=post).first()
-
-    if existing:
-        if existing.type == reaction_type:
-            # Repite la misma → se elimina la reacción y el comentario automático
-            existing.delete()
-            _delete_reaction_comment(post, request.user)
-        else:
-            # Cambia → actualizamos reacción + comentario automático
-            existing.type = reaction_type
-            existing.save()
-            _upsert_reaction_comment(post, request.user, f"Reacción automática: {reaction_type}")
-    else:
-        # Nueva → crear reacción + comentario automático
-        Reaction.objects.create(user=request.user, post=post, type=reaction_type)
-        _upsert_reaction_comment(post, request.user, f"Reacción automática: {reaction_type}")
-
-    # devolver conteos
-    valid_types = set(dict(REACTION_CHOICES).keys())
-    counts = {r[0]: post.reactions.filter(type=r[0]).count()
-              for r in dict(Reaction._meta.get_field("type").choices)}
-    return JsonResponse({"success": True, "counts": counts})
-
+    # Repetir la misma reacción la quita (y su comentario automático)
+    result = reactions.react(post, request.user, reaction_type, toggle=True)
+    return JsonResponse({"success": True, "counts": result.counts})
 
 
 # ---------- react_api (función AJAX) ----------
+@require_POST
 @login_required
 def react_api(request):
     """
-    Endpoint AJAX que crea/actualiza la reacción del usuario a un post,
-    y crea/actualiza un comentario automático (en lugar de crear duplicados).
+    Endpoint AJAX: recibe JSON { post, type } y deja esa reacción del usuario
+    (con su comentario automático). Devuelve los conteos por tipo.
     """
-    if not request.user.is_authenticated:
-        return JsonResponse({'error': 'authentication required'}, status=403)
-
-    # parsear JSON
     try:
         data = json.loads(request.body.decode('utf-8'))
     except (json.JSONDecodeError, UnicodeDecodeError):
@@ -887,86 +598,23 @@ def react_api(request):
 
     post_id = data.get('post')
     rtype = data.get('type')
-    rating = data.get('rating', 5)
-
     if not post_id or not rtype:
         return HttpResponseBadRequest("Missing 'post' or 'type'")
-
-    valid_types = set(dict(REACTION_CHOICES).keys())
-    if rtype not in valid_types:
+    if not reactions.is_valid_type(rtype):
         return HttpResponseBadRequest("Invalid reaction type")
 
     try:
         post = Post.objects.get(pk=post_id)
-    except Post.DoesNotExist:
+    except (Post.DoesNotExist, ValueError, TypeError):
         return HttpResponseBadRequest("Post not found")
 
-    # crear o actualizar la reacción (manejo de duplicados ya lo hicimos antes)
-    from django.db import transaction
-    try:
-        with transaction.atomic():
-            reaction, created = Reaction.objects.update_or_create(
-                post=post,
-                user=request.user,
-                defaults={'type': rtype}
-            )
-    except Reaction.MultipleObjectsReturned:
-        qs = Reaction.objects.filter(post=post, user=request.user).order_by('id')
-        reaction = qs.first()
-        qs.exclude(id=reaction.id).delete()
-        reaction.type = rtype
-        reaction.save()
-        created = False
-
-    # Crear o actualizar el comentario automático (no crear duplicados)
-    emoji = dict(REACTION_CHOICES).get(rtype, "👍")
-    review_text = f"{request.user.username} reaccionó {emoji}"
-    comment_text = f"Reacción automática: {emoji}"  # <-- usa el emoji aquí
-    _upsert_reaction_comment(post, request.user, comment_text)
-    
-    # devolver conteos actualizados por tipo
-    qs = Reaction.objects.filter(post=post).values('type').annotate(count=Count('id'))
-    counts = {r['type']: r['count'] for r in qs}
-    for t in valid_types:
-        counts.setdefault(t, 0)
-
+    result = reactions.react(post, request.user, rtype)
     return JsonResponse({
-        'counts': counts,
+        'counts': result.counts,
         'redirect_url': post.get_absolute_url() + "#comments"
     })
 
 
-# ---------- ReactionView (DRF) ----------
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
-
-class ReactionView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request, *args, **kwargs):
-        post_id = request.data.get("post")
-        if not post_id:
-            return Response({"error": "Se requiere el ID del post"}, status=status.HTTP_400_BAD_REQUEST)
-
-        post = get_object_or_404(Post, id=post_id)
-
-        serializer = ReactionSerializer(
-            data=request.data,
-            context={"request": request, "post": post}
-        )
-        serializer.is_valid(raise_exception=True)
-        reaction = serializer.save()
-
-        # 🔹 En vez de comentario → reseña
-        review_text = f"{request.user.username} reaccionó con {reaction.type}"
-        _upsert_reaction_review(post, request.user, review_text)
-
-        return Response(ReactionSerializer(reaction).data, status=status.HTTP_201_CREATED)
-
-    from django.http import JsonResponse, HttpResponseBadRequest
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
 
@@ -980,7 +628,25 @@ def reaction_users(request, post_id, reaction_type):
         return HttpResponseBadRequest("Invalid reaction type")
 
     post = get_object_or_404(Post, id=post_id)
-    reactions = Reaction.objects.filter(post=post, type=reaction_type).select_related("user")
+    # Reaction puede vivir en otra base (blog/routers.py): ids primero, nombres después
+    user_ids = list(Reaction.objects.filter(post=post, type=reaction_type).values_list("user_id", flat=True))
+    names = dict(User.objects.filter(id__in=user_ids).values_list("id", "username"))
+
+    users = [names[uid] for uid in user_ids if uid in names]
+    return JsonResponse({"users": users})
+
+# --------- Instrumentación (staff) ----------
+from django.contrib.admin.views.decorators import staff_member_required
+from . import instrumentation
 
-    users = [r.user.username for r in reactions]
-    return JsonResponse({"users": users})
\ No newline at end of file
+
+@staff_member_required
+def query_report(request):
+    """Consultas, tiempos y repetidas por vista desde que arrancó este proceso."""
+    if request.method == "POST":
+        instrumentation.reset()
+        return redirect("blog:query_report")
+    return render(request, "instrumentation/report.html", {
+        "rows": instrumentation.report(),
+        "enabled": instrumentation.enabled(),
+    })
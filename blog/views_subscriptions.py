@@ -1,13 +1,17 @@
+from contextlib import nullcontext
+
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, get_object_or_404, render
 from django.contrib import messages
 from django.contrib.auth.models import User
 from taggit.models import Tag
-from django.db.models import Q
 from blog.models import Tag
 
+from . import timeline, writes
 from .models import Subscription, Post
+from .pagination import paginate_keyset
+from .replica import pin, primary, use_replica
 
 
 def _next_url(request, default='blog:post_list'):
@@ -36,28 +40,27 @@ def my_subscriptions(request):
 
 
 @login_required
+@use_replica
 def my_personal_feed(request):
     """
     Feed personalizado: posts publicados por autores seguidos o con tags seguidos.
+    Se lee del timeline materializado (blog/timeline.py) por rango de índice.
     """
-    followed_authors = Subscription.objects.filter(
-        user=request.user, author__isnull=False
-    ).values_list("author_id", flat=True)
-
-    followed_tags = Subscription.objects.filter(
-        user=request.user, tag__isnull=False
-    ).values_list("tag_id", flat=True)
-
-    posts = (
-        Post.objects.filter(status="published")
-        .filter(Q(author_id__in=followed_authors) | Q(tags__in=followed_tags))
-        .distinct()
-        .select_related("author")
-        .prefetch_related("tags")
-        .order_by("-created")
-    )
-
-    return render(request, "subscriptions/my_feed.html", {"posts": posts})
+    with primary():
+        # El pull guarda "hasta cuándo" trajo: tiene que ver los posts de ahora mismo
+        pulled = timeline.pull_heavy(request.user.id)
+    # Lo que acaba de traer aún no está en la réplica (y el pull no lo repetirá):
+    # esta página y las siguientes se leen del primario hasta el próximo snapshot
+    with primary() if pulled else nullcontext():
+        page = paginate_keyset(
+            request, timeline.feed_queryset(request.user), per_page=10, ordering=("-created", "-id")
+        )
+        response = render(request, "subscriptions/my_feed.html", {
+            "posts": [entry.post for entry in page.object_list],
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+        })
+    return pin(response) if pulled else response
 
 
 # 🔹 Toggle suscripción a autor
@@ -65,14 +68,11 @@ def my_personal_feed(request):
 @login_required
 def subscribe_author(request, username):
     author = get_object_or_404(User, username=username)
-    sub = Subscription.objects.filter(user=request.user, author=author, tag=None)
 
-    if sub.exists():
-        sub.delete()
-        messages.success(request, f"Has dejado de seguir a {author.username}")
-    else:
-        Subscription.objects.create(user=request.user, author=author)
+    if writes.toggle_subscription(request.user, author=author):
         messages.success(request, f"Ahora sigues a {author.username}")
+    else:
+        messages.success(request, f"Has dejado de seguir a {author.username}")
 
     return redirect(_next_url(request))
 
@@ -82,14 +82,11 @@ def subscribe_author(request, username):
 @login_required
 def subscribe_tag(request, slug):
     tag = get_object_or_404(Tag, slug=slug)
-    sub = Subscription.objects.filter(user=request.user, tag=tag, author=None)
 
-    if sub.exists():
-        sub.delete()
-        messages.success(request, f"Has dejado de seguir el tag #{tag.name}")
-    else:
-        Subscription.objects.create(user=request.user, tag=tag)
+    if writes.toggle_subscription(request.user, tag=tag):
         messages.success(request, f"Ahora sigues el tag #{tag.name}")
+    else:
+        messages.success(request, f"Has dejado de seguir el tag #{tag.name}")
 
     return redirect(_next_url(request))
 
@@ -99,7 +96,7 @@ def subscribe_tag(request, slug):
 def unsubscribe_author(request, username):
     """Quitar de la lista de autores seguidos (Subscription)."""
     author = get_object_or_404(User, username=username)
-    Subscription.objects.filter(user=request.user, author=author).delete()
+    writes.unsubscribe(request.user, author=author)
     messages.success(request, f"Has dejado de seguir a {author.username}")
     return redirect(_next_url(request, "blog:my_subscriptions"))
 
@@ -108,6 +105,6 @@ def unsubscribe_author(request, username):
 def unsubscribe_tag(request, slug):
     """Quitar de la lista de tags seguidos (Subscription)."""
     tag = get_object_or_404(Tag, slug=slug)
-    Subscription.objects.filter(user=request.user, tag=tag).delete()
+    writes.unsubscribe(request.user, tag=tag)
     messages.success(request, f"Has dejado de seguir el tag #{tag.name}")
     return redirect(_next_url(request, "blog:my_subscriptions"))
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Escritor único por proceso para SQLite (opcional, ``SQLITE_WRITER = True``).
+
+Las escrituras cortas de blog/writes.py (y ``reactions.react``) no abren su
+propia transacción: se encolan aquí y un hilo escritor las agrupa en lotes
+de hasta ``SQLITE_WRITER_BATCH`` dentro de una sola transacción (un commit y
+un fsync por lote). Cada operación va en su savepoint: si una falla, solo se
+revierte ella. Si SQLite está bloqueado se repite el lote entero.
+
+``submit()`` devuelve un ``concurrent.futures.Future``; las funciones
+decoradas con ``sqlite.retry_write`` lo esperan, así que las vistas no cambian.
+
+Solo compensa con workers de gunicorn con hilos: gunicorn.conf.py los activa
+cuando SQLITE_WRITER=True. Con workers sync hay una petición por proceso y cada
+lote sería de una escritura.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import sqlite
+
+logger = logging.getLogger(__name__)
+
+RESULT_TIMEOUT = 30      # s que una vista espera a su escritura
+QUEUE_SIZE = 1000        # con la cola llena submit() espera (contrapresión)
+
+_queue = None
+_thread = None
+_lock = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, "SQLITE_WRITER", False)
+
+
+def on_writer_thread():
+    return threading.current_thread() is _thread
+
+
+def _settings():
+    return (
+        getattr(settings, "SQLITE_WRITER_BATCH", 50),
+        getattr(settings, "SQLITE_WRITER_WAIT_MS", 2) / 1000,
+    )
+
+
+def submit(func, *args, **kwargs):
+    """Encola ``func(*args, **kwargs)`` para el hilo escritor. Devuelve un Future."""
+    _ensure_started()
+    future = Future()
+    _queue.put((func, args, kwargs, future))
+    return future
+
+
+def _ensure_started():
+    global _queue, _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _queue = queue.Queue(QUEUE_SIZE)
+            _thread = threading.Thread(target=_loop, name="sqlite-writer", daemon=True)
+            _thread.start()
+
+
+# --------- Hilo escritor ----------
+def _next_batch():
+    """Bloquea hasta la primera operación y junta las que lleguen en la ventana."""
+    max_batch, wait = _settings()
+    batch = [_queue.get()]
+    while len(batch) < max_batch:
+        try:
+            batch.append(_queue.get(timeout=wait))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run_batch(batch):
+    """Una transacción para todo el lote. Devuelve [(resultado, excepción)]."""
+    outcomes = []
+    with transaction.atomic():
+        for func, args, kwargs, _ in batch:
+            try:
+                with transaction.atomic():   # savepoint: un fallo no tumba el lote
+                    outcomes.append((func(*args, **kwargs), None))
+            except Exception as exc:
+                if isinstance(exc, sqlite.LOCK_ERRORS) and sqlite.is_locked(exc):
+                    raise   # bloqueo: se reintenta el lote completo
+                outcomes.append((None, exc))
+    return outcomes
+
+
+def _loop():
+    while True:
+        batch = _next_batch()
+        close_old_connections()   # respeta CONN_MAX_AGE, como entre requests
+        try:
+            outcomes = sqlite.call_with_retry(_run_batch, batch)
+        except Exception as exc:
+            logger.exception("Lote de %s escrituras fallido", len(batch))
+            outcomes = [(None, exc)] * len(batch)
+        for (_, _, _, future), (result, exc) in zip(batch, outcomes):
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
@@ -0,0 +1,114 @@
+"""
+Escrituras cortas de las vistas (votos, comentarios, reseñas, suscripciones,
+marcar notificaciones).
+
+Cada función es una transacción completa decorada con ``sqlite.retry_write``:
+si la base está bloqueada se repite entera con espera aleatoria. Votos y
+notificaciones la abren en la base de su modelo (ver blog/routers.py). Las vistas
+solo deciden los mensajes y la respuesta a partir de lo que devuelven.
+"""
+from . import jobs, mentions, notifications, stats
+from .models import Comment, CommentVote, Notification, Review, ReviewVote, Subscription
+from .sqlite import retry_write
+
+
+# --------- Votos ----------
+@retry_write(model=ReviewVote)
+def toggle_review_vote(review, user, action):
+    """Devuelve "added", "removed" o "changed"."""
+    vote, created = ReviewVote.objects.get_or_create(review=review, user=user, defaults={"vote": action})
+    if created:
+        return "added"
+    if vote.vote == action:
+        vote.delete()
+        return "removed"
+    vote.vote = action
+    vote.save(update_fields=["vote"])
+    return "changed"
+
+
+@retry_write(model=CommentVote)
+def toggle_comment_vote(comment, user, value):
+    """Repetir el mismo voto lo quita. Devuelve el valor que queda (0 si ninguno)."""
+    vote, created = CommentVote.objects.get_or_create(user=user, comment=comment)
+    if not created and vote.value == value:
+        vote.delete()
+        return 0
+    vote.value = value
+    vote.save()
+    return value
+
+
+# --------- Comentarios y reseñas ----------
+@retry_write
+def create_comment(post, user, text, parent=None):
+    comment = Comment.objects.create(
+        post=post,
+        author=user,
+        text=text,
+        parent=parent,
+        status="visible",
+        is_reaction=False,  # comentario escrito a mano (no automático)
+        mentions=mentions.resolve(text),  # @usuario → enlaces y notificaciones
+    )
+    stats.comment_created(comment)
+    # ⚡ Autor del padre, autor del post y @menciones: un solo trabajo
+    # (ver blog/notifications.py)
+    jobs.enqueue("notifications.comment_created", comment_id=comment.id)
+    return comment
+
+
+@retry_write
+def create_review(post, user, comment, rating=None, parent=None):
+    review = Review.objects.create(
+        post=post,
+        user=user,
+        parent=parent,
+        rating=rating,
+        comment=comment,
+        status="visible",
+    )
+    stats.review_created(review)
+    # Notificación al autor del post o de la reseña original (la genera el worker)
+    jobs.enqueue("notifications.review_created", review_id=review.id)
+    return review
+
+
+# --------- Notificaciones ----------
+@retry_write(model=Notification)
+def mark_all_notifications_read(user):
+    updated = user.notifications.filter(is_read=False).update(is_read=True)
+    notifications.invalidate(user.id)
+    return updated
+
+
+# --------- Suscripciones ----------
+def _following_changed(user, following, author=None, tag=None):
+    # El FollowSet se invalida por señal; el timeline se ajusta en un trabajo
+    jobs.enqueue(
+        "timeline.follow" if following else "timeline.unfollow",
+        user_id=user.id,
+        author_id=author.id if author is not None else None,
+        tag_id=tag.id if tag is not None else None,
+    )
+
+
+@retry_write
+def toggle_subscription(user, author=None, tag=None):
+    """Sigue o deja de seguir a un autor o tag. Devuelve True si ahora lo sigue."""
+    subs = Subscription.objects.filter(user=user, author=author, tag=tag)
+    following = not subs.exists()
+    if following:
+        Subscription.objects.create(user=user, author=author, tag=tag)
+    else:
+        subs.delete()
+    _following_changed(user, following, author=author, tag=tag)
+    return following
+
+
+@retry_write
+def unsubscribe(user, author=None, tag=None):
+    subs = Subscription.objects.filter(user=user)
+    subs = subs.filter(author=author) if author is not None else subs.filter(tag=tag)
+    subs.delete()
+    _following_changed(user, False, author=author, tag=tag)
@@ -12,5 +12,16 @@ fi
 echo "👉 Recolectando archivos estáticos..."
 python manage.py collectstatic --noinput
 
+# Sin worker los trabajos en cola (notificaciones, derivados de imágenes...) no se
+# ejecutan nunca: se levanta en segundo plano y se reinicia si se cae
+echo "👉 Levantando worker de trabajos (run_jobs)..."
+(
+    while true; do
+        python manage.py run_jobs
+        echo "⚠️ run_jobs terminó, reiniciando en 5s..."
+        sleep 5
+    done
+) &
+
 echo "👉 Levantando servidor Gunicorn..."
 exec gunicorn myblog.wsgi --bind 0.0.0.0:8080
@@ -0,0 +1,9 @@
+# gunicorn.conf.py — gunicorn lo carga solo desde el directorio de trabajo
+# (Procfile y entrypoint.sh).
+import os
+
+# Hilos solo con el escritor único (blog/writer.py): es quien serializa las
+# escrituras de todos los hilos del proceso. Sin él se mantienen los workers
+# sync de siempre y cada petición tiene su proceso y su conexión SQLite.
+if os.environ.get("SQLITE_WRITER", "False") == "True":
+    threads = int(os.environ.get("GUNICORN_THREADS", "4"))
@@ -54,12 +54,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # ✅ Whitenoise para servir estáticos en prod
+    'blog.instrumentation.QueryInstrumentationMiddleware',   # consultas por vista (QUERY_INSTRUMENTATION)
     'django.contrib.sessions.middleware.SessionMiddleware',   # antes que Auth
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.replica.ReplicaPinMiddleware',   # leer lo propio tras un POST (READ_REPLICA)
 ]
 
 # --- URLs / WSGI ---
@@ -69,7 +71,8 @@ WSGI_APPLICATION = 'myblog.wsgi.application'
 # --- Templates (motor DjangoTemplates) ---
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el render (blog/instrumentation.py)
+        'BACKEND': 'blog.instrumentation.TimedDjangoTemplates',
         'DIRS': [],  # carpeta global de templates si quieres usar BASE_DIR / "templates"
         'APP_DIRS': True,   # habilita blog/templates/
         'OPTIONS': {
@@ -78,25 +81,131 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'blog.context_processors.global_tags',
 
-                # 🔥 nuestros processors
+                # 🔥 nuestros processors (perezosos: solo consultan si la plantilla los usa)
                 "blog.context_processors.global_tags",
                 "blog.context_processors.unread_notifications",
-                "blog.context_processors.latest_notifications",
+                "blog.context_processors.followed",
             ],
         },
     },
 ]
 
-# --- Base de datos (SQLite para desarrollo) ---
+# --- Base de datos (SQLite) ---
+# Perfil de producción (por defecto cuando DEBUG=False): WAL y PRAGMAs en cada
+# conexión (blog/sqlite.py) y conexiones persistentes entre requests.
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION', str(not DEBUG)) == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600' if SQLITE_PRODUCTION else '0')),
+        'CONN_HEALTH_CHECKS': SQLITE_PRODUCTION,
+    }
+}
+
+# Se aplican solo con SQLITE_PRODUCTION (bench_sqlite_writes las compara con las de serie)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',           # lectores y escritor no se bloquean entre sí
+    'synchronous': 'NORMAL',         # fsync en checkpoints, no en cada commit (seguro con WAL)
+    'busy_timeout': 5000,            # ms
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,            # negativo = KiB (~20 MB por conexión)
+    'temp_store': 'MEMORY',
+}
+
+# Escritor único por proceso (blog/writer.py): las escrituras cortas se agrupan
+# en lotes de hasta SQLITE_WRITER_BATCH, esperando como mucho SQLITE_WRITER_WAIT_MS.
+# Solo agrupa si el proceso atiende varias peticiones a la vez: con SQLITE_WRITER=True
+# gunicorn.conf.py arranca gunicorn con hilos (GUNICORN_THREADS, 4 por defecto);
+# sin él se queda con workers sync.
+SQLITE_WRITER = os.environ.get('SQLITE_WRITER', 'False') == 'True'
+SQLITE_WRITER_BATCH = int(os.environ.get('SQLITE_WRITER_BATCH', '50'))
+SQLITE_WRITER_WAIT_MS = float(os.environ.get('SQLITE_WRITER_WAIT_MS', '2'))
+
+# Tablas de interacción en sus propios archivos SQLite (blog/routers.py): una
+# avalancha de reacciones no bloquea publicar ni iniciar sesión. Tras activarlo:
+#   python manage.py migrate --database notifications
+#   python manage.py migrate --database interactions
+#   python manage.py move_interactions
+INTERACTION_DATABASES = {
+    'blog.notification': 'notifications',
+    'blog.archivednotification': 'notifications',
+    'blog.reaction': 'interactions',
+    'blog.reactioncounter': 'interactions',
+    'blog.commentvote': 'interactions',
+    'blog.reviewvote': 'interactions',
+}
+DATABASE_ROUTERS = []
+if os.environ.get('SQLITE_SPLIT_INTERACTIONS', 'False') == 'True':
+    for _alias in sorted(set(INTERACTION_DATABASES.values())):
+        DATABASES[_alias] = {**DATABASES['default'], 'NAME': BASE_DIR / f'{_alias}.sqlite3'}
+    DATABASE_ROUTERS.append('blog.routers.InteractionRouter')
+
+# Réplica de solo lectura (blog/replica.py) para listados, feeds y perfiles:
+# copia de db.sqlite3 que refresca `manage.py snapshot_replica --interval 15`.
+# Solo se usa si tiene menos de READ_REPLICA_MAX_LAG segundos.
+READ_REPLICA = os.environ.get('READ_REPLICA', 'False') == 'True'
+READ_REPLICA_PATH = BASE_DIR / 'replica.sqlite3'
+READ_REPLICA_MAX_LAG = int(os.environ.get('READ_REPLICA_MAX_LAG', '60'))
+READ_REPLICA_INTERVAL = int(os.environ.get('READ_REPLICA_INTERVAL', '15'))
+if READ_REPLICA:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': f'file:{READ_REPLICA_PATH}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS.insert(0, 'blog.replica.ReplicaRouter')
+
+# --- Instrumentación de consultas (blog/instrumentation.py) ---
+# Server-Timing, log `blog.instrumentation` y /instrumentacion/ (staff). El log va
+# a INFO: para verlo en producción configura LOGGING para ese logger.
+QUERY_INSTRUMENTATION = os.environ.get('QUERY_INSTRUMENTATION', str(DEBUG)) == 'True'
+
+# --- Caché ---
+# LocMem es por proceso: con varios workers de gunicorn usa una caché compartida
+# (ej. CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache,
+#  CACHE_LOCATION=/tmp/blog-cache) para que la invalidación llegue a todos.
+# PAGE_CACHE=True se niega a arrancar con LocMem (blog/page_cache.py).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'blog-cache'),
     }
 }
 
+# Caché de página completa para anónimos (blog/page_cache.py), desactivada por defecto
+PAGE_CACHE = {
+    'ENABLED': os.environ.get('PAGE_CACHE', 'False') == 'True',
+    'TIMEOUT': int(os.environ.get('PAGE_CACHE_TIMEOUT', '300')),
+}
+
+# --- Trabajos en segundo plano (blog/jobs.py) ---
+# En producción los procesa `python manage.py run_jobs` (línea worker del Procfile;
+# en Docker lo arranca entrypoint.sh junto a gunicorn).
+# En desarrollo, sin worker, se ejecutan al confirmar la transacción.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', str(DEBUG)) == 'True'
+
+# --- Retención de notificaciones (manage.py compact_notifications) ---
+# Leídas con más de READ_DAYS días y no leídas con más de UNREAD_DAYS se sacan de
+# la tabla principal; con ARCHIVE=True pasan a ArchivedNotification.
+NOTIFICATION_RETENTION = {
+    'READ_DAYS': int(os.environ.get('NOTIF_READ_DAYS', '30')),
+    'UNREAD_DAYS': int(os.environ.get('NOTIF_UNREAD_DAYS', '180')),
+    'ARCHIVE': os.environ.get('NOTIF_ARCHIVE', 'True') == 'True',
+}
+
+# --- Timeline de mi-feed (blog/timeline.py) ---
+# Autores/tags con más seguidores que esto no se reparten al publicar: cada
+# lector los trae al abrir su feed.
+TIMELINE_FANOUT_LIMIT = int(os.environ.get('TIMELINE_FANOUT_LIMIT', '5000'))
+
+# --- Derivados de imágenes (blog/images.py) ---
+# Procesos del pool que decodifican/reescalan en el worker; 0 = en línea.
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+
 # --- Validadores de contraseña ---
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -124,6 +233,8 @@ MEDIA_ROOT = BASE_DIR / 'media'          # asegúrate que exista: media/
 
 # --- CKEditor (con uploader) ---
 CKEDITOR_UPLOAD_PATH = 'uploads/'   # Carpeta de subida relativa a MEDIA_ROOT → media/uploads/
+# Subidas del editor deduplicadas por contenido (blobs/, ver blog/storage.py)
+CKEDITOR_STORAGE_BACKEND = 'blog.storage.ContentAddressedStorage'
 CKEDITOR_CONFIGS = {
     'default': {
         'toolbar': 'full',